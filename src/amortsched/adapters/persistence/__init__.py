@@ -1,4 +1,5 @@
 from amortsched.adapters.persistence.repositories import (
+    AsyncSqlAlchemyPackedScheduleRepository,
     AsyncSqlAlchemyPlanRepository,
     AsyncSqlAlchemyProfileRepository,
     AsyncSqlAlchemyScheduleRepository,
@@ -8,6 +9,7 @@ from amortsched.adapters.persistence.tables import metadata
 from amortsched.adapters.persistence.uow import AsyncSqlAlchemyUnitOfWork
 
 __all__ = [
+    "AsyncSqlAlchemyPackedScheduleRepository",
     "AsyncSqlAlchemyPlanRepository",
     "AsyncSqlAlchemyProfileRepository",
     "AsyncSqlAlchemyScheduleRepository",
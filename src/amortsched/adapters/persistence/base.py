@@ -1,56 +1,184 @@
-from collections.abc import AsyncIterator, Callable, Sequence
-from typing import Any, ClassVar, assert_type, cast
+import contextlib
+from collections.abc import AsyncIterator, Callable, Hashable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, ClassVar, Never, assert_type, cast
 from uuid import UUID
 
 import sqlalchemy
 import sqlalchemy.ext.asyncio
-from sqlalchemy.sql.schema import Table
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.schema import Column, Table
+from sqlalchemy.sql.selectable import NamedFromClause
 
 from amortsched.adapters.persistence.helpers import (
+    StatementCache,
+    TotalsCache,
+    build_bulk_update_statement,
+    build_keyset_paginated_query,
+    build_offset_paginated_query,
     build_postgres_upsert_statement,
     build_single_statement_paginated_query,
+    estimated_rows_from_plan,
     extract_paginated_items_and_total,
+    iter_batches,
+    match_any_parameter,
     normalize_paginated_limit,
+    split_keyset_page,
+    to_bulk_update_parameters,
 )
-from amortsched.adapters.persistence.mappers import RowLike
+from amortsched.adapters.persistence.mappers import RowTemplate
 from amortsched.adapters.persistence.relationships import (
     PlannedRelation,
     Relationship,
     RelationshipPlan,
+    attach_joined,
+    attach_related,
+    join_relations,
+    joined_readers,
     plan_relations,
 )
-from amortsched.adapters.persistence.specifications import compile_specification, ensure_no_relations, extract_relations
+from amortsched.adapters.persistence.specifications import (
+    compile_specification,
+    ensure_no_relations,
+    extract_fields,
+    extract_relations,
+    mentions_field,
+    parameterize_specification,
+)
 from amortsched.core.entities import Entity
-from amortsched.core.pagination import Paginated, Pagination
-from amortsched.core.specifications import Id, Specification
+from amortsched.core.errors import ConcurrentUpdateError
+from amortsched.core.pagination import Keyset, Paginated, Pagination, TotalsPolicy
+from amortsched.core.specifications import Id, IsDeleted, Specification
+
+# Bind parameter carrying the keys of the items whose relations are being loaded.
+_RELATED_KEYS = "related_keys"
+# Bind parameter carrying the number of rows a purge statement deletes at most.
+_PURGE_LIMIT = "purge_limit"
+
+
+@dataclass(frozen=True, slots=True)
+class PreparedSpecification[T: Entity]:
+    """A specification split into its value-free shape and the values to bind when executing it."""
+
+    shape: Specification[T] | None
+    filter_spec: Specification[T] | None
+    relation_plan: RelationshipPlan
+    parameters: dict[str, Any]
 
 
 class BaseRepository[T: Entity]:
     _table: ClassVar[Table]
-    _from_row: ClassVar[Callable[[RowLike], Any]]
+    _row_template: ClassVar[RowTemplate[Any]]
     _to_values: ClassVar[Callable[..., dict[str, object]]]
     _order_column: ClassVar[str] = "created_at"
     _not_found_error: ClassVar[type[Exception]]
     _relationships: ClassVar[dict[str, Relationship]]
+    # Entity fields a `Fields` projection may leave out, each mapped to the column values its entity is built from
+    # when the columns are not fetched.
+    _deferrable: ClassVar[dict[str, dict[str, object]]] = {}
+    _totals_cache: ClassVar[TotalsCache] = TotalsCache()
+    _statement_cache: ClassVar[StatementCache] = StatementCache()
+    _row_reader_cache: ClassVar[StatementCache] = StatementCache()
+    # Rows per statement for bulk writes; keep rows * columns well under PostgreSQL's 65535 bind parameters.
+    _bulk_batch_size: ClassVar[int] = 1000
+    # Whether `delete` only sets `is_deleted`. Reads then leave deleted rows out unless their specification tests
+    # `is_deleted` itself, and `purge` removes deleted rows for good.
+    _soft_delete: ClassVar[bool] = False
 
     @classmethod
     def _plan_requested_relations(
         cls, specification: Specification[T] | None
     ) -> tuple[Specification[T] | None, RelationshipPlan]:
-        filter_spec, relations = extract_relations(specification)
-        return filter_spec, plan_relations(cls._relationships, relations)
+        filter_spec, fields = extract_fields(specification)
+        filter_spec, relations = extract_relations(filter_spec)
+        return cls._scoped(filter_spec), plan_relations(cls._relationships, relations, fields)
+
+    @classmethod
+    def _scoped(cls, specification: Specification[T] | None) -> Specification[T] | None:
+        """`specification` limited to rows that are not soft-deleted, unless it tests `is_deleted` already."""
+        if not cls._soft_delete or mentions_field(specification, "is_deleted"):
+            return specification
+        return ~IsDeleted() if specification is None else specification & ~IsDeleted()
+
+    @classmethod
+    def _prepare(cls, specification: Specification[T] | None) -> PreparedSpecification[T]:
+        """Split `specification` into its cacheable shape and its values, planning each shape once."""
+        shape, parameters = parameterize_specification(specification)
+        filter_spec, relation_plan = cls._cached_statement(
+            ("plan", shape), lambda: cls._plan_requested_relations(shape)
+        )
+        return PreparedSpecification(shape, filter_spec, relation_plan, parameters)
+
+    @classmethod
+    def _cached_statement[S](cls, key: Hashable, build: Callable[[], S]) -> S:
+        return cls._statement_cache.get_or_build((cls, key), build)
+
+    @classmethod
+    def _where_clause(cls, prepared: PreparedSpecification[T]) -> ColumnElement[bool]:
+        return cls._cached_statement(
+            ("where", prepared.shape), lambda: compile_specification(cls._table, prepared.filter_spec)
+        )
+
+    @classmethod
+    def _deferred_values(cls, fields: frozenset[str] | None) -> dict[str, object]:
+        """Stand-in column values for the deferrable fields missing from `fields`."""
+        if fields is None:
+            return {}
+        return {
+            column: value
+            for name, values in cls._deferrable.items()
+            if name not in fields
+            for column, value in values.items()
+        }
 
     @classmethod
-    def _build_get_items_statement(cls, filter_spec: Specification[T] | None, limit: int | None = None):
+    def _selected_columns(cls, relation_plan: RelationshipPlan) -> list[Column[Any]]:
+        deferred = cls._deferred_values(relation_plan.fields)
+        return [column for column in cls._table.c if column.name not in deferred]
+
+    @classmethod
+    def _build_get_items_statement(
+        cls,
+        filter_spec: Specification[T] | None,
+        limit: int | None = None,
+        relation_plan: RelationshipPlan | None = None,
+        yield_per: int | None = None,
+    ):
+        relation_plan = relation_plan or RelationshipPlan()
         statement = (
-            sqlalchemy.select(cls._table)
+            sqlalchemy.select(*cls._selected_columns(relation_plan))
             .where(compile_specification(cls._table, filter_spec))
             .order_by(cls._table.c[cls._order_column])
         )
+        statement = join_relations(statement, relation_plan.joins)
         if limit is not None:
             statement = statement.limit(limit)
+        if yield_per is not None:
+            statement = statement.execution_options(yield_per=yield_per)
         return statement
 
+    @classmethod
+    def _row_reader(cls, columns: Sequence[str], relation_plan: RelationshipPlan) -> Callable[[Sequence[Any]], T]:
+        """Build items, with their joined relations, from rows whose columns are named `columns`, by position."""
+        columns = tuple(columns)
+        return cls._row_reader_cache.get_or_build(
+            (cls, columns, relation_plan.fields), lambda: cls._build_row_reader(columns, relation_plan)
+        )
+
+    @classmethod
+    def _build_row_reader(cls, columns: Sequence[str], relation_plan: RelationshipPlan) -> Callable[[Sequence[Any]], T]:
+        read = cls._row_template.positional(columns, cls._deferred_values(relation_plan.fields))
+        readers = joined_readers(columns, relation_plan.joins)
+        if not readers:
+            return read
+
+        def read_with_joined(row: Sequence[Any]) -> T:
+            item = read(row)
+            attach_joined(item, row, readers)
+            return item
+
+        return read_with_joined
+
     @classmethod
     def _build_count_statement(cls, filter_spec: Specification[T] | None):
         return (
@@ -66,24 +194,36 @@ class BaseRepository[T: Entity]:
         )
 
     @classmethod
-    def _build_paginated_statements(
-        cls,
-        specification: Specification[T] | None = None,
-        pagination: Pagination | None = None,
-    ):
-        filter_spec, relation_plan = cls._plan_requested_relations(specification)
+    def _build_delete_statement(cls, filter_spec: Specification[T] | None):
         where_clause = compile_specification(cls._table, filter_spec)
-        statement, limit, offset = build_single_statement_paginated_query(
-            cls._table,
-            where_clause,
-            cls._order_column,
-            pagination,
+        if not cls._soft_delete:
+            return sqlalchemy.delete(cls._table).where(where_clause)
+        values: dict[str, Any] = {"is_deleted": True}
+        if "revision" in cls._table.c:
+            values["revision"] = cls._table.c.revision + 1
+        return sqlalchemy.update(cls._table).where(where_clause).values(values)
+
+    @classmethod
+    def _build_purge_statement(cls, filter_spec: Specification[T] | None):
+        """`DELETE ... WHERE ctid IN (SELECT ctid ... LIMIT :purge_limit FOR UPDATE SKIP LOCKED)`.
+
+        PostgreSQL fetches the selected rows by their physical address, and rows locked elsewhere are left for a
+        later batch instead of being waited on.
+        """
+        purged = cls._table.alias("purged")
+        batch = (
+            sqlalchemy.select(sqlalchemy.literal_column(f"{purged.name}.ctid"))
+            .select_from(purged)
+            .where(compile_specification(purged, filter_spec), cls._purgeable(purged))
+            .limit(sqlalchemy.bindparam(_PURGE_LIMIT, type_=sqlalchemy.Integer))
+            .with_for_update(skip_locked=True)
         )
-        return statement, limit, offset, relation_plan
+        return sqlalchemy.delete(cls._table).where(sqlalchemy.literal_column(f"{cls._table.name}.ctid").in_(batch))
 
     @classmethod
-    def _build_delete_statement(cls, filter_spec: Specification[T] | None):
-        return sqlalchemy.delete(cls._table).where(compile_specification(cls._table, filter_spec))
+    def _purgeable(cls, table: NamedFromClause) -> ColumnElement[bool]:
+        """Condition on rows of `table` that may be purged, on top of the purge's specification."""
+        return sqlalchemy.true()
 
     @classmethod
     def _ensure_order_by_supported(cls, order_by: str | Sequence[str] | None) -> None:
@@ -95,8 +235,43 @@ class AsyncRepository[T: Entity](BaseRepository[T]):
     def __init__(self, session: sqlalchemy.ext.asyncio.AsyncSession) -> None:
         self._session = session
 
-    async def _load_relations(self, items: list[T], relations: list[PlannedRelation]) -> None:
-        pass
+    async def _load_relations(
+        self, items: list[T], relation_plan: RelationshipPlan, parameters: Mapping[str, Any] | None = None
+    ) -> None:
+        """Load the relations of `items` that were not joined into their query, one batched query per relation.
+
+        Nested relations are loaded the same way level by level, so a graph costs one round trip per relation and
+        level however many items it has. `parameters` are the values of the specification the plan came from.
+        """
+        for planned in relation_plan.select_ins:
+            relationship = planned.relationship
+            root_key = relationship.root_key_column.name
+            related_key = relationship.related_key_column.name
+            keys = list(dict.fromkeys(getattr(item, root_key) for item in items))
+            repository = relationship.repository()(self._session)
+            related = await repository._get_related(related_key, keys, planned, parameters or {}) if keys else []
+
+            related_by_key: dict[Any, list[Any]] = {}
+            for entity in related:
+                related_by_key.setdefault(getattr(entity, related_key), []).append(entity)
+            for item in items:
+                attach_related(item, relationship, related_by_key.get(getattr(item, root_key), []))
+
+    async def _get_related(
+        self, key_column: str, keys: Sequence[Any], planned: PlannedRelation, parameters: Mapping[str, Any]
+    ) -> list[T]:
+        """Fetch the items of `planned` whose `key_column` is one of `keys`, with the relations nested in it."""
+        statement = self._cached_statement(
+            ("related", key_column, planned.relation),
+            lambda: self._build_get_items_statement(planned.spec, relation_plan=planned.nested).where(
+                match_any_parameter(self._table.c[key_column], _RELATED_KEYS)
+            ),
+        )
+        result = await self._session.execute(statement, {**parameters, _RELATED_KEYS: keys})
+        read = self._row_reader(result.keys(), planned.nested)
+        items = [read(row) for row in result]
+        await self._load_relations(items, planned.nested, parameters)
+        return items
 
     async def get_by_id(self, id: UUID, specification: Specification[T] | None = None) -> T | None:
         filter_spec = Id(id) if specification is None else Id(id) & specification
@@ -118,17 +293,65 @@ class AsyncRepository[T: Entity](BaseRepository[T]):
         specification: Specification[T] | None = None,
         order_by: str | Sequence[str] | None = None,
         limit: int | None = None,
+        *,
+        yield_per: int | None = None,
     ) -> AsyncIterator[T]:
+        """Yield the matching items in `_order_column` order.
+
+        To-one relations are joined into the same statement; to-many relations cost one query per relation.
+        By default the whole result is fetched before the first item is yielded. With `yield_per`, rows are
+        streamed through a server-side cursor in chunks of that size and relations are loaded per chunk, so
+        memory stays bounded by the chunk rather than the result.
+        """
         self._ensure_order_by_supported(order_by)
-        filter_spec, relation_plan = self._plan_requested_relations(specification)
-        statement = self._build_get_items_statement(filter_spec, limit)
+        if yield_per is not None and yield_per <= 0:
+            raise ValueError("yield_per must be a positive integer")
+        prepared = self._prepare(specification)
+        relation_plan = prepared.relation_plan
+        statement = self._cached_statement(
+            ("items", prepared.shape, limit, yield_per),
+            lambda: self._build_get_items_statement(prepared.filter_spec, limit, relation_plan, yield_per),
+        )
 
-        rows = (await self._session.execute(statement)).mappings().all()
-        items = [self._from_row(row) for row in rows]
-        await self._load_relations(items, relation_plan.joins + relation_plan.select_ins)
+        if yield_per is None:
+            result = await self._session.execute(statement, prepared.parameters)
+            read = self._row_reader(result.keys(), relation_plan)
+            items = [read(row) for row in result]
+            await self._load_relations(items, relation_plan, prepared.parameters)
+            for item in items:
+                yield item
+            return
 
-        for item in items:
-            yield item
+        async with self._streamed(statement, prepared.parameters) as result:
+            read = self._row_reader(result.keys(), relation_plan)
+            async for partition in result.partitions():
+                items = [read(row) for row in partition]
+                await self._load_relations(items, relation_plan, prepared.parameters)
+                for item in items:
+                    yield item
+
+    @contextlib.asynccontextmanager
+    async def _streamed(
+        self, statement: sqlalchemy.Executable, parameters: Mapping[str, Any] | None = None
+    ) -> AsyncIterator[sqlalchemy.ext.asyncio.AsyncResult[Any]]:
+        """Result of `statement` read through a server-side cursor, closed on exit.
+
+        PostgreSQL declares cursors only inside a transaction block, so on an autocommit session (see
+        `read_session_factory`) the stream runs in a read-only transaction of its own.
+        """
+        connection = await self._session.connection()
+        autocommit = connection.sync_connection.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+        if autocommit:
+            await connection.exec_driver_sql("BEGIN READ ONLY")
+        try:
+            result = await self._session.stream(statement, parameters)
+            try:
+                yield result
+            finally:
+                await result.close()
+        finally:
+            if autocommit:
+                await connection.exec_driver_sql("COMMIT")
 
     async def get_paginated(
         self,
@@ -136,24 +359,118 @@ class AsyncRepository[T: Entity](BaseRepository[T]):
         pagination: Pagination | None = None,
     ) -> Paginated[T]:
         self._ensure_order_by_supported(None if pagination is None else pagination.order_by)
-        statement, limit, offset, relation_plan = self._build_paginated_statements(specification, pagination)
+        prepared = self._prepare(specification)
+        if isinstance(pagination, Keyset):
+            return await self._get_keyset_page(prepared, pagination)
+        if pagination is not None and pagination.totals is not TotalsPolicy.Exact:
+            return await self._get_offset_page(prepared, pagination)
+        relation_plan = prepared.relation_plan
+        statement, limit, offset = build_single_statement_paginated_query(
+            self._table,
+            self._where_clause(prepared),
+            self._order_column,
+            pagination,
+            relation_plan.joins,
+            self._selected_columns(relation_plan),
+        )
 
-        rows = (await self._session.execute(statement)).mappings().all()
-        items, total = extract_paginated_items_and_total(rows, "id", self._from_row)
+        result = await self._session.execute(statement, prepared.parameters)
+        items, total = extract_paginated_items_and_total(
+            result.all(), "id", self._row_reader(result.keys(), relation_plan)
+        )
         normalized_limit = normalize_paginated_limit(limit, total)
         assert_type(normalized_limit, int)
-        await self._load_relations(items, relation_plan.joins + relation_plan.select_ins)
+        await self._load_relations(items, relation_plan, prepared.parameters)
         return Paginated.from_limit_offset(items, total=total, limit=normalized_limit, offset=offset)
 
+    async def _get_offset_page(self, prepared: PreparedSpecification[T], pagination: Pagination) -> Paginated[T]:
+        relation_plan = prepared.relation_plan
+        statement, limit, offset = build_offset_paginated_query(
+            self._table,
+            self._where_clause(prepared),
+            self._order_column,
+            pagination,
+            relation_plan.joins,
+            self._selected_columns(relation_plan),
+        )
+
+        result = await self._session.execute(statement, prepared.parameters)
+        read = self._row_reader(result.keys(), relation_plan)
+        rows = result.all()
+        items = [read(row) for row in rows[:limit]]
+        await self._load_relations(items, relation_plan, prepared.parameters)
+
+        total, total_exact = await self._get_total(prepared, pagination.totals)
+        return Paginated.from_limit_offset(
+            items, total=total, limit=limit, offset=offset, total_exact=total_exact, has_next=len(rows) > limit
+        )
+
+    async def _get_keyset_page(self, prepared: PreparedSpecification[T], keyset: Keyset) -> Paginated[T]:
+        relation_plan = prepared.relation_plan
+        statement = build_keyset_paginated_query(
+            self._table,
+            self._where_clause(prepared),
+            self._order_column,
+            keyset,
+            relation_plan.joins,
+            self._selected_columns(relation_plan),
+        )
+
+        result = await self._session.execute(statement, prepared.parameters)
+        read = self._row_reader(result.keys(), relation_plan)
+        rows, next_cursor = split_keyset_page(result.all(), self._order_column, keyset.size)
+        items = [read(row) for row in rows]
+        await self._load_relations(items, relation_plan, prepared.parameters)
+
+        total, total_exact = await self._get_total(prepared, keyset.totals)
+        return Paginated.from_keyset(
+            items, size=keyset.size, next_cursor=next_cursor, total=total, total_exact=total_exact
+        )
+
+    async def _get_total(self, prepared: PreparedSpecification[T], policy: TotalsPolicy) -> tuple[int | None, bool]:
+        """Return the total for `policy` and whether it is an exact, freshly counted value."""
+        match policy:
+            case TotalsPolicy.Skip:
+                return None, False
+            case TotalsPolicy.Estimate:
+                return await self._estimate_total(prepared), False
+            case TotalsPolicy.Cached:
+                key = TotalsCache.key(self._table.name, (prepared.filter_spec, tuple(prepared.parameters.items())))
+                cached = self._totals_cache.get(key)
+                if cached is not None:
+                    return cached, False
+                total = await self._count(prepared)
+                self._totals_cache.set(key, total)
+                return total, True
+        return await self._count(prepared), True
+
+    async def _estimate_total(self, prepared: PreparedSpecification[T]) -> int:
+        statement = sqlalchemy.select(self._table).where(self._where_clause(prepared)).params(prepared.parameters)
+        connection = await self._session.connection()
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+        params = (
+            compiled.params
+            if compiled.positiontup is None
+            else tuple(compiled.params[name] for name in compiled.positiontup)
+        )
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+        return estimated_rows_from_plan(result.scalar_one())
+
     async def count(self, specification: Specification[T] | None = None) -> int:
-        filter_spec, _relation_plan = self._plan_requested_relations(specification)
-        statement = self._build_count_statement(filter_spec)
-        return cast(int, (await self._session.execute(statement)).scalar_one())
+        return await self._count(self._prepare(specification))
+
+    async def _count(self, prepared: PreparedSpecification[T]) -> int:
+        statement = self._cached_statement(
+            ("count", prepared.shape), lambda: self._build_count_statement(prepared.filter_spec)
+        )
+        return cast(int, (await self._session.execute(statement, prepared.parameters)).scalar_one())
 
     async def exists(self, specification: Specification[T]) -> bool:
-        filter_spec, _relation_plan = self._plan_requested_relations(specification)
-        statement = self._build_exists_statement(filter_spec)
-        return cast(bool, (await self._session.execute(statement)).scalar_one())
+        prepared = self._prepare(specification)
+        statement = self._cached_statement(
+            ("exists", prepared.shape), lambda: self._build_exists_statement(prepared.filter_spec)
+        )
+        return cast(bool, (await self._session.execute(statement, prepared.parameters)).scalar_one())
 
     async def add(self, item: T) -> T:
         statement = sqlalchemy.insert(self._table).values(**self._to_values(item))
@@ -161,27 +478,120 @@ class AsyncRepository[T: Entity](BaseRepository[T]):
         return item
 
     async def update(self, item: T) -> T:
-        statement = sqlalchemy.update(self._table).where(self._table.c.id == item.id).values(**self._to_values(item))
-        result = await self._session.execute(statement)
+        """Update the row of `item`; on tables with a `revision` column, only at the revision `item` was read at.
+
+        Raises the repository's not-found error if the row does not exist, and `ConcurrentUpdateError` if it was
+        updated since `item` was read.
+        """
+        result = await self._session.execute(self._build_update_statement(item))
         if result.rowcount == 0:
-            raise self._not_found_error(item.id)
+            await self._raise_unmatched([item])
+        self._advance_revisions([item])
         return item
 
+    def _build_update_statement(self, item: T):
+        values = self._to_values(item)
+        statement = sqlalchemy.update(self._table).where(self._table.c.id == item.id)
+        if "revision" in values:
+            statement = statement.where(self._table.c.revision == values["revision"])
+            values["revision"] = cast(int, values["revision"]) + 1
+        return statement.values(**values)
+
+    def _advance_revisions(self, items: Sequence[T]) -> None:
+        if "revision" in self._table.c:
+            for item in items:
+                cast(Any, item)._revision += 1
+
     async def save(self, item: T, conflict_on: Sequence[str] = ("id",)) -> T:
-        statement = build_postgres_upsert_statement(self._table, self._to_values(item), conflict_on)
-        await self._session.execute(statement)
+        await self._upsert([item], conflict_on)
         return item
 
+    async def _upsert(self, items: Sequence[T], conflict_on: Sequence[str]) -> None:
+        """Upsert `items` in one statement; an upsert overwrites whatever revision it finds, and advances it."""
+        values = [self._to_values(item) for item in items]
+        statement = build_postgres_upsert_statement(self._table, values, conflict_on)
+        if "revision" not in self._table.c:
+            await self._session.execute(statement)
+            return
+        keys = [self._table.c[name] for name in conflict_on]
+        result = await self._session.execute(statement.returning(self._table.c.revision, *keys))
+        revisions = {tuple(key): revision for revision, *key in result}
+        for item, item_values in zip(items, values, strict=True):
+            cast(Any, item)._revision = revisions[tuple(item_values[name] for name in conflict_on)]
+
+    async def bulk_add(self, items: Sequence[T], *, batch_size: int | None = None) -> Sequence[T]:
+        """Insert `items` with one multi-row `INSERT ... VALUES` per batch."""
+        for batch in iter_batches(items, batch_size or self._bulk_batch_size):
+            statement = sqlalchemy.insert(self._table).values([self._to_values(item) for item in batch])
+            await self._session.execute(statement)
+        return items
+
+    async def bulk_update(self, items: Sequence[T], *, batch_size: int | None = None) -> Sequence[T]:
+        """Update `items` by id with one executemany round trip per batch.
+
+        Raises the repository's not-found error if any of the rows does not exist, and `ConcurrentUpdateError` if any
+        was updated since it was read.
+        """
+        statement = build_bulk_update_statement(self._table)
+        for batch in iter_batches(items, batch_size or self._bulk_batch_size):
+            parameters = [to_bulk_update_parameters(self._to_values(item)) for item in batch]
+            result = await self._session.execute(statement, parameters)
+            if 0 <= result.rowcount < len(batch):
+                await self._raise_unmatched(batch)
+            self._advance_revisions(batch)
+        return items
+
+    async def bulk_save(
+        self, items: Sequence[T], conflict_on: Sequence[str] = ("id",), *, batch_size: int | None = None
+    ) -> Sequence[T]:
+        """Upsert `items` with one multi-row `INSERT ... ON CONFLICT DO UPDATE` per batch."""
+        for batch in iter_batches(items, batch_size or self._bulk_batch_size):
+            await self._upsert(batch, conflict_on)
+        return items
+
+    async def _raise_unmatched(self, items: Sequence[T]) -> Never:
+        """Raise for the first of `items` an update did not match: its row is missing, or at another revision."""
+        ids = [item.id for item in items]
+        revision = self._table.c.revision if "revision" in self._table.c else sqlalchemy.null()
+        statement = sqlalchemy.select(self._table.c.id, revision).where(self._table.c.id.in_(ids))
+        found = {id: revision for id, revision in await self._session.execute(statement)}
+        for item in items:
+            if item.id not in found:
+                raise self._not_found_error(item.id)
+            read_revision = getattr(item, "_revision", None)
+            if found[item.id] != read_revision:
+                raise ConcurrentUpdateError(type(item).__name__, item.id, cast(int, read_revision))
+        raise self._not_found_error(ids[0])
+
     async def delete(self, specification: Specification[T]) -> int:
+        """Delete the matching rows, or mark them deleted where deletes are soft, and return how many."""
         ensure_no_relations(specification, "delete")
-        filter_spec, _relations = extract_relations(specification)
-        statement = self._build_delete_statement(filter_spec)
-        result = await self._session.execute(statement)
+        prepared = self._prepare(specification)
+        statement = self._cached_statement(
+            ("delete", prepared.shape), lambda: self._build_delete_statement(prepared.filter_spec)
+        )
+        result = await self._session.execute(statement, prepared.parameters)
         return result.rowcount
 
-    async def purge(self, specification: Specification[T]) -> int:
+    async def purge(self, specification: Specification[T], *, limit: int | None = None) -> int:
+        """Remove the matching rows for good; where deletes are soft, only rows that are deleted already.
+
+        Each statement removes one batch of rows; see `_build_purge_statement`. With `limit`, one batch of at most
+        `limit` rows is removed. Otherwise batches of `_bulk_batch_size` run until no matching row is left, all in
+        the session's transaction; callers purging large tables pass `limit` and commit between calls, as
+        `purge.purge_deleted` does, so no lock is held for long. Returns the number of rows removed.
+        """
         ensure_no_relations(specification, "purge")
-        filter_spec, _relations = extract_relations(specification)
-        statement = self._build_delete_statement(filter_spec)
-        result = await self._session.execute(statement)
-        return result.rowcount
+        if self._soft_delete and not mentions_field(specification, "is_deleted"):
+            specification = specification & IsDeleted()
+        prepared = self._prepare(specification)
+        statement = self._cached_statement(
+            ("purge", prepared.shape), lambda: self._build_purge_statement(prepared.filter_spec)
+        )
+        batch_size = limit or self._bulk_batch_size
+        total = 0
+        while True:
+            result = await self._session.execute(statement, {**prepared.parameters, _PURGE_LIMIT: batch_size})
+            total += result.rowcount
+            if limit is not None or result.rowcount < batch_size:
+                return total
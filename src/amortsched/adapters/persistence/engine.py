@@ -0,0 +1,176 @@
+"""Async engine construction with a tunable, instrumented connection pool."""
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# Execution option holding the statement timeout that `SET LOCAL` applies at the start of each transaction.
+_LOCAL_STATEMENT_TIMEOUT = "local_statement_timeout"
+
+
+@dataclass(slots=True)
+class PoolMetrics:
+    """Checkout wait counters of an `InstrumentedAsyncAdaptedQueuePool`, since the pool was created."""
+
+    checkouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStatus:
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    wait_seconds: float
+    max_wait_seconds: float
+    timeouts: int
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args: Any, metrics: PoolMetrics | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def connect(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except sqlalchemy.exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> InstrumentedAsyncAdaptedQueuePool:
+        # Keep counting across `engine.dispose()`, which swaps in a recreated pool.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_engine(
+    url: str,
+    *,
+    pool_size: int = 10,
+    max_overflow: int = 10,
+    pool_timeout: float = 30.0,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+    statement_timeout: int | None = None,
+    prepare_threshold: int | None = 5,
+    transaction_pooler: bool = False,
+    echo: bool = False,
+) -> AsyncEngine:
+    """Create the application engine.
+
+    `statement_timeout` is in milliseconds. `prepare_threshold` is psycopg's: executions of one query before it is
+    prepared server-side, None never prepares. With `transaction_pooler` (PgBouncer in transaction mode and the
+    like), connections are not pooled locally, server-side prepares are disabled and the timeout is set per
+    transaction, since neither prepared statements nor session settings survive the pooler handing the server
+    connection to another client. `read_session_factory` then keeps reads in a transaction too.
+    """
+    if transaction_pooler:
+        engine = create_async_engine(
+            url,
+            poolclass=NullPool,
+            connect_args={"prepare_threshold": None},
+            execution_options={_LOCAL_STATEMENT_TIMEOUT: statement_timeout},
+            echo=echo,
+        )
+        if statement_timeout is not None:
+            _set_local_statement_timeout(engine, statement_timeout)
+        return engine
+
+    connect_args: dict[str, Any] = {"prepare_threshold": prepare_threshold}
+    if statement_timeout is not None:
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+        echo=echo,
+    )
+
+
+class ReadOnlySession(Session):
+    """Session that refuses to execute INSERT, UPDATE and DELETE statements."""
+
+
+@sqlalchemy.event.listens_for(ReadOnlySession, "do_orm_execute")
+def _reject_writes(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        raise RuntimeError("Cannot write through a read-only session")
+
+
+def read_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    """Sessions for queries: each statement runs in autocommit, with no BEGIN and COMMIT around it.
+
+    Under the default READ COMMITTED isolation every statement sees its own snapshot either way, so a query loses
+    nothing by not being wrapped in a transaction and saves the round trips of opening and ending it. The engine
+    shares `engine`'s pool.
+
+    The exception is an engine behind a transaction pooler with a statement timeout: `SET LOCAL` has no effect
+    outside a transaction block, and a plain `SET` could reach another server connection than the query, so its
+    reads keep their transaction for the timeout to apply.
+    """
+    if engine.get_execution_options().get(_LOCAL_STATEMENT_TIMEOUT) is not None:
+        bind = engine
+    else:
+        bind = engine.execution_options(isolation_level="AUTOCOMMIT")
+    return async_sessionmaker(bind, sync_session_class=ReadOnlySession, expire_on_commit=False)
+
+
+def pool_status(engine: AsyncEngine) -> PoolStatus | None:
+    """Current occupancy and wait counters of the engine's pool; None when connections are not pooled."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    metrics = getattr(pool, "metrics", None) or PoolMetrics()
+    return PoolStatus(
+        size=pool.size(),
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        checkouts=metrics.checkouts,
+        wait_seconds=metrics.wait_seconds,
+        max_wait_seconds=metrics.max_wait_seconds,
+        timeouts=metrics.timeouts,
+    )
+
+
+def _set_local_statement_timeout(engine: AsyncEngine, timeout: int) -> None:
+    @sqlalchemy.event.listens_for(engine.sync_engine, "begin")
+    def _begin(connection: sqlalchemy.Connection) -> None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+__all__ = [
+    "InstrumentedAsyncAdaptedQueuePool",
+    "PoolMetrics",
+    "PoolStatus",
+    "ReadOnlySession",
+    "create_engine",
+    "pool_status",
+    "read_session_factory",
+]
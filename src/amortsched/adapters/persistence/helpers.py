@@ -1,20 +1,29 @@
-from collections.abc import Sequence
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator, Sequence
 from typing import Any, cast
 
 import sqlalchemy
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, aggregate_order_by
 from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
-from amortsched.core.pagination import LimitOffset, PageSize, Pagination
+from amortsched.adapters.persistence.relationships import PlannedRelation, join_relations
+from amortsched.core.pagination import Keyset, LimitOffset, PageSize, Pagination, decode_cursor, encode_cursor
 
 _TOTAL_COUNT_LABEL = "_amortsched_total_count"
 
 
-def build_postgres_upsert_statement(table, values: dict[str, object], conflict_columns: Sequence[str]):
-    insert_statement = postgresql_insert(table).values(**values)
+def build_postgres_upsert_statement(
+    table, values: dict[str, object] | Sequence[dict[str, object]], conflict_columns: Sequence[str]
+):
+    """Build `INSERT ... ON CONFLICT DO UPDATE` for one row, or for several rows as a single multi-row VALUES."""
+    insert_statement = postgresql_insert(table).values(values)
     conflict_set = set(conflict_columns)
     update_values = {
         column.name: insert_statement.excluded[column.name] for column in table.c if column.name not in conflict_set
     }
+    if "revision" in update_values:
+        update_values["revision"] = table.c.revision + 1
     return insert_statement.on_conflict_do_update(
         index_elements=[table.c[name] for name in conflict_columns],
         set_=update_values,
@@ -22,17 +31,23 @@ def build_postgres_upsert_statement(table, values: dict[str, object], conflict_c
 
 
 def build_single_statement_paginated_query(
-    table, where_clause: Any, order_column_name: str, pagination: Pagination | None
+    table,
+    where_clause: Any,
+    order_column_name: str,
+    pagination: Pagination | None,
+    joins: Sequence[PlannedRelation] = (),
+    columns: Sequence[Any] | None = None,
 ):
     requested_limit, offset = _resolve_limit_offset(pagination)
-    filtered = (
-        sqlalchemy.select(*table.c, sqlalchemy.func.count().over().label(_TOTAL_COUNT_LABEL))
-        .where(where_clause)
-        .subquery()
-    )
+    columns = table.c if columns is None else columns
+    filtered = join_relations(
+        sqlalchemy.select(*columns, sqlalchemy.func.count().over().label(_TOTAL_COUNT_LABEL)).where(where_clause),
+        joins,
+    ).subquery()
+    row_columns = [column.name for column in filtered.c if column.name != _TOTAL_COUNT_LABEL]
     page = (
         sqlalchemy.select(
-            *[filtered.c[column.name] for column in table.c],
+            *[filtered.c[name] for name in row_columns],
             filtered.c[_TOTAL_COUNT_LABEL],
         )
         .select_from(filtered)
@@ -48,7 +63,7 @@ def build_single_statement_paginated_query(
 
     statement = (
         sqlalchemy.select(
-            *[page.c[column.name] for column in table.c],
+            *[page.c[name] for name in row_columns],
             summary.c[_TOTAL_COUNT_LABEL],
         )
         .select_from(summary.outerjoin(page, sqlalchemy.true()))
@@ -57,12 +72,199 @@ def build_single_statement_paginated_query(
     return statement, requested_limit, offset
 
 
+def match_any(column, values: Sequence[Any]):
+    """`column = ANY(:values)` with all of `values` bound as one array parameter.
+
+    Unlike `IN`, which takes one bind parameter per value, the statement is the same for any number of keys and is
+    not limited by PostgreSQL's 65535 parameters, so relations of large parent batches load in one query.
+    """
+    return column == sqlalchemy.any_(sqlalchemy.literal(list(values), ARRAY(column.type)))
+
+
+def match_any_parameter(column, key: str):
+    """`column = ANY(:key)`, for statements built once and executed with the array passed as parameter `key`."""
+    return column == sqlalchemy.any_(sqlalchemy.bindparam(key, type_=ARRAY(column.type)))
+
+
+def jsonb_append_sorted(column, key: str, sort_key: str):
+    """`column` with the element bound as parameter `key` appended, re-sorted by the element's `sort_key` text.
+
+    Elements with equal keys keep their order, the new one last. The whole array is computed in the database,
+    so appending to it does not need the current value to be read first.
+    """
+    appended = column.op("||")(sqlalchemy.func.jsonb_build_array(sqlalchemy.bindparam(key, type_=JSONB)))
+    elements = (
+        sqlalchemy.func.jsonb_array_elements(appended)
+        .table_valued(sqlalchemy.column("value", JSONB), with_ordinality="position")
+        .render_derived(name="element")
+    )
+    ordered = aggregate_order_by(elements.c.value, elements.c.value[sort_key].astext, elements.c.position)
+    return sqlalchemy.select(sqlalchemy.func.jsonb_agg(ordered)).scalar_subquery()
+
+
+def iter_batches[T](items: Sequence[T], batch_size: int) -> Iterator[Sequence[T]]:
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer")
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+def build_bulk_update_statement(table):
+    """Build an `UPDATE ... WHERE id = :b_id` whose every column is a bind parameter, for executemany.
+
+    Parameters are prefixed with `b_` because SQLAlchemy reserves the bare column names in the SET clause. Rows of
+    tables with a `revision` column are only updated at the revision bound to `b_read_revision`.
+    """
+    statement = sqlalchemy.update(table).where(table.c.id == sqlalchemy.bindparam("b_id"))
+    if "revision" in table.c:
+        statement = statement.where(table.c.revision == sqlalchemy.bindparam("b_read_revision"))
+    return statement.values({column.name: sqlalchemy.bindparam(f"b_{column.name}") for column in table.c})
+
+
+def to_bulk_update_parameters(values: dict[str, object]) -> dict[str, object]:
+    parameters = {f"b_{name}": value for name, value in values.items()}
+    if "revision" in values:
+        parameters["b_read_revision"] = values["revision"]
+        parameters["b_revision"] = cast(int, values["revision"]) + 1
+    return parameters
+
+
+def build_offset_paginated_query(
+    table,
+    where_clause: Any,
+    order_column_name: str,
+    pagination: Pagination,
+    joins: Sequence[PlannedRelation] = (),
+    columns: Sequence[Any] | None = None,
+):
+    """Select one offset page without counting; one extra row is fetched to tell whether there is a next page."""
+    limit, offset = _resolve_limit_offset(pagination)
+    statement = sqlalchemy.select(*(table.c if columns is None else columns))
+    statement = statement.where(where_clause).order_by(table.c[order_column_name])
+    statement = join_relations(statement, joins)
+    return statement.limit(cast(int, limit) + 1).offset(offset), cast(int, limit), offset
+
+
+def build_keyset_paginated_query(
+    table,
+    where_clause: Any,
+    order_column_name: str,
+    keyset: Keyset,
+    joins: Sequence[PlannedRelation] = (),
+    columns: Sequence[Any] | None = None,
+):
+    """Select one page after `keyset.after`, seeking on `(order_column, id)` instead of skipping rows.
+
+    One extra row is fetched to tell whether there is a next page; see `split_keyset_page`.
+    """
+    order_column = table.c[order_column_name]
+    statement = sqlalchemy.select(*(table.c if columns is None else columns)).where(where_clause)
+    statement = join_relations(statement, joins)
+    if keyset.after is not None:
+        last_value, last_id = decode_cursor(keyset.after)
+        statement = statement.where(sqlalchemy.tuple_(order_column, table.c.id) > (last_value, last_id))
+    return statement.order_by(order_column, table.c.id).limit(keyset.size + 1)
+
+
+def split_keyset_page(rows: Sequence[Any], order_column_name: str, size: int) -> tuple[Sequence[Any], str | None]:
+    """Drop the look-ahead row of a keyset page and return the rows with the cursor of the next page, if any."""
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]._mapping
+    return rows, encode_cursor((last[order_column_name], last["id"]))
+
+
+def estimated_rows_from_plan(plan: Any) -> int:
+    """Read the planner's row estimate from the output of `EXPLAIN (FORMAT JSON)`."""
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class TotalsCache:
+    """Exact totals kept per (table, filter) for `ttl` seconds, in process memory.
+
+    Keys carry the filter's parameter values, user ids among them, so the cache is bounded: expired entries are
+    swept whenever a total is stored and the least recently used one is evicted past `maxsize`.
+    """
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[float, int]] = OrderedDict()
+
+    @staticmethod
+    def key(table_name: str, filter_spec: Any) -> tuple[str, Hashable]:
+        try:
+            hash(filter_spec)
+        except TypeError:
+            return table_name, repr(filter_spec)
+        return table_name, filter_spec
+
+    def get(self, key: tuple[str, Hashable]) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, total = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return total
+
+    def set(self, key: tuple[str, Hashable], total: int) -> None:
+        now = time.monotonic()
+        for expired in [entry_key for entry_key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[expired]
+        self._entries[key] = (now + self.ttl, total)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class StatementCache:
+    """Statements and plans built from specification shapes, least recently used evicted past `maxsize`.
+
+    Reusing the same statement object skips building the expression and its SQLAlchemy cache key, and keeps the
+    SQL text stable so the driver can prepare it. Keys that cannot be hashed are built every time.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get_or_build[V](self, key: Hashable, build: Callable[[], V]) -> V:
+        try:
+            entry = self._entries.get(key)
+        except TypeError:
+            return build()
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        entry = build()
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 def extract_paginated_items_and_total(rows: Sequence[Any], item_id_column_name: str, item_factory):
     if not rows:
         return [], 0
 
-    total = cast(int, rows[0][_TOTAL_COUNT_LABEL])
-    items = [item_factory(row) for row in rows if row[item_id_column_name] is not None]
+    total = cast(int, rows[0]._mapping[_TOTAL_COUNT_LABEL])
+    items = [item_factory(row) for row in rows if row._mapping[item_id_column_name] is not None]
     return items, total
 
 
@@ -78,5 +280,7 @@ def _resolve_limit_offset(pagination: Pagination | None) -> tuple[int | None, in
             return size, (page - 1) * size
         case LimitOffset(limit=limit, offset=offset):
             return limit, offset
+        case Keyset():
+            raise ValueError("Keyset pagination does not use limit/offset")
         case None:
             return None, 0
@@ -0,0 +1,161 @@
+"""Bulk ingest through PostgreSQL `COPY ... FROM STDIN (FORMAT BINARY)` on the session's psycopg connection.
+
+Rows are written as they are produced; upserts go through a temporary staging table and one merge statement.
+"""
+
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Mapping, Sequence
+from typing import Any
+
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.sql.schema import Table
+
+from amortsched.adapters.persistence.mappers import installment_rows, plan_to_values, schedule_to_values
+from amortsched.adapters.persistence.tables import plans, schedule_installments, schedules
+from amortsched.core.entities import Plan, Schedule
+
+type Rows[T] = Iterable[T] | AsyncIterable[T]
+
+
+# Checked in order; the first matching base class wins.
+_COPY_TYPE_NAMES: tuple[tuple[type[sqlalchemy.types.TypeEngine[Any]], str], ...] = (
+    (sqlalchemy.Uuid, "uuid"),
+    (JSONB, "jsonb"),
+    (sqlalchemy.Boolean, "bool"),
+    (sqlalchemy.Integer, "int4"),
+    (sqlalchemy.Numeric, "numeric"),
+    (sqlalchemy.DateTime, "timestamp"),
+    (sqlalchemy.Date, "date"),
+    (sqlalchemy.LargeBinary, "bytea"),
+    (sqlalchemy.String, "text"),
+)
+
+
+def copy_type_name(column_type: sqlalchemy.types.TypeEngine[Any]) -> str:
+    """PostgreSQL type name psycopg needs to dump a column in binary COPY format."""
+    if isinstance(column_type, sqlalchemy.DateTime) and column_type.timezone:
+        return "timestamptz"
+    for type_, name in _COPY_TYPE_NAMES:
+        if isinstance(column_type, type_):
+            return name
+    raise NotImplementedError(f"No COPY type for column type {column_type!r}")
+
+
+async def copy_rows(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    table: Table,
+    rows: Rows[Mapping[str, object]],
+    *,
+    conflict_on: Sequence[str] | None = None,
+) -> int:
+    """Stream `rows` (column name to value) into `table` and return how many were copied.
+
+    With `conflict_on`, rows are merged: existing rows matching on those columns are updated instead of
+    raising a unique violation.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if not hasattr(driver_connection, "cursor"):
+        raise NotImplementedError("COPY ingest requires the psycopg async driver")
+
+    target = table.name
+    if conflict_on is not None:
+        target = f"_copy_{table.name}_{uuid.uuid4().hex[:12]}"
+        await connection.exec_driver_sql(f'CREATE TEMPORARY TABLE "{target}" (LIKE "{table.name}") ON COMMIT DROP')
+
+    names = [column.name for column in table.c]
+    columns = ", ".join(f'"{name}"' for name in names)
+    count = 0
+    async with driver_connection.cursor() as cursor:
+        async with cursor.copy(f'COPY "{target}" ({columns}) FROM STDIN (FORMAT BINARY)') as copy:
+            copy.set_types([copy_type_name(column.type) for column in table.c])
+            if isinstance(rows, AsyncIterable):
+                async for row in rows:
+                    await copy.write_row([row[name] for name in names])
+                    count += 1
+            else:
+                for row in rows:
+                    await copy.write_row([row[name] for name in names])
+                    count += 1
+
+    if conflict_on is not None:
+        await connection.execute(_build_merge_statement(table, target, conflict_on))
+        await connection.exec_driver_sql(f'DROP TABLE "{target}"')
+    return count
+
+
+async def copy_plans(
+    session: sqlalchemy.ext.asyncio.AsyncSession, items: Rows[Plan], *, conflict_on: Sequence[str] | None = None
+) -> int:
+    return await copy_rows(session, plans, _map_rows(items, plan_to_values), conflict_on=conflict_on)
+
+
+async def copy_schedules(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    items: Rows[Schedule],
+    *,
+    conflict_on: Sequence[str] | None = None,
+    chunk_size: int = 1000,
+) -> int:
+    """Copy schedules and their `schedule_installments` rows, `chunk_size` schedules per pair of COPY streams.
+
+    With `conflict_on`, the installments of merged schedules are replaced.
+    """
+    count = 0
+    async for chunk in _chunks(items, chunk_size):
+        count += await copy_rows(session, schedules, map(schedule_to_values, chunk), conflict_on=conflict_on)
+        if conflict_on is not None:
+            await session.execute(
+                sqlalchemy.delete(schedule_installments).where(
+                    schedule_installments.c.schedule_id.in_([item.id for item in chunk])
+                )
+            )
+        rows = (row for item in chunk for row in installment_rows(item))
+        await copy_rows(session, schedule_installments, rows)
+    return count
+
+
+async def _chunks[T](items: Rows[T], size: int) -> AsyncIterator[list[T]]:
+    chunk: list[T] = []
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _map_rows[T](items: Rows[T], to_values: Callable[[T], dict[str, object]]) -> Rows[dict[str, object]]:
+    if isinstance(items, AsyncIterable):
+        return (to_values(item) async for item in items)
+    return (to_values(item) for item in items)
+
+
+def _build_merge_statement(table: Table, staging_name: str, conflict_on: Sequence[str]):
+    staging = sqlalchemy.table(staging_name, *[sqlalchemy.column(column.name) for column in table.c])
+    statement = postgresql_insert(table).from_select(
+        [column.name for column in table.c],
+        sqlalchemy.select(*[staging.c[column.name] for column in table.c]),
+    )
+    conflict_set = set(conflict_on)
+    update_values = {
+        column.name: statement.excluded[column.name] for column in table.c if column.name not in conflict_set
+    }
+    if "revision" in update_values:
+        update_values["revision"] = table.c.revision + 1
+    return statement.on_conflict_do_update(index_elements=[table.c[name] for name in conflict_on], set_=update_values)
+
+
+__all__ = ["copy_plans", "copy_rows", "copy_schedules"]
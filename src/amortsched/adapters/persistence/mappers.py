@@ -1,6 +1,9 @@
 import datetime
-from collections.abc import Mapping
-from decimal import Decimal
+import struct
+import zlib
+from collections.abc import Callable, Mapping, Sequence
+from decimal import ROUND_HALF_EVEN, Decimal
+from string import Formatter
 from typing import Any, cast
 
 from amortsched.core.entities import Plan, Profile, RefreshToken, Schedule, User
@@ -14,6 +17,7 @@ from amortsched.core.values import (
     OneTimeExtraPayment,
     Payment,
     PaymentKind,
+    PlanEvent,
     RecurringExtraPayment,
     ScheduleTotals,
     Term,
@@ -21,6 +25,90 @@ from amortsched.core.values import (
 
 type RowLike = Mapping[str, Any] | Any
 
+# Packed installments layout, version 1 (all integers little-endian):
+#   header   magic "AMI", version u8, flags u8 (bit 0: body is zlib-compressed)
+#   body     count u32, scale u8, then one array per column of `count` items:
+#            i i32 (-1 for extra payments), year u16, month u8, kind u8 (index into _PACKED_KINDS),
+#            principal, interest, fees, balance before, balance after as i64 in units of 10**-scale.
+_PACKED_MAGIC = b"AMI"
+_PACKED_VERSION = 1
+_PACKED_ZLIB = 0x01
+_PACKED_HEADER = struct.Struct("<3sBB")
+_PACKED_PREAMBLE = struct.Struct("<IB")
+_PACKED_KINDS = tuple(PaymentKind)
+_PACKED_KIND_CODES = {kind: code for code, kind in enumerate(_PACKED_KINDS)}
+
+
+class RowTemplate[E]:
+    """How an entity is built from its row: per entity field, an expression with a `{column}` placeholder per column.
+
+    The expressions are compiled into one function per way of reading the row, the way dataclasses compile
+    `__init__`, so building an entity costs a single call with the columns read in place: by position for a known
+    column order (`positional`), or by key or attribute (`from_row`). Fields whose name starts with an underscore
+    are assigned after the entity is constructed. `namespace` holds the names the expressions refer to.
+    """
+
+    def __init__(
+        self, entity: type[E], fields: Mapping[str, str], namespace: Mapping[str, object] | None = None
+    ) -> None:
+        self.entity = entity
+        self.fields = dict(fields)
+        self.namespace = dict(namespace or {})
+        self.columns = tuple(
+            dict.fromkeys(
+                name for source in self.fields.values() for _, name, _, _ in Formatter().parse(source) if name
+            )
+        )
+        self._from_mapping = self._compile({name: f"row[{name!r}]" for name in self.columns})
+        self._from_attributes = self._compile({name: f"row.{name}" for name in self.columns})
+
+    def from_row(self, row: RowLike) -> E:
+        if isinstance(row, Mapping):
+            return self._from_mapping(row)
+        return self._from_attributes(row)
+
+    def positional(
+        self, columns: Sequence[str], defaults: Mapping[str, object] | None = None, *, prefix: str = ""
+    ) -> Callable[[Sequence[Any]], E]:
+        """Compile a function building the entity from rows whose columns are named `columns`, in that order.
+
+        Columns are looked up as `prefix` followed by their name; those missing from `columns` take their value
+        from `defaults`. Compiling is far slower than reading a row, so callers keep the function per column order.
+        """
+        positions = {name: index for index, name in enumerate(columns)}
+        accessors: dict[str, str] = {}
+        constants: dict[str, object] = {}
+        for name in self.columns:
+            index = positions.get(prefix + name)
+            if index is not None:
+                accessors[name] = f"row[{index}]"
+            elif defaults is not None and name in defaults:
+                accessors[name] = f"_default_{len(constants)}"
+                constants[accessors[name]] = defaults[name]
+            else:
+                raise KeyError(f"Column '{prefix}{name}' is neither selected nor defaulted")
+        return self._compile(accessors, constants)
+
+    def _compile(self, accessors: Mapping[str, str], constants: Mapping[str, object] | None = None) -> Callable[..., E]:
+        arguments = ", ".join(
+            f"{name}={source.format_map(accessors)}" for name, source in self.fields.items() if name[0] != "_"
+        )
+        lines = ["def from_row(row):", f"    entity = _entity({arguments})"]
+        lines += [
+            f"    entity.{name} = {source.format_map(accessors)}"
+            for name, source in self.fields.items()
+            if name[0] == "_"
+        ]
+        lines.append("    return entity")
+        namespace = {**self.namespace, **(constants or {}), "_entity": self.entity}
+        exec("\n".join(lines), namespace)
+        return namespace["from_row"]
+
+
+def _direct(*columns: str) -> dict[str, str]:
+    """Fields read unconverted from the column of the same name."""
+    return {name: f"{{{name}}}" for name in columns}
+
 
 def user_to_values(user: User) -> dict[str, object]:
     return {
@@ -31,19 +119,12 @@ def user_to_values(user: User) -> dict[str, object]:
         "password_hash": user.password_hash,
         "created_at": user.created_at,
         "updated_at": user.updated_at,
+        "revision": user._revision,
     }
 
 
 def user_from_row(row: RowLike) -> User:
-    return User(
-        id=_row_value(row, "id"),
-        email=_row_value(row, "email"),
-        name=_row_value(row, "name"),
-        is_active=_row_value(row, "is_active"),
-        password_hash=_row_value(row, "password_hash"),
-        created_at=_row_value(row, "created_at"),
-        updated_at=_row_value(row, "updated_at"),
-    )
+    return USER_ROW.from_row(row)
 
 
 def profile_to_values(profile: Profile) -> dict[str, object]:
@@ -56,20 +137,12 @@ def profile_to_values(profile: Profile) -> dict[str, object]:
         "timezone": profile.timezone,
         "created_at": profile.created_at,
         "updated_at": profile.updated_at,
+        "revision": profile._revision,
     }
 
 
 def profile_from_row(row: RowLike) -> Profile:
-    return Profile(
-        id=_row_value(row, "id"),
-        user_id=_row_value(row, "user_id"),
-        display_name=_row_value(row, "display_name"),
-        phone=_row_value(row, "phone"),
-        locale=_row_value(row, "locale"),
-        timezone=_row_value(row, "timezone"),
-        created_at=_row_value(row, "created_at"),
-        updated_at=_row_value(row, "updated_at"),
-    )
+    return PROFILE_ROW.from_row(row)
 
 
 def plan_to_values(plan: Plan) -> dict[str, object]:
@@ -94,62 +167,144 @@ def plan_to_values(plan: Plan) -> dict[str, object]:
         "is_deleted": plan.is_deleted,
         "created_at": plan.created_at,
         "updated_at": plan.updated_at,
+        "revision": plan._revision,
     }
 
 
+def plan_event_to_payload(event: PlanEvent) -> tuple[str, dict[str, Any], str]:
+    """The plan column `event` is kept in, its payload, and the payload key the column is sorted by."""
+    match event:
+        case OneTimeExtraPayment():
+            return "one_time_extra_payments", _one_time_extra_payment_to_payload(event), "date"
+        case RecurringExtraPayment():
+            return "recurring_extra_payments", _recurring_extra_payment_to_payload(event), "start_date"
+        case InterestRateChange():
+            return "interest_rate_changes", _interest_rate_change_to_payload(event), "effective_date"
+
+
 def plan_from_row(row: RowLike) -> Plan:
-    return Plan(
-        id=_row_value(row, "id"),
-        user_id=_row_value(row, "user_id"),
-        name=_row_value(row, "name"),
-        slug=_row_value(row, "slug"),
-        amount=Decimal(str(_row_value(row, "amount"))),
-        term=Term(_row_value(row, "term_years"), _row_value(row, "term_months")),
-        interest_rate=Decimal(str(_row_value(row, "interest_rate"))),
-        start_date=_row_value(row, "start_date"),
-        early_payment_fees=_early_payment_fees_from_payload(_row_value(row, "early_payment_fees")),
-        interest_rate_application=InterestRateApplication(_row_value(row, "interest_rate_application")),
-        status=Plan.Status(_row_value(row, "status")),
-        one_time_extra_payments=[
-            _one_time_extra_payment_from_payload(item)
-            for item in cast(list[dict[str, Any]], _row_value(row, "one_time_extra_payments"))
-        ],
-        recurring_extra_payments=[
-            _recurring_extra_payment_from_payload(item)
-            for item in cast(list[dict[str, Any]], _row_value(row, "recurring_extra_payments"))
-        ],
-        interest_rate_changes=[
-            _interest_rate_change_from_payload(item)
-            for item in cast(list[dict[str, Any]], _row_value(row, "interest_rate_changes"))
-        ],
-        is_deleted=_row_value(row, "is_deleted"),
-        created_at=_row_value(row, "created_at"),
-        updated_at=_row_value(row, "updated_at"),
-    )
+    return PLAN_ROW.from_row(row)
 
 
 def schedule_to_values(schedule: Schedule) -> dict[str, object]:
     return {
         "id": schedule.id,
         "plan_id": schedule.plan_id,
-        "installments": [_installment_to_payload(item) for item in schedule.installments],
+        "installments": None,
+        "installments_packed": None,
         "totals": None if schedule.totals is None else _totals_to_payload(schedule.totals),
         "generated_at": schedule.generated_at,
         "is_deleted": schedule.is_deleted,
+        "revision": schedule._revision,
     }
 
 
+def packed_schedule_to_values(schedule: Schedule) -> dict[str, object]:
+    return {**schedule_to_values(schedule), "installments_packed": pack_installments(schedule.installments)}
+
+
 def schedule_from_row(row: RowLike) -> Schedule:
-    installments_payload = cast(list[dict[str, Any]], _row_value(row, "installments"))
-    totals_payload = cast(dict[str, Any] | None, _row_value(row, "totals"))
-    return Schedule(
-        id=_row_value(row, "id"),
-        plan_id=_row_value(row, "plan_id"),
-        installments=[_installment_from_payload(item) for item in installments_payload],
-        totals=None if totals_payload is None else _totals_from_payload(totals_payload),
-        generated_at=_row_value(row, "generated_at"),
-        is_deleted=_row_value(row, "is_deleted"),
+    return SCHEDULE_ROW.from_row(row)
+
+
+def pack_installments(installments: Sequence[Installment], *, scale: int = 2, compress: bool = True) -> bytes:
+    """Encode installments in the versioned columnar layout above.
+
+    Amounts are rounded half-even to `scale` decimal places, so the encoding is lossy below that precision.
+    """
+    quantum = Decimal(1).scaleb(-scale)
+    factor = 10**scale
+    count = len(installments)
+
+    def amounts(values: list[Decimal]) -> bytes:
+        return struct.pack(f"<{count}q", *(int(value.quantize(quantum, ROUND_HALF_EVEN) * factor) for value in values))
+
+    body = b"".join(
+        [
+            _PACKED_PREAMBLE.pack(count, scale),
+            struct.pack(f"<{count}i", *(-1 if item.i is None else item.i for item in installments)),
+            struct.pack(f"<{count}H", *(item.year for item in installments)),
+            struct.pack(f"<{count}B", *(int(item.month) for item in installments)),
+            struct.pack(f"<{count}B", *(_PACKED_KIND_CODES[item.payment.kind] for item in installments)),
+            amounts([item.payment.principal for item in installments]),
+            amounts([item.payment.interest for item in installments]),
+            amounts([item.payment.fees for item in installments]),
+            amounts([item.balance.before for item in installments]),
+            amounts([item.balance.after for item in installments]),
+        ]
     )
+    flags = 0
+    if compress:
+        body = zlib.compress(body)
+        flags |= _PACKED_ZLIB
+    return _PACKED_HEADER.pack(_PACKED_MAGIC, _PACKED_VERSION, flags) + body
+
+
+def unpack_installments(data: bytes) -> list[Installment]:
+    """Decode the output of `pack_installments`."""
+    magic, version, flags = _PACKED_HEADER.unpack_from(data)
+    if magic != _PACKED_MAGIC or version != _PACKED_VERSION:
+        raise ValueError(f"Unsupported packed installments format: {magic!r} v{version}")
+    body = data[_PACKED_HEADER.size :]
+    if flags & _PACKED_ZLIB:
+        body = zlib.decompress(body)
+
+    count, scale = _PACKED_PREAMBLE.unpack_from(body)
+    offset = _PACKED_PREAMBLE.size
+
+    def column(code: str, size: int) -> tuple[int, ...]:
+        nonlocal offset
+        values = struct.unpack_from(f"<{count}{code}", body, offset)
+        offset += count * size
+        return values
+
+    divisor = Decimal(10**scale)
+
+    def amounts() -> list[Decimal]:
+        return [Decimal(value) / divisor for value in column("q", 8)]
+
+    periods, years, months, kinds = column("i", 4), column("H", 2), column("B", 1), column("B", 1)
+    principal, interest, fees, before, after = amounts(), amounts(), amounts(), amounts(), amounts()
+    return [
+        Installment(
+            i=None if periods[n] < 0 else periods[n],
+            year=years[n],
+            month=Month(months[n]),
+            payment=Payment(kind=_PACKED_KINDS[kinds[n]], principal=principal[n], interest=interest[n], fees=fees[n]),
+            balance=Balance(before=before[n], after=after[n]),
+        )
+        for n in range(count)
+    ]
+
+
+def installment_rows(schedule: Schedule) -> list[dict[str, object]]:
+    """Rows of `schedule_installments` for a schedule, numbered by `seq` and tagged with their period."""
+    rows: list[dict[str, object]] = []
+    period = 1
+    for seq, installment in enumerate(schedule.installments):
+        rows.append(
+            {
+                "schedule_id": schedule.id,
+                "seq": seq,
+                "period": period,
+                "i": installment.i,
+                "year": installment.year,
+                "month": int(installment.month),
+                "kind": installment.payment.kind.value,
+                "principal": installment.payment.principal,
+                "interest": installment.payment.interest,
+                "fees": installment.payment.fees,
+                "balance_before": installment.balance.before,
+                "balance_after": installment.balance.after,
+            }
+        )
+        if installment.i is not None:
+            period += 1
+    return rows
+
+
+def installment_from_row(row: RowLike) -> Installment:
+    return INSTALLMENT_ROW.from_row(row)
 
 
 def refresh_token_to_values(token: RefreshToken) -> dict[str, object]:
@@ -166,22 +321,7 @@ def refresh_token_to_values(token: RefreshToken) -> dict[str, object]:
 
 
 def refresh_token_from_row(row: RowLike) -> RefreshToken:
-    return RefreshToken(
-        id=_row_value(row, "id"),
-        user_id=_row_value(row, "user_id"),
-        token_hash=_row_value(row, "token_hash"),
-        family_id=_row_value(row, "family_id"),
-        expires_at=_row_value(row, "expires_at"),
-        used_at=_row_value(row, "used_at"),
-        revoked_at=_row_value(row, "revoked_at"),
-        created_at=_row_value(row, "created_at"),
-    )
-
-
-def _row_value(row: RowLike, key: str) -> Any:
-    if isinstance(row, Mapping):
-        return row[key]
-    return getattr(row, key)
+    return REFRESH_TOKEN_ROW.from_row(row)
 
 
 def _decimal_to_string(value: Decimal) -> str:
@@ -254,24 +394,6 @@ def _interest_rate_change_from_payload(payload: Mapping[str, Any]) -> InterestRa
     )
 
 
-def _installment_to_payload(installment: Installment) -> dict[str, Any]:
-    return {
-        "i": installment.i,
-        "year": installment.year,
-        "month": int(installment.month),
-        "payment": {
-            "kind": installment.payment.kind.value,
-            "principal": _decimal_to_string(installment.payment.principal),
-            "interest": _decimal_to_string(installment.payment.interest),
-            "fees": _decimal_to_string(installment.payment.fees),
-        },
-        "balance": {
-            "before": _decimal_to_string(installment.balance.before),
-            "after": _decimal_to_string(installment.balance.after),
-        },
-    }
-
-
 def _installment_from_payload(payload: Mapping[str, Any]) -> Installment:
     payment_payload = cast(Mapping[str, Any], payload["payment"])
     balance_payload = cast(Mapping[str, Any], payload["balance"])
@@ -312,7 +434,101 @@ def _totals_from_payload(payload: Mapping[str, Any]) -> ScheduleTotals:
     )
 
 
+def _schedule_installments(payload: list[dict[str, Any]] | None, packed: bytes | None) -> list[Installment]:
+    if packed is not None:
+        return unpack_installments(packed)
+    if payload is not None:
+        return [_installment_from_payload(item) for item in payload]
+    return []
+
+
+USER_ROW = RowTemplate(
+    User,
+    {
+        **_direct("id", "email", "name", "is_active", "password_hash", "created_at", "updated_at"),
+        "_revision": "{revision}",
+    },
+)
+
+PROFILE_ROW = RowTemplate(
+    Profile,
+    {
+        **_direct("id", "user_id", "display_name", "phone", "locale", "timezone", "created_at", "updated_at"),
+        "_revision": "{revision}",
+    },
+)
+
+# psycopg returns NUMERIC columns as Decimal already.
+PLAN_ROW = RowTemplate(
+    Plan,
+    {
+        **_direct("id", "user_id", "name", "slug", "amount"),
+        "term": "Term({term_years}, {term_months})",
+        **_direct("interest_rate", "start_date"),
+        "early_payment_fees": "_early_payment_fees_from_payload({early_payment_fees})",
+        "interest_rate_application": "InterestRateApplication({interest_rate_application})",
+        "status": "Plan.Status({status})",
+        "one_time_extra_payments": "[_one_time_extra_payment_from_payload(item) for item in {one_time_extra_payments}]",
+        "recurring_extra_payments": (
+            "[_recurring_extra_payment_from_payload(item) for item in {recurring_extra_payments}]"
+        ),
+        "interest_rate_changes": "[_interest_rate_change_from_payload(item) for item in {interest_rate_changes}]",
+        **_direct("is_deleted", "created_at", "updated_at"),
+        "_revision": "{revision}",
+    },
+    {
+        "Plan": Plan,
+        "Term": Term,
+        "InterestRateApplication": InterestRateApplication,
+        "_early_payment_fees_from_payload": _early_payment_fees_from_payload,
+        "_one_time_extra_payment_from_payload": _one_time_extra_payment_from_payload,
+        "_recurring_extra_payment_from_payload": _recurring_extra_payment_from_payload,
+        "_interest_rate_change_from_payload": _interest_rate_change_from_payload,
+    },
+)
+
+SCHEDULE_ROW = RowTemplate(
+    Schedule,
+    {
+        **_direct("id", "plan_id"),
+        "installments": "_schedule_installments({installments}, {installments_packed})",
+        "totals": "None if {totals} is None else _totals_from_payload({totals})",
+        **_direct("generated_at", "is_deleted"),
+        "_revision": "{revision}",
+    },
+    {"_schedule_installments": _schedule_installments, "_totals_from_payload": _totals_from_payload},
+)
+
+INSTALLMENT_ROW = RowTemplate(
+    Installment,
+    {
+        **_direct("i", "year"),
+        "month": "Month({month})",
+        "payment": "Payment(kind=PaymentKind({kind}), principal={principal}, interest={interest}, fees={fees})",
+        "balance": "Balance(before={balance_before}, after={balance_after})",
+    },
+    {"Month": Month, "Payment": Payment, "PaymentKind": PaymentKind, "Balance": Balance},
+)
+
+REFRESH_TOKEN_ROW = RowTemplate(
+    RefreshToken,
+    _direct("id", "user_id", "token_hash", "family_id", "expires_at", "used_at", "revoked_at", "created_at"),
+)
+
+
 __all__ = [
+    "INSTALLMENT_ROW",
+    "PLAN_ROW",
+    "PROFILE_ROW",
+    "REFRESH_TOKEN_ROW",
+    "SCHEDULE_ROW",
+    "USER_ROW",
+    "RowTemplate",
+    "installment_from_row",
+    "installment_rows",
+    "pack_installments",
+    "packed_schedule_to_values",
+    "plan_event_to_payload",
     "plan_from_row",
     "plan_to_values",
     "profile_from_row",
@@ -321,6 +537,7 @@ __all__ = [
     "refresh_token_to_values",
     "schedule_from_row",
     "schedule_to_values",
+    "unpack_installments",
     "user_from_row",
     "user_to_values",
 ]
@@ -0,0 +1,34 @@
+"""Background removal of soft-deleted rows, one short transaction per batch."""
+
+from collections.abc import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from amortsched.adapters.persistence.repositories import (
+    AsyncSqlAlchemyPlanRepository,
+    AsyncSqlAlchemyScheduleRepository,
+)
+from amortsched.core.specifications import IsDeleted
+
+# Schedules first: a plan is only purged once none of its schedules are left.
+_PURGED_REPOSITORIES = (AsyncSqlAlchemyScheduleRepository, AsyncSqlAlchemyPlanRepository)
+
+
+async def purge_deleted(session_factory: Callable[[], AsyncSession], *, batch_size: int = 1000) -> int:
+    """Remove soft-deleted schedules and plans for good, committing after every batch of `batch_size` rows.
+
+    Locks last one batch at most, and rows locked by other transactions are skipped until the next run.
+    Returns the number of rows removed.
+    """
+    total = 0
+    for repository in _PURGED_REPOSITORIES:
+        while True:
+            async with session_factory() as session, session.begin():
+                removed = await repository(session).purge(IsDeleted(), limit=batch_size)
+            total += removed
+            if removed < batch_size:
+                break
+    return total
+
+
+__all__ = ["purge_deleted"]
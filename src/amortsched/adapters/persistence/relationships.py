@@ -1,11 +1,14 @@
-from collections.abc import Sequence
-from dataclasses import dataclass
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
 from typing import Any
 
+import sqlalchemy
+from sqlalchemy.sql import Select
 from sqlalchemy.sql.schema import Column, Table
 
+from amortsched.adapters.persistence.specifications import compile_specification, extract_fields, extract_relations
 from amortsched.core.entities import Entity
-from amortsched.core.specifications import With
+from amortsched.core.specifications import Specification, With
 
 type PartitionedRelations = tuple[Sequence[With[Entity]], Sequence[With[Entity]]]
 
@@ -17,22 +20,38 @@ class Relationship:
     entity: type
     root_key_column: Column[Any]
     related_key_column: Column[Any]
+    # Repository class of the related entity; a callable because repositories refer to each other.
+    repository: Callable[[], type[Any]]
     many: bool = False
+    # Attribute of the related entity pointing back at the root, set whenever the relation is loaded.
+    back_reference: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RelationshipPlan:
+    joins: list[PlannedRelation] = field(default_factory=list)
+    select_ins: list[PlannedRelation] = field(default_factory=list)
+    # Fields requested with `Fields` at this level; None loads every field.
+    fields: frozenset[str] | None = None
 
 
 @dataclass(frozen=True, slots=True)
 class PlannedRelation:
     relation: With[Entity]
     relationship: Relationship
+    # The relation's specification without its nested `With` and `Fields`, which are planned into `nested`.
+    spec: Specification[Any] | None = None
+    nested: RelationshipPlan = field(default_factory=RelationshipPlan)
 
 
-@dataclass(frozen=True, slots=True)
-class RelationshipPlan:
-    joins: list[PlannedRelation]
-    select_ins: list[PlannedRelation]
-
+def plan_relations(
+    config: dict[str, Relationship], relations: Sequence[With[Entity]], fields: frozenset[str] | None = None
+) -> RelationshipPlan:
+    """Plan `relations` and, recursively, the relations and projections nested in their specifications.
 
-def plan_relations(config: dict[str, Relationship], relations: Sequence[With[Entity]]) -> RelationshipPlan:
+    To-one relations without nested relations or projection are joined into the query of their level; all others
+    are loaded with one query per relation and level once the level above is in hand.
+    """
     joins: list[PlannedRelation] = []
     select_ins: list[PlannedRelation] = []
 
@@ -40,15 +59,88 @@ def plan_relations(config: dict[str, Relationship], relations: Sequence[With[Ent
         relationship = config.get(relation.relation)
         if relationship is None:
             raise ValueError(f"Unknown relationship '{relation.relation}'")
-        planned_relation = PlannedRelation(relation=relation, relationship=relationship)
-        if relationship.many:
+        spec, nested_fields = extract_fields(relation.spec)
+        spec, nested = extract_relations(spec)
+        planned_relation = PlannedRelation(
+            relation=relation,
+            relationship=relationship,
+            spec=relationship.repository()._scoped(spec),
+            nested=plan_relations(relationship.repository()._relationships, nested, nested_fields),
+        )
+        if relationship.many or nested or nested_fields is not None:
             select_ins.append(planned_relation)
         else:
             joins.append(planned_relation)
 
-    return RelationshipPlan(joins=joins, select_ins=select_ins)
+    return RelationshipPlan(joins=joins, select_ins=select_ins, fields=fields)
 
 
 def partition_relations(config: dict[str, Relationship], relations: Sequence[With[Entity]]) -> PartitionedRelations:
     plan = plan_relations(config, relations)
     return [item.relation for item in plan.joins], [item.relation for item in plan.select_ins]
+
+
+def join_relations[S: Select[Any]](statement: S, joins: Sequence[PlannedRelation]) -> S:
+    """LEFT JOIN each to-one relation onto `statement`, selecting its columns labelled `<key>__<column>`.
+
+    The relation's specification goes into the ON clause, so roots whose related row does not match are still
+    returned, with the relation unset; see `attach_joined`.
+    """
+    for planned in joins:
+        relationship = planned.relationship
+        related = relationship.table.alias(f"{relationship.key}_joined")
+        onclause = relationship.root_key_column == related.c[relationship.related_key_column.name]
+        if planned.spec is not None:
+            onclause = sqlalchemy.and_(onclause, compile_specification(related, planned.spec))
+        statement = statement.outerjoin(related, onclause).add_columns(
+            *[column.label(_joined_label(relationship.key, column.name)) for column in related.c]
+        )
+    return statement
+
+
+@dataclass(frozen=True, slots=True)
+class JoinedReader:
+    """Reads the entity of a joined to-one relation from the rows of its root."""
+
+    relationship: Relationship
+    # Position of the related key column; NULL when the root has no related row.
+    key_index: int
+    read: Callable[[Sequence[Any]], Any]
+
+
+def joined_readers(columns: Sequence[str], joins: Sequence[PlannedRelation]) -> list[JoinedReader]:
+    """Readers of the relations selected by `join_relations`, for rows whose columns are named `columns`."""
+    readers: list[JoinedReader] = []
+    for planned in joins:
+        relationship = planned.relationship
+        template = relationship.repository()._row_template
+        readers.append(
+            JoinedReader(
+                relationship=relationship,
+                key_index=list(columns).index(_joined_label(relationship.key, relationship.related_key_column.name)),
+                read=template.positional(columns, prefix=_joined_label(relationship.key, "")),
+            )
+        )
+    return readers
+
+
+def attach_joined(item: Any, row: Sequence[Any], readers: Sequence[JoinedReader]) -> None:
+    """Set the to-one relations selected by `join_relations` on `item` from its row."""
+    for reader in readers:
+        related = [] if row[reader.key_index] is None else [reader.read(row)]
+        attach_related(item, reader.relationship, related)
+
+
+def attach_related(item: Any, relationship: Relationship, related: Sequence[Any]) -> None:
+    """Set `related` (a list for to-many, the first entity or None for to-one) and its back references on `item`."""
+    if relationship.back_reference is not None:
+        for entity in related:
+            setattr(entity, relationship.back_reference, item)
+    if relationship.many:
+        setattr(item, relationship.key, list(related))
+    else:
+        setattr(item, relationship.key, related[0] if related else None)
+
+
+def _joined_label(key: str, column_name: str) -> str:
+    return f"{key}__{column_name}"
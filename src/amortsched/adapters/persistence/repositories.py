@@ -1,27 +1,44 @@
-from collections.abc import Sequence
-from typing import Any, Never, cast
+from collections.abc import AsyncIterator, Mapping, Sequence
+from typing import Any, ClassVar, Never
 from uuid import UUID
 
 import sqlalchemy
+import sqlalchemy.ext.asyncio
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import NamedFromClause
 
 from amortsched.adapters.persistence.base import AsyncRepository as BaseAsyncRepository
-from amortsched.adapters.persistence.helpers import build_postgres_upsert_statement
+from amortsched.adapters.persistence.helpers import (
+    iter_batches,
+    jsonb_append_sorted,
+    match_any,
+)
 from amortsched.adapters.persistence.mappers import (
-    plan_from_row,
+    INSTALLMENT_ROW,
+    PLAN_ROW,
+    PROFILE_ROW,
+    REFRESH_TOKEN_ROW,
+    SCHEDULE_ROW,
+    USER_ROW,
+    installment_rows,
+    packed_schedule_to_values,
+    plan_event_to_payload,
     plan_to_values,
-    profile_from_row,
     profile_to_values,
-    refresh_token_from_row,
     refresh_token_to_values,
-    schedule_from_row,
     schedule_to_values,
-    user_from_row,
     user_to_values,
 )
-from amortsched.adapters.persistence.relationships import PlannedRelation, Relationship
-from amortsched.adapters.persistence.specifications import compile_specification
-from amortsched.adapters.persistence.tables import plans, profiles, refresh_tokens, schedules, users
+from amortsched.adapters.persistence.relationships import Relationship, RelationshipPlan
+from amortsched.adapters.persistence.tables import (
+    plans,
+    profiles,
+    refresh_tokens,
+    schedule_installments,
+    schedules,
+    users,
+)
 from amortsched.core.entities import Plan, Profile, RefreshToken, Schedule, User
 from amortsched.core.errors import (
     DuplicateEmailError,
@@ -31,12 +48,32 @@ from amortsched.core.errors import (
     ScheduleNotFoundError,
     UserNotFoundError,
 )
-from amortsched.core.specifications import Specification, With
+from amortsched.core.specifications import Id, Specification
+from amortsched.core.utils import now
+from amortsched.core.values import Installment, PlanEvent, ScheduleWindow
+
+# Installments are always selected as whole `schedule_installments` rows, so their columns come in table order.
+_read_installment = INSTALLMENT_ROW.positional(schedule_installments.c.keys())
+_INSTALLMENT_SCHEDULE_ID = schedule_installments.c.keys().index("schedule_id")
+
+
+async def _load_schedule_installments(session: sqlalchemy.ext.asyncio.AsyncSession, items: Sequence[Schedule]) -> None:
+    """Fill in the installments of schedules read without them, in one query for all of `items`."""
+    pending = {item.id: item for item in items if not item.installments}
+    if not pending:
+        return
+    statement = (
+        sqlalchemy.select(schedule_installments)
+        .where(match_any(schedule_installments.c.schedule_id, list(pending)))
+        .order_by(schedule_installments.c.schedule_id, schedule_installments.c.seq)
+    )
+    for row in await session.execute(statement):
+        pending[row[_INSTALLMENT_SCHEDULE_ID]].installments.append(_read_installment(row))
 
 
 class AsyncSqlAlchemyUserRepository(BaseAsyncRepository[User]):
     _table = users
-    _from_row = staticmethod(user_from_row)
+    _row_template = USER_ROW
     _to_values = staticmethod(user_to_values)
     _not_found_error = UserNotFoundError
     _relationships = {
@@ -46,7 +83,9 @@ class AsyncSqlAlchemyUserRepository(BaseAsyncRepository[User]):
             entity=Plan,
             root_key_column=users.c.id,
             related_key_column=plans.c.user_id,
+            repository=lambda: AsyncSqlAlchemyPlanRepository,
             many=True,
+            back_reference="user",
         ),
         "profile": Relationship(
             key="profile",
@@ -54,23 +93,11 @@ class AsyncSqlAlchemyUserRepository(BaseAsyncRepository[User]):
             entity=Profile,
             root_key_column=users.c.id,
             related_key_column=profiles.c.user_id,
+            repository=lambda: AsyncSqlAlchemyProfileRepository,
+            back_reference="user",
         ),
     }
 
-    @staticmethod
-    def _build_plans_statement(user_ids: list[UUID], relation: With[Any]):
-        statement = sqlalchemy.select(plans).where(plans.c.user_id.in_(user_ids)).order_by(plans.c.created_at)
-        if relation.spec is not None:
-            statement = statement.where(compile_specification(plans, relation.spec))
-        return statement
-
-    @staticmethod
-    def _build_profiles_statement(user_ids: list[UUID], relation: With[Any]):
-        statement = sqlalchemy.select(profiles).where(profiles.c.user_id.in_(user_ids))
-        if relation.spec is not None:
-            statement = statement.where(compile_specification(profiles, relation.spec))
-        return statement
-
     @staticmethod
     def _raise_duplicate_email(exc: IntegrityError, email: str) -> Never:
         message = str(exc.orig)
@@ -91,65 +118,60 @@ class AsyncSqlAlchemyUserRepository(BaseAsyncRepository[User]):
         return item
 
     async def update(self, item: User) -> User:
-        statement = sqlalchemy.update(users).where(users.c.id == item.id).values(**user_to_values(item))
         result = None
         try:
-            result = await self._session.execute(statement)
+            result = await self._session.execute(self._build_update_statement(item))
         except IntegrityError as exc:
             self._raise_duplicate_email(exc, item.email)
         if result is None or result.rowcount == 0:
-            raise UserNotFoundError(item.id)
+            await self._raise_unmatched([item])
+        self._advance_revisions([item])
         return item
 
     async def save(self, item: User, conflict_on: Sequence[str] = ("id",)) -> User:
-        statement = build_postgres_upsert_statement(users, user_to_values(item), conflict_on)
         try:
-            await self._session.execute(statement)
+            await self._upsert([item], conflict_on)
         except IntegrityError as exc:
             self._raise_duplicate_email(exc, item.email)
         return item
 
-    async def _load_relations(self, items: list[User], relations: list[PlannedRelation]) -> None:
-        if not items:
-            return
-        user_ids = [item.id for item in items]
-        users_by_id = {item.id: item for item in items}
-
-        for relation in relations:
-            if relation.relationship.key == "plans":
-                await self._load_plans(users_by_id, user_ids, relation.relation)
-            elif relation.relationship.key == "profile":
-                await self._load_profile(users_by_id, user_ids, relation.relation)
-
-    async def _load_plans(self, users_by_id: dict[UUID, User], user_ids: list[UUID], relation: With[Any]) -> None:
-        statement = self._build_plans_statement(user_ids, relation)
-        rows = (await self._session.execute(statement)).mappings().all()
-
-        plans_by_user: dict[UUID, list[Plan]] = {user_id: [] for user_id in user_ids}
-        for row in rows:
-            plan = plan_from_row(row)
-            plan.user = users_by_id[plan.user_id]
-            plans_by_user[plan.user_id].append(plan)
+    async def bulk_add(self, items: Sequence[User], *, batch_size: int | None = None) -> Sequence[User]:
+        try:
+            return await super().bulk_add(items, batch_size=batch_size)
+        except IntegrityError as exc:
+            self._raise_duplicate_email(exc, self._conflicting_email(exc, items))
 
-        for user_id, user in users_by_id.items():
-            user.plans = plans_by_user.get(user_id, [])
+    async def bulk_update(self, items: Sequence[User], *, batch_size: int | None = None) -> Sequence[User]:
+        try:
+            return await super().bulk_update(items, batch_size=batch_size)
+        except IntegrityError as exc:
+            self._raise_duplicate_email(exc, self._conflicting_email(exc, items))
 
-    async def _load_profile(self, users_by_id: dict[UUID, User], user_ids: list[UUID], relation: With[Any]) -> None:
-        statement = self._build_profiles_statement(user_ids, relation)
-        rows = (await self._session.execute(statement)).mappings().all()
+    async def bulk_save(
+        self, items: Sequence[User], conflict_on: Sequence[str] = ("id",), *, batch_size: int | None = None
+    ) -> Sequence[User]:
+        try:
+            return await super().bulk_save(items, conflict_on, batch_size=batch_size)
+        except IntegrityError as exc:
+            self._raise_duplicate_email(exc, self._conflicting_email(exc, items))
 
-        profiles_by_user = {cast(UUID, row["user_id"]): profile_from_row(row) for row in rows}
-        for profile in profiles_by_user.values():
-            profile.user = users_by_id[profile.user_id]
-        for user_id, user in users_by_id.items():
-            user.profile = profiles_by_user.get(user_id)
+    @staticmethod
+    def _conflicting_email(exc: IntegrityError, items: Sequence[User]) -> str:
+        message = str(exc.orig)
+        return next((item.email for item in items if item.email in message), items[0].email if items else "")
 
 
 class AsyncSqlAlchemyPlanRepository(BaseAsyncRepository[Plan]):
     _table = plans
-    _from_row = staticmethod(plan_from_row)
+    _row_template = PLAN_ROW
     _to_values = staticmethod(plan_to_values)
     _not_found_error = PlanNotFoundError
+    _soft_delete = True
+    _deferrable = {
+        "one_time_extra_payments": {"one_time_extra_payments": []},
+        "recurring_extra_payments": {"recurring_extra_payments": []},
+        "interest_rate_changes": {"interest_rate_changes": []},
+    }
     _relationships = {
         "user": Relationship(
             key="user",
@@ -157,6 +179,7 @@ class AsyncSqlAlchemyPlanRepository(BaseAsyncRepository[Plan]):
             entity=User,
             root_key_column=plans.c.user_id,
             related_key_column=users.c.id,
+            repository=lambda: AsyncSqlAlchemyUserRepository,
         ),
         "schedules": Relationship(
             key="schedules",
@@ -164,72 +187,65 @@ class AsyncSqlAlchemyPlanRepository(BaseAsyncRepository[Plan]):
             entity=Schedule,
             root_key_column=plans.c.id,
             related_key_column=schedules.c.plan_id,
+            repository=lambda: AsyncSqlAlchemyScheduleRepository,
             many=True,
+            back_reference="plan",
         ),
     }
 
-    @staticmethod
-    def _build_users_statement(user_ids: list[UUID], specification: Specification[User] | None = None):
-        statement = sqlalchemy.select(users).where(users.c.id.in_(user_ids))
-        if specification is not None:
-            statement = statement.where(compile_specification(users, specification))
-        return statement
-
-    @staticmethod
-    def _build_schedules_statement(plan_ids: list[UUID], relation: With[Any]):
-        statement = (
-            sqlalchemy.select(schedules).where(schedules.c.plan_id.in_(plan_ids)).order_by(schedules.c.generated_at)
+    @classmethod
+    def _purgeable(cls, table: NamedFromClause) -> ColumnElement[bool]:
+        # Schedules reference their plan without cascading; a plan goes once its schedules have been purged.
+        return ~sqlalchemy.exists().where(schedules.c.plan_id == table.c.id)
+
+    async def add_event(
+        self, plan_id: UUID, event: PlanEvent, specification: Specification[Plan] | None = None
+    ) -> Plan | None:
+        """Insert `event` in date order into its column of the plan, if the plan matches `specification`.
+
+        One `UPDATE ... RETURNING` writes only that column, `updated_at` and `revision`, without reading the plan
+        first; appending commutes with concurrent updates, so it does not check the revision.
+        Returns the updated plan, or None when no plan has `plan_id` and matches `specification`.
+        """
+        column, payload, sort_key = plan_event_to_payload(event)
+        prepared = self._prepare(specification)
+        statement = self._cached_statement(
+            ("add_event", column, prepared.shape),
+            lambda: (
+                sqlalchemy.update(plans)
+                .where(plans.c.id == sqlalchemy.bindparam("plan_id"), self._where_clause(prepared))
+                .values(
+                    {
+                        column: jsonb_append_sorted(plans.c[column], "event", sort_key),
+                        "updated_at": sqlalchemy.bindparam("touched_at"),
+                        "revision": plans.c.revision + 1,
+                    }
+                )
+                .returning(*plans.c)
+            ),
         )
-        if relation.spec is not None:
-            statement = statement.where(compile_specification(schedules, relation.spec))
-        return statement
-
-    async def _load_relations(self, items: list[Plan], relations: list[PlannedRelation]) -> None:
-        if not items:
-            return
-        plan_ids = [item.id for item in items]
-        plans_by_id = {item.id: item for item in items}
-
-        for relation in relations:
-            if relation.relationship.key == "user":
-                await self._load_users(plans_by_id, relation.relation)
-            elif relation.relationship.key == "schedules":
-                await self._load_schedules(plans_by_id, plan_ids, relation.relation)
-
-    async def _load_users(self, plans_by_id: dict[UUID, Plan], relation: With[Any]) -> None:
-        user_ids = [plan.user_id for plan in plans_by_id.values()]
-        statement = self._build_users_statement(user_ids, relation.spec)
-        rows = (await self._session.execute(statement)).mappings().all()
-
-        users_by_id = {cast(UUID, row["id"]): user_from_row(row) for row in rows}
-        for plan in plans_by_id.values():
-            plan.user = users_by_id.get(plan.user_id)
-
-    async def _load_schedules(
-        self,
-        plans_by_id: dict[UUID, Plan],
-        plan_ids: list[UUID],
-        relation: With[Any],
-    ) -> None:
-        statement = self._build_schedules_statement(plan_ids, relation)
-        rows = (await self._session.execute(statement)).mappings().all()
+        parameters = {**prepared.parameters, "plan_id": plan_id, "event": payload, "touched_at": now()}
+        result = await self._session.execute(statement, parameters)
+        row = result.one_or_none()
+        return None if row is None else self._row_reader(result.keys(), RelationshipPlan())(row)
 
-        schedules_by_plan: dict[UUID, list[Schedule]] = {plan_id: [] for plan_id in plan_ids}
-        for row in rows:
-            schedule = schedule_from_row(row)
-            schedule.plan = plans_by_id[schedule.plan_id]
-            schedules_by_plan[schedule.plan_id].append(schedule)
 
-        for plan_id, plan in plans_by_id.items():
-            plan.schedules = schedules_by_plan.get(plan_id, [])
+class AsyncSqlAlchemyScheduleRepository(BaseAsyncRepository[Schedule]):
+    """Schedules with their installments stored as typed rows of `schedule_installments`.
 
+    Schedules written before that table existed keep their rows in the legacy `installments` JSONB column;
+    reads accept both, and `migrate_legacy_installments` moves them over.
+    """
 
-class AsyncSqlAlchemyScheduleRepository(BaseAsyncRepository[Schedule]):
     _table = schedules
-    _from_row = staticmethod(schedule_from_row)
+    _row_template = SCHEDULE_ROW
     _to_values = staticmethod(schedule_to_values)
     _order_column = "generated_at"
     _not_found_error = ScheduleNotFoundError
+    _soft_delete = True
+    _deferrable = {"installments": {"installments": None, "installments_packed": None}}
+    # Whether writes keep the installments as `schedule_installments` rows; subclasses storing them inline do not.
+    _stores_installment_rows: ClassVar[bool] = True
     _relationships = {
         "plan": Relationship(
             key="plan",
@@ -237,35 +253,170 @@ class AsyncSqlAlchemyScheduleRepository(BaseAsyncRepository[Schedule]):
             entity=Plan,
             root_key_column=schedules.c.plan_id,
             related_key_column=plans.c.id,
+            repository=lambda: AsyncSqlAlchemyPlanRepository,
         )
     }
 
     @staticmethod
-    def _build_plans_statement(plan_ids: list[UUID], specification: Specification[Plan] | None = None):
-        statement = sqlalchemy.select(plans).where(plans.c.id.in_(plan_ids))
-        if specification is not None:
-            statement = statement.where(compile_specification(plans, specification))
+    def _build_installments_statement(schedule_id: UUID, window: ScheduleWindow | None = None):
+        table = schedule_installments
+        statement = sqlalchemy.select(table).where(table.c.schedule_id == schedule_id).order_by(table.c.seq)
+        if window is None:
+            return statement
+        if window.first_period is not None:
+            statement = statement.where(table.c.period >= window.first_period)
+        if window.last_period is not None:
+            statement = statement.where(table.c.period <= window.last_period)
+        if window.from_date is not None:
+            statement = statement.where(
+                sqlalchemy.tuple_(table.c.year, table.c.month) >= (window.from_date.year, window.from_date.month)
+            )
+        if window.to_date is not None:
+            statement = statement.where(
+                sqlalchemy.tuple_(table.c.year, table.c.month) <= (window.to_date.year, window.to_date.month)
+            )
         return statement
 
-    async def _load_relations(self, items: list[Schedule], relations: list[PlannedRelation]) -> None:
+    async def add(self, item: Schedule) -> Schedule:
+        await super().add(item)
+        await self._insert_installments([item])
+        return item
+
+    async def update(self, item: Schedule) -> Schedule:
+        await super().update(item)
+        await self._replace_installments([item])
+        return item
+
+    async def save(self, item: Schedule, conflict_on: Sequence[str] = ("id",)) -> Schedule:
+        await super().save(item, conflict_on)
+        await self._replace_installments([item])
+        return item
+
+    async def bulk_add(self, items: Sequence[Schedule], *, batch_size: int | None = None) -> Sequence[Schedule]:
+        await super().bulk_add(items, batch_size=batch_size)
+        await self._insert_installments(items, batch_size)
+        return items
+
+    async def bulk_update(self, items: Sequence[Schedule], *, batch_size: int | None = None) -> Sequence[Schedule]:
+        await super().bulk_update(items, batch_size=batch_size)
+        await self._replace_installments(items, batch_size)
+        return items
+
+    async def bulk_save(
+        self, items: Sequence[Schedule], conflict_on: Sequence[str] = ("id",), *, batch_size: int | None = None
+    ) -> Sequence[Schedule]:
+        await super().bulk_save(items, conflict_on, batch_size=batch_size)
+        await self._replace_installments(items, batch_size)
+        return items
+
+    async def get_window(self, schedule_id: UUID, window: ScheduleWindow | None = None) -> Schedule | None:
+        """Fetch a live schedule with only the installments inside `window`, selected in SQL."""
+        prepared = self._prepare(Id(schedule_id))
+        relation_plan = prepared.relation_plan
+        statement = self._cached_statement(
+            ("items", prepared.shape, 1, None),
+            lambda: self._build_get_items_statement(prepared.filter_spec, 1, relation_plan),
+        )
+        result = await self._session.execute(statement, prepared.parameters)
+        row = result.first()
+        if row is None:
+            return None
+        schedule = self._row_reader(result.keys(), relation_plan)(row)
+        if schedule.installments:
+            # Kept inline, legacy or packed: read whole, so the window is applied after decoding.
+            if window is not None:
+                schedule.installments = list(window.select(schedule.installments))
+            return schedule
+        rows = await self._session.execute(self._build_installments_statement(schedule_id, window))
+        schedule.installments = [_read_installment(item) for item in rows]
+        return schedule
+
+    async def stream_installments(
+        self, schedule_id: UUID, window: ScheduleWindow | None = None, *, yield_per: int = 500
+    ) -> AsyncIterator[Installment]:
+        """Yield a migrated schedule's installments in order through a server-side cursor."""
+        statement = self._build_installments_statement(schedule_id, window).execution_options(yield_per=yield_per)
+        async with self._streamed(statement) as result:
+            async for row in result:
+                yield _read_installment(row)
+
+    async def get_due_installments(self, year: int, month: int) -> AsyncIterator[tuple[UUID, Installment]]:
+        """Yield `(schedule_id, installment)` for every row falling in `year`/`month` across live schedules."""
+        statement = (
+            sqlalchemy.select(schedule_installments)
+            .join(schedules, schedules.c.id == schedule_installments.c.schedule_id)
+            .where(schedule_installments.c.year == year)
+            .where(schedule_installments.c.month == month)
+            .where(sqlalchemy.not_(schedules.c.is_deleted))
+            .order_by(schedule_installments.c.schedule_id, schedule_installments.c.seq)
+        )
+        async with self._streamed(statement.execution_options(yield_per=500)) as result:
+            async for row in result:
+                yield row[_INSTALLMENT_SCHEDULE_ID], _read_installment(row)
+
+    async def migrate_legacy_installments(self, batch_size: int = 100) -> int:
+        """Move installments out of the legacy JSONB column, `batch_size` schedules at a time.
+
+        Returns the number of schedules migrated; run it until it returns 0.
+        """
+        statement = (
+            sqlalchemy.select(schedules)
+            .where(schedules.c.installments.is_not(None))
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self._session.execute(statement)
+        read = self._row_reader(result.keys(), RelationshipPlan())
+        items = [read(row) for row in result]
         if not items:
+            return 0
+        await self._replace_installments(items)
+        await self._session.execute(
+            sqlalchemy.update(schedules)
+            .where(schedules.c.id.in_([item.id for item in items]))
+            .values(installments=None)
+        )
+        return len(items)
+
+    async def _insert_installments(self, items: Sequence[Schedule], batch_size: int | None = None) -> None:
+        if not self._stores_installment_rows:
             return
-        schedules_by_id = {item.id: item for item in items}
-        plan_ids = [item.plan_id for item in items]
+        rows = [row for item in items for row in installment_rows(item)]
+        for batch in iter_batches(rows, batch_size or self._bulk_batch_size):
+            await self._session.execute(sqlalchemy.insert(schedule_installments).values(batch))
+
+    async def _replace_installments(self, items: Sequence[Schedule], batch_size: int | None = None) -> None:
+        if not self._stores_installment_rows:
+            return
+        schedule_ids = [item.id for item in items]
+        await self._session.execute(
+            sqlalchemy.delete(schedule_installments).where(schedule_installments.c.schedule_id.in_(schedule_ids))
+        )
+        await self._insert_installments(items, batch_size)
+
+    async def _load_relations(
+        self, items: list[Schedule], relation_plan: RelationshipPlan, parameters: Mapping[str, Any] | None = None
+    ) -> None:
+        await super()._load_relations(items, relation_plan, parameters)
+        if relation_plan.fields is None or "installments" in relation_plan.fields:
+            await _load_schedule_installments(self._session, items)
+
+
+class AsyncSqlAlchemyPackedScheduleRepository(AsyncSqlAlchemyScheduleRepository):
+    """Stores each schedule's installments inline as `pack_installments()` bytes instead of rows.
 
-        for relation in relations:
-            if relation.relationship.key != "plan":
-                continue
-            statement = self._build_plans_statement(plan_ids, relation.relation.spec)
-            rows = (await self._session.execute(statement)).mappings().all()
-            plans_by_id = {cast(UUID, row["id"]): plan_from_row(row) for row in rows}
-            for schedule in schedules_by_id.values():
-                schedule.plan = plans_by_id.get(schedule.plan_id)
+    48 bytes per installment before compression, decoded without parsing, but rounded to cents and read
+    whole: windows are applied after decoding, and `stream_installments`/`get_due_installments` do not see
+    these schedules. Suited to archives and exports rather than live plans.
+    """
+
+    _to_values = staticmethod(packed_schedule_to_values)
+    _stores_installment_rows = False
 
 
 class AsyncSqlAlchemyProfileRepository(BaseAsyncRepository[Profile]):
     _table = profiles
-    _from_row = staticmethod(profile_from_row)
+    _row_template = PROFILE_ROW
     _to_values = staticmethod(profile_to_values)
     _not_found_error = ProfileNotFoundError
     _relationships = {
@@ -275,45 +426,25 @@ class AsyncSqlAlchemyProfileRepository(BaseAsyncRepository[Profile]):
             entity=User,
             root_key_column=profiles.c.user_id,
             related_key_column=users.c.id,
+            repository=lambda: AsyncSqlAlchemyUserRepository,
         )
     }
 
-    @staticmethod
-    def _build_users_statement(profile_user_ids: list[UUID], specification: Specification[User] | None = None):
-        statement = sqlalchemy.select(users).where(users.c.id.in_(profile_user_ids))
-        if specification is not None:
-            statement = statement.where(compile_specification(users, specification))
-        return statement
-
-    async def _load_relations(self, items: list[Profile], relations: list[PlannedRelation]) -> None:
-        if not items:
-            return
-        profile_user_ids = [item.user_id for item in items]
-        profiles_by_user_id = {item.user_id: item for item in items}
-
-        for relation in relations:
-            if relation.relationship.key != "user":
-                continue
-            statement = self._build_users_statement(profile_user_ids, relation.relation.spec)
-            rows = (await self._session.execute(statement)).mappings().all()
-            for row in rows:
-                user = user_from_row(row)
-                profiles_by_user_id[user.id].user = user
-
 
 class AsyncSqlAlchemyRefreshTokenRepository(BaseAsyncRepository[RefreshToken]):
     _table = refresh_tokens
-    _from_row = staticmethod(refresh_token_from_row)
+    _row_template = REFRESH_TOKEN_ROW
     _to_values = staticmethod(refresh_token_to_values)
     _not_found_error = RefreshTokenNotFoundError
     _relationships: dict[str, Relationship] = {}
 
     async def get_by_token_hash(self, token_hash: str) -> RefreshToken | None:
         statement = sqlalchemy.select(refresh_tokens).where(refresh_tokens.c.token_hash == token_hash)
-        row = (await self._session.execute(statement)).mappings().first()
+        result = await self._session.execute(statement)
+        row = result.first()
         if row is None:
             return None
-        return refresh_token_from_row(row)
+        return self._row_reader(result.keys(), RelationshipPlan())(row)
 
     async def revoke_family(self, family_id: UUID) -> int:
         statement = (
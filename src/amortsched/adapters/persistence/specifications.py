@@ -1,9 +1,12 @@
+from collections.abc import Callable
+from dataclasses import dataclass, replace
 from functools import singledispatch
 from typing import Any
 
 import sqlalchemy
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql.elements import ColumnElement
-from sqlalchemy.sql.schema import Table
+from sqlalchemy.sql.selectable import NamedFromClause
 
 from amortsched.core.specifications import (
     And,
@@ -11,6 +14,7 @@ from amortsched.core.specifications import (
     Contains,
     EndsWith,
     Eq,
+    Fields,
     Ge,
     Gt,
     Id,
@@ -32,109 +36,189 @@ from amortsched.core.specifications import (
 )
 
 
-def compile_specification(table: Table, spec: Specification[Any] | None) -> ColumnElement[bool]:
+@dataclass(frozen=True, slots=True)
+class Parameter:
+    """Placeholder for a specification value, compiled to the bind parameter `key`."""
+
+    key: str
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Value-carrying attributes of each operator, with the conversion to the value that gets bound.
+_PARAMETERIZED_FIELDS: dict[type, tuple[tuple[str, Callable[[Any], Any]], ...]] = {
+    Eq: (("value", _identity),),
+    Gt: (("value", _identity),),
+    Lt: (("value", _identity),),
+    Ge: (("value", _identity),),
+    Le: (("value", _identity),),
+    In: (("values", list),),
+    Between: (("lower", _identity), ("upper", _identity)),
+    StartsWith: (("prefix", lambda value: f"{_escape_like_value(value)}%"),),
+    Contains: (("substring", lambda value: f"%{_escape_like_value(value)}%"),),
+    EndsWith: (("suffix", lambda value: f"%{_escape_like_value(value)}"),),
+    Like: (("pattern", _identity),),
+    Id: (("id", _identity),),
+}
+
+
+def parameterize_specification(
+    spec: Specification[Any] | None,
+) -> tuple[Specification[Any] | None, dict[str, Any]]:
+    """Replace the values in `spec` with `Parameter` placeholders and return them keyed by parameter name.
+
+    Specifications that differ only in their values share one shape, which is hashable and compiles to the same
+    parameterized SQL, so it can key caches of plans and statements.
+    """
+    parameters: dict[str, Any] = {}
+    if spec is None:
+        return None, parameters
+    return _parameterize(spec, parameters), parameters
+
+
+def _parameterize(spec: Specification[Any], parameters: dict[str, Any]) -> Specification[Any]:
+    if isinstance(spec, And | Or):
+        return replace(spec, left=_parameterize(spec.left, parameters), right=_parameterize(spec.right, parameters))
+    if isinstance(spec, Not):
+        return replace(spec, spec=_parameterize(spec.spec, parameters))
+    if isinstance(spec, With):
+        return spec if spec.spec is None else replace(spec, spec=_parameterize(spec.spec, parameters))
+    fields = _PARAMETERIZED_FIELDS.get(type(spec))
+    if fields is None:
+        return spec
+    changes: dict[str, Parameter] = {}
+    for name, convert in fields:
+        key = f"spec_{len(parameters)}"
+        parameters[key] = convert(getattr(spec, name))
+        changes[name] = Parameter(key)
+    return replace(spec, **changes)
+
+
+def compile_specification(table: NamedFromClause, spec: Specification[Any] | None) -> ColumnElement[bool]:
     if spec is None:
         return sqlalchemy.true()
     return _compile_specification(spec, table)
 
 
 @singledispatch
-def _compile_specification(spec: Specification[Any], table: Table) -> ColumnElement[bool]:
+def _compile_specification(spec: Specification[Any], table: NamedFromClause) -> ColumnElement[bool]:
     raise NotImplementedError(f"Unsupported specification operator: {type(spec).__name__}")
 
 
 @_compile_specification.register
-def _(spec: Eq, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field) == spec.value
+def _(spec: Eq, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column == _bind(column, spec.value)
 
 
 @_compile_specification.register
-def _(spec: Gt, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field) > spec.value
+def _(spec: Gt, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column > _bind(column, spec.value)
 
 
 @_compile_specification.register
-def _(spec: Lt, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field) < spec.value
+def _(spec: Lt, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column < _bind(column, spec.value)
 
 
 @_compile_specification.register
-def _(spec: Ge, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field) >= spec.value
+def _(spec: Ge, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column >= _bind(column, spec.value)
 
 
 @_compile_specification.register
-def _(spec: Le, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field) <= spec.value
+def _(spec: Le, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column <= _bind(column, spec.value)
 
 
 @_compile_specification.register
-def _(spec: In, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).in_(spec.values)
+def _(spec: In, table: NamedFromClause) -> ColumnElement[bool]:
+    # `= ANY(array)` binds one parameter whatever the number of values, so the SQL text stays the same.
+    column = _get_column(table, spec.field)
+    values = spec.values
+    if isinstance(values, Parameter):
+        array = sqlalchemy.bindparam(values.key, type_=ARRAY(column.type))
+    else:
+        array = sqlalchemy.literal(list(values), ARRAY(column.type))
+    return column == sqlalchemy.any_(array)
 
 
 @_compile_specification.register
-def _(spec: Between, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).between(spec.lower, spec.upper)
+def _(spec: Between, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column.between(_bind(column, spec.lower), _bind(column, spec.upper))
 
 
 @_compile_specification.register
-def _(spec: StartsWith, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).like(f"{_escape_like_value(spec.prefix)}%", escape="\\")
+def _(spec: StartsWith, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    pattern = spec.prefix if isinstance(spec.prefix, Parameter) else f"{_escape_like_value(spec.prefix)}%"
+    return column.like(_bind(column, pattern), escape="\\")
 
 
 @_compile_specification.register
-def _(spec: Contains, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).like(f"%{_escape_like_value(spec.substring)}%", escape="\\")
+def _(spec: Contains, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    pattern = spec.substring if isinstance(spec.substring, Parameter) else f"%{_escape_like_value(spec.substring)}%"
+    return column.like(_bind(column, pattern), escape="\\")
 
 
 @_compile_specification.register
-def _(spec: EndsWith, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).like(f"%{_escape_like_value(spec.suffix)}", escape="\\")
+def _(spec: EndsWith, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    pattern = spec.suffix if isinstance(spec.suffix, Parameter) else f"%{_escape_like_value(spec.suffix)}"
+    return column.like(_bind(column, pattern), escape="\\")
 
 
 @_compile_specification.register
-def _(spec: Like, table: Table) -> ColumnElement[bool]:
-    return _get_column(table, spec.field).like(spec.pattern)
+def _(spec: Like, table: NamedFromClause) -> ColumnElement[bool]:
+    column = _get_column(table, spec.field)
+    return column.like(_bind(column, spec.pattern))
 
 
 @_compile_specification.register
-def _(spec: IsNone, table: Table) -> ColumnElement[bool]:
+def _(spec: IsNone, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, spec.field).is_(None)
 
 
 @_compile_specification.register
-def _(spec: Is, table: Table) -> ColumnElement[bool]:
+def _(spec: Is, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, spec.field).is_(spec.value)
 
 
 @_compile_specification.register
-def _(spec: IsTrue, table: Table) -> ColumnElement[bool]:
+def _(spec: IsTrue, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, spec.field).is_(True)
 
 
 @_compile_specification.register
-def _(spec: IsFalse, table: Table) -> ColumnElement[bool]:
+def _(spec: IsFalse, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, spec.field).is_(False)
 
 
 @_compile_specification.register
-def _(spec: IsDeleted, table: Table) -> ColumnElement[bool]:
+def _(spec: IsDeleted, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, "is_deleted").is_(True)
 
 
 @_compile_specification.register
-def _(spec: IsActive, table: Table) -> ColumnElement[bool]:
+def _(spec: IsActive, table: NamedFromClause) -> ColumnElement[bool]:
     return _get_column(table, "is_active").is_(True)
 
 
 @_compile_specification.register
-def _(spec: Id, table: Table) -> ColumnElement[bool]:
-    return table.c.id == spec.id
+def _(spec: Id, table: NamedFromClause) -> ColumnElement[bool]:
+    return table.c.id == _bind(table.c.id, spec.id)
 
 
 @_compile_specification.register
-def _(spec: And, table: Table) -> ColumnElement[bool]:
+def _(spec: And, table: NamedFromClause) -> ColumnElement[bool]:
     return sqlalchemy.and_(
         compile_specification(table, spec.left),
         compile_specification(table, spec.right),
@@ -142,7 +226,7 @@ def _(spec: And, table: Table) -> ColumnElement[bool]:
 
 
 @_compile_specification.register
-def _(spec: Or, table: Table) -> ColumnElement[bool]:
+def _(spec: Or, table: NamedFromClause) -> ColumnElement[bool]:
     return sqlalchemy.or_(
         compile_specification(table, spec.left),
         compile_specification(table, spec.right),
@@ -150,21 +234,29 @@ def _(spec: Or, table: Table) -> ColumnElement[bool]:
 
 
 @_compile_specification.register
-def _(spec: Not, table: Table) -> ColumnElement[bool]:
+def _(spec: Not, table: NamedFromClause) -> ColumnElement[bool]:
+    if isinstance(spec.spec, IsDeleted):
+        # Plain `NOT is_deleted`: PostgreSQL does not match `is_deleted IS NOT TRUE` to the partial indexes on it.
+        return sqlalchemy.not_(_get_column(table, "is_deleted"))
     return sqlalchemy.not_(compile_specification(table, spec.spec))
 
 
 @_compile_specification.register
-def _(spec: With, table: Table) -> ColumnElement[bool]:
+def _(spec: With, table: NamedFromClause) -> ColumnElement[bool]:
     del spec, table
     raise ValueError("Rel specifications must be extracted before compilation")
 
 
+@_compile_specification.register
+def _(spec: Fields, table: NamedFromClause) -> ColumnElement[bool]:
+    del spec, table
+    raise ValueError("Fields specifications must be extracted before compilation")
+
+
 def extract_relations(spec: Specification[Any] | None) -> tuple[Specification[Any] | None, list[With[Any]]]:
     if spec is None:
         return None, []
     if isinstance(spec, With):
-        _validate_relation_spec(spec)
         return None, [spec]
     if isinstance(spec, And):
         left_spec, left_relations = extract_relations(spec.left)
@@ -187,6 +279,38 @@ def extract_relations(spec: Specification[Any] | None) -> tuple[Specification[An
     return spec, []
 
 
+def extract_fields(spec: Specification[Any] | None) -> tuple[Specification[Any] | None, frozenset[str] | None]:
+    """Split the `Fields` projections off `spec`; several of them combine into the union of their names.
+
+    Returns None for the fields when `spec` has no projection, meaning every field is loaded.
+    """
+    if spec is None:
+        return None, None
+    if isinstance(spec, Fields):
+        return None, frozenset(spec.names)
+    if isinstance(spec, And):
+        left_spec, left_fields = extract_fields(spec.left)
+        right_spec, right_fields = extract_fields(spec.right)
+        fields = left_fields if right_fields is None else right_fields | (left_fields or frozenset())
+        if left_spec is None or right_spec is None:
+            return left_spec or right_spec, fields
+        return And(left_spec, right_spec), fields
+    if isinstance(spec, Or | Not) and _contains_fields(spec):
+        raise ValueError("Fields specifications are only supported at the top level or inside And expressions")
+    return spec, None
+
+
+def mentions_field(spec: Specification[Any] | None, field: str) -> bool:
+    """Whether `spec`, outside the specifications of its relations, tests `field`."""
+    if spec is None or isinstance(spec, With):
+        return False
+    if isinstance(spec, And | Or):
+        return mentions_field(spec.left, field) or mentions_field(spec.right, field)
+    if isinstance(spec, Not):
+        return mentions_field(spec.spec, field)
+    return getattr(spec, "field", None) == field
+
+
 def ensure_no_relations(spec: Specification[Any] | None, operation: str) -> None:
     if spec is not None and _contains_relation(spec):
         raise ValueError(f"{operation}() does not support Rel specifications")
@@ -200,14 +324,6 @@ def _raise_if_contains_relation(spec: Specification[Any], context: str) -> None:
         )
 
 
-def _validate_relation_spec(spec: With[Any]) -> None:
-    if spec.spec is not None and _contains_relation(spec.spec):
-        raise ValueError(
-            "Nested relation loading is not supported by the SQLAlchemy adapter; "
-            f"relation '{spec.relation}' contains another Rel specification"
-        )
-
-
 def _contains_relation(spec: Specification[Any]) -> bool:
     if isinstance(spec, With):
         return True
@@ -218,14 +334,38 @@ def _contains_relation(spec: Specification[Any]) -> bool:
     return False
 
 
-def _get_column(table: Table, field: str):
+def _contains_fields(spec: Specification[Any]) -> bool:
+    if isinstance(spec, Fields):
+        return True
+    if isinstance(spec, And | Or):
+        return _contains_fields(spec.left) or _contains_fields(spec.right)
+    if isinstance(spec, Not):
+        return _contains_fields(spec.spec)
+    return False
+
+
+def _get_column(table: NamedFromClause, field: str):
     if field not in table.c:
         raise ValueError(f"Unknown column '{field}' for table '{table.name}'")
     return table.c[field]
 
 
+def _bind(column: Any, value: Any) -> Any:
+    if isinstance(value, Parameter):
+        return sqlalchemy.bindparam(value.key, type_=column.type)
+    return value
+
+
 def _escape_like_value(value: str) -> str:
     return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
-__all__ = ["compile_specification", "ensure_no_relations", "extract_relations"]
+__all__ = [
+    "Parameter",
+    "compile_specification",
+    "ensure_no_relations",
+    "extract_fields",
+    "extract_relations",
+    "mentions_field",
+    "parameterize_specification",
+]
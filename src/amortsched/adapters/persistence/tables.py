@@ -14,6 +14,8 @@ users = sqlalchemy.Table(
     Column("password_hash", sqlalchemy.String, nullable=False),
     Column("created_at", sqlalchemy.DateTime(timezone=True), nullable=False),
     Column("updated_at", sqlalchemy.DateTime(timezone=True), nullable=False),
+    # Incremented by every update, which only applies to the revision it was read at.
+    Column("revision", sqlalchemy.Integer, nullable=False, server_default="0"),
     sqlalchemy.UniqueConstraint("email", name="uq_users_email"),
 )
 
@@ -28,6 +30,7 @@ profiles = sqlalchemy.Table(
     Column("timezone", sqlalchemy.String, nullable=True),
     Column("created_at", sqlalchemy.DateTime(timezone=True), nullable=False),
     Column("updated_at", sqlalchemy.DateTime(timezone=True), nullable=False),
+    Column("revision", sqlalchemy.Integer, nullable=False, server_default="0"),
     sqlalchemy.UniqueConstraint("user_id", name="uq_profiles_user_id"),
 )
 
@@ -52,6 +55,13 @@ plans = sqlalchemy.Table(
     Column("is_deleted", sqlalchemy.Boolean, nullable=False),
     Column("created_at", sqlalchemy.DateTime(timezone=True), nullable=False),
     Column("updated_at", sqlalchemy.DateTime(timezone=True), nullable=False),
+    Column("revision", sqlalchemy.Integer, nullable=False, server_default="0"),
+    # Serves the user_id foreign key.
+    sqlalchemy.Index("ix_plans_user_id", "user_id"),
+    # Serves listing a user's plans in created_at order; deleted plans are never listed.
+    sqlalchemy.Index(
+        "ix_plans_user_id_created_at", "user_id", "created_at", postgresql_where=sqlalchemy.text("NOT is_deleted")
+    ),
 )
 
 schedules = sqlalchemy.Table(
@@ -59,10 +69,48 @@ schedules = sqlalchemy.Table(
     metadata,
     Column("id", UUID(as_uuid=True), primary_key=True),
     Column("plan_id", UUID(as_uuid=True), sqlalchemy.ForeignKey("plans.id"), nullable=False),
-    Column("installments", JSONB, nullable=False),
+    # Legacy JSONB blob; NULL for schedules whose rows live in schedule_installments.
+    Column("installments", JSONB(none_as_null=True), nullable=True),
+    # Opt-in compact storage written by AsyncSqlAlchemyPackedScheduleRepository (see mappers.pack_installments).
+    Column("installments_packed", sqlalchemy.LargeBinary, nullable=True),
     Column("totals", JSONB, nullable=True),
     Column("generated_at", sqlalchemy.DateTime(timezone=True), nullable=False),
     Column("is_deleted", sqlalchemy.Boolean, nullable=False),
+    Column("revision", sqlalchemy.Integer, nullable=False, server_default="0"),
+    # Serves the plan_id foreign key, including the check for schedules left when purging a plan.
+    sqlalchemy.Index("ix_schedules_plan_id", "plan_id"),
+    # Serves listing a plan's schedules in generated_at order; deleted schedules are never listed.
+    sqlalchemy.Index(
+        "ix_schedules_plan_id_generated_at",
+        "plan_id",
+        "generated_at",
+        postgresql_where=sqlalchemy.text("NOT is_deleted"),
+    ),
+)
+
+schedule_installments = sqlalchemy.Table(
+    "schedule_installments",
+    metadata,
+    Column(
+        "schedule_id",
+        UUID(as_uuid=True),
+        sqlalchemy.ForeignKey("schedules.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    # Position of the row within its schedule.
+    Column("seq", sqlalchemy.Integer, primary_key=True),
+    # Period of the scheduled payment the row belongs to; extra payments share the period of the next one.
+    Column("period", sqlalchemy.Integer, nullable=False),
+    Column("i", sqlalchemy.Integer, nullable=True),
+    Column("year", sqlalchemy.Integer, nullable=False),
+    Column("month", sqlalchemy.Integer, nullable=False),
+    Column("kind", sqlalchemy.String, nullable=False),
+    Column("principal", sqlalchemy.Numeric, nullable=False),
+    Column("interest", sqlalchemy.Numeric, nullable=False),
+    Column("fees", sqlalchemy.Numeric, nullable=False),
+    Column("balance_before", sqlalchemy.Numeric, nullable=False),
+    Column("balance_after", sqlalchemy.Numeric, nullable=False),
+    sqlalchemy.Index("ix_schedule_installments_year_month", "year", "month"),
 )
 
 refresh_tokens = sqlalchemy.Table(
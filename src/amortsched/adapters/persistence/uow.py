@@ -5,25 +5,53 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from amortsched.adapters.persistence.repositories import (
     AsyncSqlAlchemyPlanRepository,
     AsyncSqlAlchemyProfileRepository,
+    AsyncSqlAlchemyRefreshTokenRepository,
     AsyncSqlAlchemyScheduleRepository,
     AsyncSqlAlchemyUserRepository,
 )
 from amortsched.app.ports import AsyncUnitOfWork
 
 
+class _Repository[R]:
+    """Repository of a unit of work, created on first access and kept until the unit of work ends."""
+
+    def __init__(self, factory: Callable[[AsyncSession], R]) -> None:
+        self._factory = factory
+        self._name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+
+    def __get__(self, uow: AsyncSqlAlchemyUnitOfWork, owner: type | None = None) -> R:
+        repository = uow._repositories.get(self._name)
+        if repository is None:
+            repository = uow._repositories[self._name] = self._factory(uow.session)
+        return repository
+
+
 class AsyncSqlAlchemyUnitOfWork(AsyncUnitOfWork):
+    users = _Repository(AsyncSqlAlchemyUserRepository)
+    profiles = _Repository(AsyncSqlAlchemyProfileRepository)
+    plans = _Repository(AsyncSqlAlchemyPlanRepository)
+    schedules = _Repository(AsyncSqlAlchemyScheduleRepository)
+    refresh_tokens = _Repository(AsyncSqlAlchemyRefreshTokenRepository)
+
     def __init__(self, session_factory: Callable[[], AsyncSession]):
         self._session_factory = session_factory
         self._session: AsyncSession | None = None
+        self._repositories: dict[str, Any] = {}
         self._committed = False
 
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            raise RuntimeError("Cannot use the unit of work before begin")
+        return self._session
+
     async def begin(self) -> None:
         self._session = self._session_factory()
+        self._repositories.clear()
         self._committed = False
-        self.users = AsyncSqlAlchemyUserRepository(self._session)
-        self.profiles = AsyncSqlAlchemyProfileRepository(self._session)
-        self.plans = AsyncSqlAlchemyPlanRepository(self._session)
-        self.schedules = AsyncSqlAlchemyScheduleRepository(self._session)
 
     async def commit(self) -> None:
         if not self._session:
@@ -41,6 +69,7 @@ class AsyncSqlAlchemyUnitOfWork(AsyncUnitOfWork):
         if self._session:
             await self._session.close()
             self._session = None
+            self._repositories.clear()
 
     async def __aenter__(self) -> Self:
         await self.begin()
@@ -1,18 +1,27 @@
+import asyncio
+import contextlib
+import itertools
+from collections.abc import Callable, Sequence
 from contextlib import asynccontextmanager
 
 import structlog
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
+from amortsched.adapters.persistence.engine import create_engine, read_session_factory
+from amortsched.adapters.persistence.purge import purge_deleted
 from amortsched.api.config import get_settings
 from amortsched.api.errors import domain_error_handler
-from amortsched.api.middleware import RequestLoggingMiddleware
+from amortsched.api.middleware import ReadYourWritesMiddleware, RequestLoggingMiddleware
 from amortsched.api.routes.auth import router as auth_router
+from amortsched.api.routes.health import router as health_router
 from amortsched.api.routes.plans import router as plans_router
 from amortsched.api.routes.schedules import router as schedules_router
 from amortsched.api.routes.users import router as users_router
 from amortsched.core.errors import DomainError
 
+logger = structlog.get_logger()
+
 
 def configure_structlog() -> None:
     structlog.configure(
@@ -26,20 +35,62 @@ def configure_structlog() -> None:
     )
 
 
+def configure_sessions(app: FastAPI, engine: AsyncEngine, replicas: Sequence[AsyncEngine] = ()) -> None:
+    """Session factories for commands, on the primary, and for queries, on the primary and on each replica.
+
+    The engines are kept too, the replicas named `replica-1`, `replica-2`... in configuration order.
+    """
+    app.state.engine = engine
+    app.state.replica_engines = {f"replica-{number}": replica for number, replica in enumerate(replicas, start=1)}
+    app.state.async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    app.state.async_read_session_factory = read_session_factory(engine)
+    app.state.replica_session_factories = (
+        itertools.cycle([read_session_factory(replica) for replica in replicas]) if replicas else None
+    )
+
+
+async def purge_periodically(session_factory: Callable[[], AsyncSession], interval: float, batch_size: int) -> None:
+    """Purge soft-deleted plans and schedules every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await purge_deleted(session_factory, batch_size=batch_size)
+        except Exception:
+            await logger.aexception("purge_failed")
+        else:
+            await logger.ainfo("purge_completed", removed=removed)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
-    engine = create_async_engine(settings.database.url)
-    app.state.async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    engine = create_engine(settings.database.url, **settings.database.engine_options)
+    replicas = [create_engine(url, **settings.database.engine_options) for url in settings.database.replica_urls]
+    configure_sessions(app, engine, replicas)
+    purge = None
+    if settings.database.purge_interval is not None:
+        purge = asyncio.create_task(
+            purge_periodically(
+                app.state.async_session_factory, settings.database.purge_interval, settings.database.purge_batch_size
+            )
+        )
     yield
+    if purge is not None:
+        purge.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await purge
+    for replica in replicas:
+        await replica.dispose()
     await engine.dispose()
 
 
 def create_app() -> FastAPI:
     configure_structlog()
     app = FastAPI(title="Amortization Schedule API", lifespan=lifespan)
+    app.add_middleware(ReadYourWritesMiddleware)
     app.add_middleware(RequestLoggingMiddleware)
     app.add_exception_handler(DomainError, domain_error_handler)
+    app.include_router(health_router)
     app.include_router(auth_router)
     app.include_router(users_router)
     app.include_router(plans_router)
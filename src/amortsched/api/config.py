@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Any
 
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -7,10 +8,36 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class DatabaseSettings(BaseModel):
     dsn: PostgresDsn
 
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30.0  # in seconds
+    pool_recycle: int = 1800  # in seconds, -1 never recycles
+    pool_pre_ping: bool = True
+    statement_timeout: int | None = None  # in milliseconds
+    prepare_threshold: int | None = 5  # executions before psycopg prepares a query server-side
+    transaction_pooler: bool = False  # behind PgBouncer in transaction mode: no local pool, no prepares
+    echo: bool = False
+
+    replica_dsns: list[PostgresDsn] = []  # read-only queries are spread over these, round-robin
+    replica_stickiness: int = 5  # in seconds, a client's reads stay on the primary this long after it writes
+
+    purge_interval: float | None = None  # in seconds, how often deleted plans and schedules are purged; None never
+    purge_batch_size: int = 1000  # rows removed per purge transaction
+
     @property
     def url(self) -> str:
         return self.dsn.unicode_string()
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return [dsn.unicode_string() for dsn in self.replica_dsns]
+
+    @property
+    def engine_options(self) -> dict[str, Any]:
+        return self.model_dump(
+            exclude={"dsn", "replica_dsns", "replica_stickiness", "purge_interval", "purge_batch_size"}
+        )
+
 
 class SecuritySettings(BaseModel):
     secret_key: str
@@ -1,21 +1,19 @@
+import datetime
 import uuid
 from collections.abc import AsyncGenerator
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, Header, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from amortsched.adapters.persistence.repositories import (
-    AsyncSqlAlchemyPlanRepository,
-    AsyncSqlAlchemyProfileRepository,
-    AsyncSqlAlchemyRefreshTokenRepository,
-    AsyncSqlAlchemyScheduleRepository,
-    AsyncSqlAlchemyUserRepository,
-)
+from pydantic import BaseModel
+
+from amortsched.adapters.persistence.uow import AsyncSqlAlchemyUnitOfWork
 from amortsched.adapters.security.hashers import PBKDF2PasswordHasher
 from amortsched.adapters.security.jwt import JoseTokenService
 from amortsched.api.config import get_settings
+from amortsched.api.middleware import READ_FROM_HEADER, READ_PRIMARY_COOKIE, is_query, query_only
+from amortsched.api.schemas.plans import PlanResponse
+from amortsched.api.schemas.schedules import ScheduleResponse
 from amortsched.app.commands.plans import (
     AddInterestRateChangeHandler,
     AddOneTimeExtraPaymentHandler,
@@ -37,25 +35,65 @@ from amortsched.app.commands.users import (
 )
 from amortsched.app.ports import Settings
 from amortsched.app.queries.plans import GetPlanHandler, ListPlansHandler
-from amortsched.app.queries.schedules import GenerateScheduleHandler, GetScheduleHandler, ListSchedulesHandler
+from amortsched.app.queries.schedules import (
+    CompareScheduleHandler,
+    GenerateScheduleHandler,
+    GetScheduleHandler,
+    ListSchedulesHandler,
+)
 from amortsched.app.queries.users import GetProfileHandler, GetUserHandler
 from amortsched.core.entities import User
-from amortsched.core.errors import ExpiredTokenError, InvalidTokenError
+from amortsched.core.errors import DomainError, ExpiredTokenError, InvalidTokenError, ValidationError
+from amortsched.core.values import ScheduleWindow
 
 
 def get_password_hasher() -> PBKDF2PasswordHasher:
     return PBKDF2PasswordHasher()
 
 
-async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    async with request.app.state.async_session_factory() as session:
-        try:
-            yield session
-        finally:
-            await session.commit()
+def reads_from_replica(request: Request) -> bool:
+    """Whether `request` may be served by a read replica.
+
+    Only queries are (see `is_query`), and only when the client has not written in the last `replica_stickiness`
+    seconds (see `ReadYourWritesMiddleware`) and did not ask for the primary with `X-Read-From: primary`.
+    """
+    return (
+        is_query(request)
+        and READ_PRIMARY_COOKIE not in request.cookies
+        and request.headers.get(READ_FROM_HEADER, "").lower() != "primary"
+    )
+
+
+async def get_uow(request: Request) -> AsyncGenerator[AsyncSqlAlchemyUnitOfWork, None]:
+    """Unit of work for the request; its repositories are created as the request's handlers first use them.
 
+    Queries (see `is_query`) get a read-only, autocommit session, on a replica when replicas are configured and
+    allowed, else on the primary. Commands get a transaction on the primary that is committed only when the route
+    returned; if it raised, the unit of work rolls it back.
+    """
+    state = request.app.state
+    reading = is_query(request)
+    if not reading:
+        session_factory = state.async_session_factory
+    elif (replicas := getattr(state, "replica_session_factories", None)) is not None and reads_from_replica(request):
+        session_factory = next(replicas)
+    else:
+        session_factory = getattr(state, "async_read_session_factory", None) or state.async_session_factory
 
-DbSession = Annotated[AsyncSession, Depends(get_session)]
+    async with AsyncSqlAlchemyUnitOfWork(session_factory) as uow:
+        try:
+            yield uow
+        except DomainError as exc:
+            if exc.keeps_changes:
+                await uow.commit()
+            raise
+        if not reading:
+            await uow.commit()
+
+
+UoW = Annotated[AsyncSqlAlchemyUnitOfWork, Depends(get_uow)]
+# Declared in `dependencies=[...]` by routes whose handler only queries although their method is not safe.
+QueryOnly = Depends(query_only)
 AppSettings = Annotated[Settings, Depends(get_settings)]
 PasswordHash = Annotated[PBKDF2PasswordHasher, Depends(get_password_hasher)]
 
@@ -90,35 +128,8 @@ CurrentUserId = Annotated[uuid.UUID, Depends(get_current_user_id)]
 TokenSvc = Annotated[JoseTokenService, Depends(get_token_service)]
 
 
-def get_user_repo(session: DbSession) -> AsyncSqlAlchemyUserRepository:
-    return AsyncSqlAlchemyUserRepository(session)
-
-
-def get_plan_repo(session: DbSession) -> AsyncSqlAlchemyPlanRepository:
-    return AsyncSqlAlchemyPlanRepository(session)
-
-
-def get_profile_repo(session: DbSession) -> AsyncSqlAlchemyProfileRepository:
-    return AsyncSqlAlchemyProfileRepository(session)
-
-
-def get_schedule_repo(session: DbSession) -> AsyncSqlAlchemyScheduleRepository:
-    return AsyncSqlAlchemyScheduleRepository(session)
-
-
-def get_refresh_token_repo(session: DbSession) -> AsyncSqlAlchemyRefreshTokenRepository:
-    return AsyncSqlAlchemyRefreshTokenRepository(session)
-
-
-UserRepo = Annotated[AsyncSqlAlchemyUserRepository, Depends(get_user_repo)]
-PlanRepo = Annotated[AsyncSqlAlchemyPlanRepository, Depends(get_plan_repo)]
-ProfileRepo = Annotated[AsyncSqlAlchemyProfileRepository, Depends(get_profile_repo)]
-ScheduleRepo = Annotated[AsyncSqlAlchemyScheduleRepository, Depends(get_schedule_repo)]
-RefreshTokenRepo = Annotated[AsyncSqlAlchemyRefreshTokenRepository, Depends(get_refresh_token_repo)]
-
-
-async def get_current_user(user_id: CurrentUserId, repo: UserRepo) -> User:
-    user = await repo.get_by_id(user_id)
+async def get_current_user(user_id: CurrentUserId, uow: UoW) -> User:
+    user = await uow.users.get_by_id(user_id)
     if user is None:
         raise credentials_exception
     return user
@@ -127,16 +138,16 @@ async def get_current_user(user_id: CurrentUserId, repo: UserRepo) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_register_user_handler(repo: UserRepo, hasher: PasswordHash) -> RegisterUserHandler:
-    return RegisterUserHandler(user_repo=repo, password_hasher=hasher)
+def get_register_user_handler(uow: UoW, hasher: PasswordHash) -> RegisterUserHandler:
+    return RegisterUserHandler(user_repo=uow.users, password_hasher=hasher)
 
 
-def get_authenticate_user_handler(repo: UserRepo, hasher: PasswordHash) -> AuthenticateUserHandler:
-    return AuthenticateUserHandler(user_repo=repo, password_hasher=hasher)
+def get_authenticate_user_handler(uow: UoW, hasher: PasswordHash) -> AuthenticateUserHandler:
+    return AuthenticateUserHandler(user_repo=uow.users, password_hasher=hasher)
 
 
-def get_upsert_profile_handler(profiles: ProfileRepo, users: UserRepo) -> UpsertProfileHandler:
-    return UpsertProfileHandler(profile_repo=profiles, user_repo=users)
+def get_upsert_profile_handler(uow: UoW) -> UpsertProfileHandler:
+    return UpsertProfileHandler(profile_repo=uow.profiles, user_repo=uow.users)
 
 
 RegisterUser = Annotated[RegisterUserHandler, Depends(get_register_user_handler)]
@@ -145,23 +156,25 @@ UpsertProfile = Annotated[UpsertProfileHandler, Depends(get_upsert_profile_handl
 
 
 def get_create_refresh_token_handler(
-    repo: RefreshTokenRepo,
+    uow: UoW,
     token_service: TokenSvc,
     settings: AppSettings,
 ) -> CreateRefreshTokenHandler:
-    return CreateRefreshTokenHandler(refresh_token_repo=repo, token_service=token_service, settings=settings)
+    return CreateRefreshTokenHandler(
+        refresh_token_repo=uow.refresh_tokens, token_service=token_service, settings=settings
+    )
 
 
 def get_refresh_tokens_handler(
-    repo: RefreshTokenRepo,
+    uow: UoW,
     token_service: TokenSvc,
     settings: AppSettings,
 ) -> RefreshTokensHandler:
-    return RefreshTokensHandler(refresh_token_repo=repo, token_service=token_service, settings=settings)
+    return RefreshTokensHandler(refresh_token_repo=uow.refresh_tokens, token_service=token_service, settings=settings)
 
 
-def get_logout_handler(repo: RefreshTokenRepo, token_service: TokenSvc) -> LogoutHandler:
-    return LogoutHandler(refresh_token_repo=repo, token_service=token_service)
+def get_logout_handler(uow: UoW, token_service: TokenSvc) -> LogoutHandler:
+    return LogoutHandler(refresh_token_repo=uow.refresh_tokens, token_service=token_service)
 
 
 CreateRefreshToken = Annotated[CreateRefreshTokenHandler, Depends(get_create_refresh_token_handler)]
@@ -169,44 +182,44 @@ RefreshTokens = Annotated[RefreshTokensHandler, Depends(get_refresh_tokens_handl
 Logout = Annotated[LogoutHandler, Depends(get_logout_handler)]
 
 
-def get_get_user_handler(repo: UserRepo) -> GetUserHandler:
-    return GetUserHandler(user_repo=repo)
+def get_get_user_handler(uow: UoW) -> GetUserHandler:
+    return GetUserHandler(user_repo=uow.users)
 
 
-def get_get_profile_handler(repo: ProfileRepo) -> GetProfileHandler:
-    return GetProfileHandler(profile_repo=repo)
+def get_get_profile_handler(uow: UoW) -> GetProfileHandler:
+    return GetProfileHandler(profile_repo=uow.profiles)
 
 
 GetUser = Annotated[GetUserHandler, Depends(get_get_user_handler)]
 GetProfile = Annotated[GetProfileHandler, Depends(get_get_profile_handler)]
 
 
-def get_create_plan_handler(repo: PlanRepo) -> CreatePlanHandler:
-    return CreatePlanHandler(plan_repo=repo)
+def get_create_plan_handler(uow: UoW) -> CreatePlanHandler:
+    return CreatePlanHandler(plan_repo=uow.plans)
 
 
-def get_update_plan_handler(repo: PlanRepo) -> UpdatePlanHandler:
-    return UpdatePlanHandler(plan_repo=repo)
+def get_update_plan_handler(uow: UoW) -> UpdatePlanHandler:
+    return UpdatePlanHandler(plan_repo=uow.plans)
 
 
-def get_delete_plan_handler(repo: PlanRepo) -> DeletePlanHandler:
-    return DeletePlanHandler(plan_repo=repo)
+def get_delete_plan_handler(uow: UoW) -> DeletePlanHandler:
+    return DeletePlanHandler(plan_repo=uow.plans, schedule_repo=uow.schedules)
 
 
-def get_save_plan_handler(repo: PlanRepo) -> SavePlanHandler:
-    return SavePlanHandler(plan_repo=repo)
+def get_save_plan_handler(uow: UoW) -> SavePlanHandler:
+    return SavePlanHandler(plan_repo=uow.plans)
 
 
-def get_add_extra_payment_handler(repo: PlanRepo) -> AddOneTimeExtraPaymentHandler:
-    return AddOneTimeExtraPaymentHandler(plan_repo=repo)
+def get_add_extra_payment_handler(uow: UoW) -> AddOneTimeExtraPaymentHandler:
+    return AddOneTimeExtraPaymentHandler(plan_repo=uow.plans)
 
 
-def get_add_recurring_extra_payment_handler(repo: PlanRepo) -> AddRecurringExtraPaymentHandler:
-    return AddRecurringExtraPaymentHandler(plan_repo=repo)
+def get_add_recurring_extra_payment_handler(uow: UoW) -> AddRecurringExtraPaymentHandler:
+    return AddRecurringExtraPaymentHandler(plan_repo=uow.plans)
 
 
-def get_add_interest_rate_change_handler(repo: PlanRepo) -> AddInterestRateChangeHandler:
-    return AddInterestRateChangeHandler(plan_repo=repo)
+def get_add_interest_rate_change_handler(uow: UoW) -> AddInterestRateChangeHandler:
+    return AddInterestRateChangeHandler(plan_repo=uow.plans)
 
 
 CreatePlan = Annotated[CreatePlanHandler, Depends(get_create_plan_handler)]
@@ -218,40 +231,102 @@ AddRecurringExtraPayment = Annotated[AddRecurringExtraPaymentHandler, Depends(ge
 AddInterestRateChange = Annotated[AddInterestRateChangeHandler, Depends(get_add_interest_rate_change_handler)]
 
 
-def get_get_plan_handler(repo: PlanRepo) -> GetPlanHandler:
-    return GetPlanHandler(plan_repo=repo)
+def get_get_plan_handler(uow: UoW) -> GetPlanHandler:
+    return GetPlanHandler(plan_repo=uow.plans)
 
 
-def get_list_plans_handler(repo: PlanRepo) -> ListPlansHandler:
-    return ListPlansHandler(plan_repo=repo)
+def get_list_plans_handler(uow: UoW) -> ListPlansHandler:
+    return ListPlansHandler(plan_repo=uow.plans)
 
 
 GetPlan = Annotated[GetPlanHandler, Depends(get_get_plan_handler)]
 ListPlans = Annotated[ListPlansHandler, Depends(get_list_plans_handler)]
 
 
-def get_generate_schedule_handler(repo: PlanRepo) -> GenerateScheduleHandler:
-    return GenerateScheduleHandler(plan_repo=repo)
+def get_generate_schedule_handler(uow: UoW) -> GenerateScheduleHandler:
+    return GenerateScheduleHandler(plan_repo=uow.plans)
+
+
+def get_compare_schedule_handler(uow: UoW) -> CompareScheduleHandler:
+    return CompareScheduleHandler(plan_repo=uow.plans)
 
 
-def get_save_schedule_handler(plans: PlanRepo, schedules: ScheduleRepo) -> SaveScheduleHandler:
-    return SaveScheduleHandler(plan_repo=plans, schedule_repo=schedules)
+def get_save_schedule_handler(uow: UoW) -> SaveScheduleHandler:
+    return SaveScheduleHandler(plan_repo=uow.plans, schedule_repo=uow.schedules)
 
 
-def get_get_schedule_handler(schedules: ScheduleRepo, plans: PlanRepo) -> GetScheduleHandler:
-    return GetScheduleHandler(schedule_repo=schedules, plan_repo=plans)
+def get_get_schedule_handler(uow: UoW) -> GetScheduleHandler:
+    return GetScheduleHandler(schedule_repo=uow.schedules, plan_repo=uow.plans)
 
 
-def get_list_schedules_handler(schedules: ScheduleRepo, plans: PlanRepo) -> ListSchedulesHandler:
-    return ListSchedulesHandler(schedule_repo=schedules, plan_repo=plans)
+def get_list_schedules_handler(uow: UoW) -> ListSchedulesHandler:
+    return ListSchedulesHandler(schedule_repo=uow.schedules, plan_repo=uow.plans)
 
 
-def get_delete_schedule_handler(schedules: ScheduleRepo, plans: PlanRepo) -> DeleteScheduleHandler:
-    return DeleteScheduleHandler(schedule_repo=schedules, plan_repo=plans)
+def get_delete_schedule_handler(uow: UoW) -> DeleteScheduleHandler:
+    return DeleteScheduleHandler(schedule_repo=uow.schedules, plan_repo=uow.plans)
 
 
 GenerateSchedule = Annotated[GenerateScheduleHandler, Depends(get_generate_schedule_handler)]
+CompareSchedule = Annotated[CompareScheduleHandler, Depends(get_compare_schedule_handler)]
 SaveSchedule = Annotated[SaveScheduleHandler, Depends(get_save_schedule_handler)]
 GetSchedule = Annotated[GetScheduleHandler, Depends(get_get_schedule_handler)]
 ListSchedules = Annotated[ListSchedulesHandler, Depends(get_list_schedules_handler)]
 DeleteSchedule = Annotated[DeleteScheduleHandler, Depends(get_delete_schedule_handler)]
+
+
+def get_schedule_window(
+    from_period: Annotated[int | None, Query(ge=1)] = None,
+    to_period: Annotated[int | None, Query(ge=1)] = None,
+    from_date: datetime.date | None = None,
+    to_date: datetime.date | None = None,
+) -> ScheduleWindow | None:
+    if from_period is None and to_period is None and from_date is None and to_date is None:
+        return None
+    return ScheduleWindow(first_period=from_period, last_period=to_period, from_date=from_date, to_date=to_date)
+
+
+Window = Annotated[ScheduleWindow | None, Depends(get_schedule_window)]
+
+
+def sparse_fields(model: type[BaseModel]):
+    """Dependency parsing `?fields=a,b` into the set of `model` fields to return; None when not given."""
+
+    def get_fields(
+        fields: Annotated[str | None, Query(description="Comma-separated response fields to return")] = None,
+    ) -> frozenset[str] | None:
+        if fields is None:
+            return None
+        names = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = sorted(names - model.model_fields.keys())
+        if unknown:
+            raise ValidationError(
+                [
+                    {"loc": ["query", "fields"], "msg": f"Unknown field '{name}'", "type": "value_error"}
+                    for name in unknown
+                ]
+            )
+        return names
+
+    return Annotated[frozenset[str] | None, Depends(get_fields)]
+
+
+def get_expected_revision(
+    if_match: Annotated[str | None, Header(description="ETag of the revision the change was made from")] = None,
+) -> int | None:
+    """Revision named by an `If-Match` header holding one ETag; None when absent or `*`."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip().removeprefix("W/")
+    if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+        return int(tag[1:-1])
+    raise ValidationError(
+        [{"loc": ["header", "If-Match"], "msg": f"Unsupported entity tag {if_match!r}", "type": "value_error"}]
+    )
+
+
+ExpectedRevision = Annotated[int | None, Depends(get_expected_revision)]
+
+
+PlanFields = sparse_fields(PlanResponse)
+ScheduleFields = sparse_fields(ScheduleResponse)
@@ -4,14 +4,17 @@ from fastapi.responses import JSONResponse
 from amortsched.core.errors import (
     AmortizationError,
     AuthenticationError,
+    ConcurrentUpdateError,
     DomainError,
     DuplicateEmailError,
     ExpiredTokenError,
+    InvalidCursorError,
     InvalidTokenError,
     NotFoundError,
     PlanOwnershipError,
     RefreshTokenNotFoundError,
     RefreshTokenReplayError,
+    StaleRevisionError,
     ValidationError,
 )
 
@@ -27,6 +30,9 @@ _ERROR_MAP: list[tuple[type[DomainError], int, str, str]] = [
     (PlanOwnershipError, 403, "/errors/forbidden", "Forbidden"),
     (NotFoundError, 404, "/errors/not-found", "Not Found"),
     (DuplicateEmailError, 409, "/errors/duplicate-email", "Duplicate Email"),
+    (StaleRevisionError, 412, "/errors/precondition-failed", "Precondition Failed"),
+    (ConcurrentUpdateError, 409, "/errors/conflict", "Conflict"),
+    (InvalidCursorError, 400, "/errors/invalid-cursor", "Invalid Cursor"),
     (AmortizationError, 422, "/errors/validation", "Validation Error"),
 ]
 
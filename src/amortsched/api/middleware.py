@@ -6,8 +6,28 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from amortsched.api.config import get_settings
+
 logger = structlog.get_logger()
 
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Set on a client after it writes, so its next reads see the write on the primary instead of a lagging replica.
+READ_PRIMARY_COOKIE = "read_primary"
+# Per-request override: `X-Read-From: primary` reads from the primary whatever the stickiness.
+READ_FROM_HEADER = "X-Read-From"
+
+
+def query_only() -> None:
+    """Route dependency marking a route that only queries although its method is not safe, like a POST with a body."""
+
+
+def is_query(request: Request) -> bool:
+    """Whether `request` only queries: it has a safe method or its route declares the `query_only` dependency."""
+    if request.method in SAFE_METHODS:
+        return True
+    route = request.scope.get("route")
+    return any(dependency.dependency is query_only for dependency in getattr(route, "dependencies", ()))
+
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(
@@ -32,3 +52,20 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
         response.headers["X-Request-ID"] = request_id
         return response
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Pin a client's reads to the primary for `replica_stickiness` seconds after a successful command."""
+
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        response = await call_next(request)
+        replicated = getattr(request.app.state, "replica_session_factories", None) is not None
+        if replicated and not is_query(request) and response.status_code < 400:
+            stickiness = get_settings().database.replica_stickiness
+            if stickiness > 0:
+                response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=stickiness, httponly=True, samesite="lax")
+        return response
@@ -0,0 +1,24 @@
+import dataclasses
+
+from fastapi import APIRouter, Request
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from amortsched.adapters.persistence.engine import pool_status
+from amortsched.api.schemas.health import HealthResponse, PoolStatusResponse
+
+router = APIRouter(prefix="/api/health", tags=["health"])
+
+
+def _pool(engine: AsyncEngine) -> PoolStatusResponse | None:
+    status = pool_status(engine)
+    return None if status is None else PoolStatusResponse(**dataclasses.asdict(status))
+
+
+@router.get("", response_model=HealthResponse)
+async def health(request: Request) -> HealthResponse:
+    """Pool metrics of the primary and of each replica, read from the engines without opening a session."""
+    state = request.app.state
+    return HealthResponse(
+        pool=_pool(state.engine),
+        replicas={name: _pool(replica) for name, replica in state.replica_engines.items()},
+    )
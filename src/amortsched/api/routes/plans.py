@@ -1,6 +1,7 @@
 import uuid
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
+from fastapi.responses import JSONResponse
 
 from amortsched.api.dependencies import (
     AddExtraPayment,
@@ -9,8 +10,10 @@ from amortsched.api.dependencies import (
     CreatePlan,
     CurrentUserId,
     DeletePlan,
+    ExpectedRevision,
     GetPlan,
     ListPlans,
+    PlanFields,
     SavePlan,
     UpdatePlan,
 )
@@ -32,12 +35,19 @@ from amortsched.app.commands.plans import (
     UpdatePlanCommand,
 )
 from amortsched.app.queries.plans import GetPlanQuery, ListPlansQuery
+from amortsched.core.entities import Plan
 from amortsched.core.utils import today
 from amortsched.core.values import EarlyPaymentFees, Term
 
 router = APIRouter(prefix="/api/plans", tags=["plans"])
 
 
+def _etag(plan: Plan) -> str:
+    # The revision changes with every update, so it tells representations of one plan apart; send it back in
+    # `If-Match` to update only the plan that was read.
+    return f'"{plan.revision}"'
+
+
 @router.post("", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
 async def create_plan(
     body: CreatePlanRequest,
@@ -64,9 +74,12 @@ async def create_plan(
 async def list_plans(
     user_id: CurrentUserId,
     handler: ListPlans,
-) -> list[PlanResponse]:
-    plans = await handler.handle(ListPlansQuery(user_id=user_id))
-    return [PlanResponse.from_entity(p) for p in plans]
+    fields: PlanFields,
+) -> list[PlanResponse] | Response:
+    plans = await handler.handle(ListPlansQuery(user_id=user_id, fields=fields))
+    if fields is None:
+        return [PlanResponse.from_entity(p) for p in plans]
+    return JSONResponse([PlanResponse.from_entity(p).model_dump(mode="json", include=fields) for p in plans])
 
 
 @router.get("/{plan_id}", response_model=PlanResponse)
@@ -74,8 +87,10 @@ async def get_plan(
     plan_id: uuid.UUID,
     user_id: CurrentUserId,
     handler: GetPlan,
+    response: Response,
 ) -> PlanResponse:
     plan = await handler.handle(GetPlanQuery(plan_id=plan_id, user_id=user_id))
+    response.headers["ETag"] = _etag(plan)
     return PlanResponse.from_entity(plan)
 
 
@@ -85,6 +100,8 @@ async def update_plan(
     body: UpdatePlanRequest,
     user_id: CurrentUserId,
     handler: UpdatePlan,
+    revision: ExpectedRevision,
+    response: Response,
 ) -> PlanResponse:
     command = UpdatePlanCommand(
         plan_id=plan_id,
@@ -100,8 +117,10 @@ async def update_plan(
         if body.early_payment_fees
         else None,
         interest_rate_application=body.interest_rate_application,
+        revision=revision,
     )
     plan = await handler.handle(command)
+    response.headers["ETag"] = _etag(plan)
     return PlanResponse.from_entity(plan)
 
 
@@ -1,30 +1,78 @@
 import uuid
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 
 from amortsched.api.dependencies import (
+    CompareSchedule,
     CurrentUserId,
     DeleteSchedule,
     GenerateSchedule,
     GetSchedule,
     ListSchedules,
+    QueryOnly,
     SaveSchedule,
+    ScheduleFields,
+    Window,
+)
+from amortsched.api.schemas.schedules import (
+    CompareScheduleRequest,
+    ScheduleComparisonResponse,
+    ScheduleResponse,
+    encode_comparison,
+    encode_schedule,
+    encode_schedules,
 )
-from amortsched.api.schemas.schedules import ScheduleResponse
 from amortsched.app.commands.plans import DeleteScheduleCommand, SaveScheduleCommand
-from amortsched.app.queries.schedules import GenerateScheduleQuery, GetScheduleQuery, ListSchedulesQuery
+from amortsched.app.queries.schedules import (
+    CompareScheduleQuery,
+    GenerateScheduleQuery,
+    GetScheduleQuery,
+    ListSchedulesQuery,
+)
+from amortsched.core.values import InterestRateChange, OneTimeExtraPayment, RecurringExtraPayment
 
 router = APIRouter(prefix="/api/plans/{plan_id}/schedules", tags=["schedules"])
 
 
-@router.post("", response_model=ScheduleResponse, status_code=status.HTTP_201_CREATED)
+def _json_response(content: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    return Response(content=content, status_code=status_code, media_type="application/json")
+
+
+@router.post("", response_model=ScheduleResponse, status_code=status.HTTP_201_CREATED, dependencies=[QueryOnly])
 async def generate_schedule(
     plan_id: uuid.UUID,
     user_id: CurrentUserId,
     handler: GenerateSchedule,
-) -> ScheduleResponse:
-    schedule = await handler.handle(GenerateScheduleQuery(plan_id=plan_id, user_id=user_id))
-    return ScheduleResponse.from_entity(schedule)
+    window: Window,
+) -> Response:
+    schedule = await handler.handle(GenerateScheduleQuery(plan_id=plan_id, user_id=user_id, window=window))
+    return _json_response(encode_schedule(schedule), status.HTTP_201_CREATED)
+
+
+@router.post("/compare", response_model=ScheduleComparisonResponse, dependencies=[QueryOnly])
+async def compare_schedule(
+    plan_id: uuid.UUID,
+    body: CompareScheduleRequest,
+    user_id: CurrentUserId,
+    handler: CompareSchedule,
+) -> Response:
+    query = CompareScheduleQuery(
+        plan_id=plan_id,
+        user_id=user_id,
+        one_time_extra_payments=[
+            OneTimeExtraPayment(date=p.date, amount=p.amount) for p in body.one_time_extra_payments
+        ],
+        recurring_extra_payments=[
+            RecurringExtraPayment(start_date=p.start_date, amount=p.amount, count=p.count)
+            for p in body.recurring_extra_payments
+        ],
+        interest_rate_changes=[
+            InterestRateChange(effective_date=c.effective_date, yearly_interest_rate=c.rate)
+            for c in body.interest_rate_changes
+        ],
+    )
+    comparison = await handler.handle(query)
+    return _json_response(encode_comparison(comparison))
 
 
 @router.get("", response_model=list[ScheduleResponse])
@@ -32,9 +80,11 @@ async def list_schedules(
     plan_id: uuid.UUID,
     user_id: CurrentUserId,
     handler: ListSchedules,
-) -> list[ScheduleResponse]:
-    schedules = await handler.handle(ListSchedulesQuery(plan_id=plan_id, user_id=user_id))
-    return [ScheduleResponse.from_entity(s) for s in schedules]
+    window: Window,
+    fields: ScheduleFields,
+) -> Response:
+    schedules = await handler.handle(ListSchedulesQuery(plan_id=plan_id, user_id=user_id, fields=fields))
+    return _json_response(encode_schedules(schedules, window, fields))
 
 
 @router.get("/{schedule_id}", response_model=ScheduleResponse)
@@ -43,9 +93,10 @@ async def get_schedule(
     schedule_id: uuid.UUID,
     user_id: CurrentUserId,
     handler: GetSchedule,
-) -> ScheduleResponse:
-    schedule = await handler.handle(GetScheduleQuery(schedule_id=schedule_id, user_id=user_id))
-    return ScheduleResponse.from_entity(schedule)
+    window: Window,
+) -> Response:
+    schedule = await handler.handle(GetScheduleQuery(schedule_id=schedule_id, user_id=user_id, window=window))
+    return _json_response(encode_schedule(schedule))
 
 
 @router.post("/{schedule_id}/save", response_model=ScheduleResponse)
@@ -54,9 +105,9 @@ async def save_schedule(
     schedule_id: uuid.UUID,
     user_id: CurrentUserId,
     handler: SaveSchedule,
-) -> ScheduleResponse:
+) -> Response:
     schedule = await handler.handle(SaveScheduleCommand(plan_id=plan_id, user_id=user_id))
-    return ScheduleResponse.from_entity(schedule)
+    return _json_response(encode_schedule(schedule))
 
 
 @router.delete("/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
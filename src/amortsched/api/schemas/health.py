@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class PoolStatusResponse(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    wait_seconds: float
+    max_wait_seconds: float
+    timeouts: int
+
+
+class HealthResponse(BaseModel):
+    status: str = "ok"
+    pool: PoolStatusResponse | None = None
+    replicas: dict[str, PoolStatusResponse | None] = {}
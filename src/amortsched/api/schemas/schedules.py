@@ -1,10 +1,22 @@
 import datetime
 import uuid
+from collections.abc import Iterable
 from decimal import Decimal
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from pydantic_core import to_json
 
+from amortsched.api.schemas.plans import ExtraPaymentSchema, InterestRateChangeSchema, RecurringExtraPaymentSchema
 from amortsched.core.entities import Schedule
+from amortsched.core.values import (
+    MONTH_NAMES,
+    Installment,
+    InstallmentView,
+    ScheduleComparison,
+    ScheduleTotals,
+    ScheduleWindow,
+)
 
 
 class BalanceSchema(BaseModel):
@@ -41,35 +53,108 @@ class ScheduleResponse(BaseModel):
     totals: TotalsSchema | None
     generated_at: datetime.datetime
 
-    @classmethod
-    def from_entity(cls, schedule: Schedule) -> "ScheduleResponse":
-        return cls(
-            id=schedule.id,
-            plan_id=schedule.plan_id,
-            installments=[
-                InstallmentSchema(
-                    installment_number=inst.i,
-                    year=inst.year,
-                    month=int(inst.month),
-                    month_name=inst.month.name,
-                    type=inst.payment.kind.value,
-                    principal=inst.payment.principal,
-                    interest=inst.payment.interest,
-                    fees=inst.payment.fees,
-                    total=inst.payment.total,
-                    balance=BalanceSchema(before=inst.balance.before, after=inst.balance.after),
-                )
-                for inst in schedule.installments
+
+class CompareScheduleRequest(BaseModel):
+    one_time_extra_payments: list[ExtraPaymentSchema] = Field(default_factory=list)
+    recurring_extra_payments: list[RecurringExtraPaymentSchema] = Field(default_factory=list)
+    interest_rate_changes: list[InterestRateChangeSchema] = Field(default_factory=list)
+
+
+class PeriodDeltaSchema(BaseModel):
+    period: int
+    year: int
+    month: int
+    month_name: str
+    baseline: list[InstallmentSchema]
+    scenario: list[InstallmentSchema]
+
+
+class ScheduleComparisonResponse(BaseModel):
+    periods: list[PeriodDeltaSchema]
+    interest_saved: Decimal
+    fees_saved: Decimal
+    total_saved: Decimal
+    months_saved: int
+    converged: bool
+
+
+def _installment_to_payload(view: InstallmentView) -> dict[str, Any]:
+    return {
+        "installment_number": view.i,
+        "year": view.year,
+        "month": view.month,
+        "month_name": view.month_name,
+        "type": view.kind.value,
+        "principal": view.principal,
+        "interest": view.interest,
+        "fees": view.fees,
+        "total": view.total,
+        "balance": {"before": view.balance_before, "after": view.balance_after},
+    }
+
+
+def _installments_to_payload(installments: Iterable[Installment]) -> list[dict[str, Any]]:
+    return [_installment_to_payload(InstallmentView.from_installment(item)) for item in installments]
+
+
+def _totals_to_payload(totals: ScheduleTotals | None) -> dict[str, Any] | None:
+    if totals is None:
+        return None
+    return {
+        "principal": totals.principal,
+        "interest": totals.interest,
+        "fees": totals.fees,
+        "total_outflow": totals.total_outflow,
+        "months": totals.months,
+        "paid_off": totals.paid_off,
+    }
+
+
+def schedule_to_payload(
+    schedule: Schedule, window: ScheduleWindow | None = None, fields: frozenset[str] | None = None
+) -> dict[str, Any]:
+    """Build the `ScheduleResponse` shape as plain containers, skipping per-row model construction.
+
+    With `fields`, only those keys are included.
+    """
+    payload: dict[str, Any] = {"id": schedule.id, "plan_id": schedule.plan_id}
+    if fields is None or "installments" in fields:
+        payload["installments"] = [_installment_to_payload(view) for view in schedule.views(window)]
+    payload["totals"] = _totals_to_payload(schedule.totals)
+    payload["generated_at"] = schedule.generated_at
+    if fields is None:
+        return payload
+    return {key: value for key, value in payload.items() if key in fields}
+
+
+def encode_schedule(schedule: Schedule, window: ScheduleWindow | None = None) -> bytes:
+    return to_json(schedule_to_payload(schedule, window))
+
+
+def encode_schedules(
+    schedules: Iterable[Schedule], window: ScheduleWindow | None = None, fields: frozenset[str] | None = None
+) -> bytes:
+    return to_json([schedule_to_payload(schedule, window, fields) for schedule in schedules])
+
+
+def encode_comparison(comparison: ScheduleComparison) -> bytes:
+    return to_json(
+        {
+            "periods": [
+                {
+                    "period": delta.period,
+                    "year": delta.year,
+                    "month": int(delta.month),
+                    "month_name": MONTH_NAMES[delta.month],
+                    "baseline": _installments_to_payload(delta.baseline),
+                    "scenario": _installments_to_payload(delta.scenario),
+                }
+                for delta in comparison.periods
             ],
-            totals=TotalsSchema(
-                principal=schedule.totals.principal,
-                interest=schedule.totals.interest,
-                fees=schedule.totals.fees,
-                total_outflow=schedule.totals.total_outflow,
-                months=schedule.totals.months,
-                paid_off=schedule.totals.paid_off,
-            )
-            if schedule.totals
-            else None,
-            generated_at=schedule.generated_at,
-        )
+            "interest_saved": comparison.interest_saved,
+            "fees_saved": comparison.fees_saved,
+            "total_saved": comparison.total_saved,
+            "months_saved": comparison.months_saved,
+            "converged": comparison.converged,
+        }
+    )
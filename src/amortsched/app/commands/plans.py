@@ -1,12 +1,11 @@
 import datetime
 import uuid
 from dataclasses import dataclass
-from decimal import Decimal
 
 from amortsched.core.entities import Plan, Schedule
-from amortsched.core.errors import PlanNotFoundError, PlanOwnershipError, ScheduleNotFoundError
-from amortsched.core.repositories import AsyncRepository
-from amortsched.core.specifications import Id
+from amortsched.core.errors import PlanNotFoundError, PlanOwnershipError, ScheduleNotFoundError, StaleRevisionError
+from amortsched.core.repositories import AsyncRepository, PlanRepository
+from amortsched.core.specifications import Eq, Id
 from amortsched.core.values import (
     Amount,
     EarlyPaymentFees,
@@ -14,8 +13,9 @@ from amortsched.core.values import (
     InterestRateApplication,
     InterestRateChange,
     OneTimeExtraPayment,
+    PlanEvent,
+    PlanInputs,
     RecurringExtraPayment,
-    Term,
     TermType,
 )
 
@@ -35,6 +35,20 @@ async def _get_owned_plan(plan_repo: AsyncRepository[Plan], plan_id: uuid.UUID,
     return plan
 
 
+async def _add_plan_event(plan_repo: PlanRepository, plan_id: uuid.UUID, user_id: uuid.UUID, event: PlanEvent) -> Plan:
+    """Add `event` to an owned plan in a single write, telling apart the failures only when it matched nothing.
+
+    Raises:
+        PlanNotFoundError: If the plan does not exist.
+        PlanOwnershipError: If the plan belongs to a different user.
+    """
+    plan = await plan_repo.add_event(plan_id, event, Eq("user_id", user_id))
+    if plan is None:
+        await _get_owned_plan(plan_repo, plan_id, user_id)
+        raise PlanNotFoundError(plan_id)
+    return plan
+
+
 async def _get_owned_schedule(
     schedule_repo: AsyncRepository[Schedule],
     plan_repo: AsyncRepository[Plan],
@@ -73,28 +87,23 @@ class CreatePlanHandler:
         self._plan_repo = plan_repo
 
     async def handle(self, command: CreatePlanCommand) -> Plan:
-        amount = command.amount if isinstance(command.amount, Decimal) else Decimal(command.amount)
-        interest_rate = (
-            command.interest_rate if isinstance(command.interest_rate, Decimal) else Decimal(command.interest_rate)
+        inputs = PlanInputs.create(
+            command.amount,
+            command.term,
+            command.interest_rate,
+            command.early_payment_fees,
+            interest_rate_application=command.interest_rate_application,
         )
-        if isinstance(command.term, int):
-            term = Term(command.term, 0)
-        elif isinstance(command.term, tuple):
-            term = Term(*command.term)
-        else:
-            term = command.term
         plan = Plan(
             user_id=command.user_id,
             name=command.name,
             slug=command.name.lower().replace(" ", "-"),
-            amount=amount,
-            term=term,
-            interest_rate=interest_rate,
+            amount=inputs.amount,
+            term=inputs.term,
+            interest_rate=inputs.interest_rate,
             start_date=command.start_date,
-            early_payment_fees=command.early_payment_fees
-            if command.early_payment_fees is not None
-            else EarlyPaymentFees(),
-            interest_rate_application=command.interest_rate_application,
+            early_payment_fees=inputs.early_payment_fees,
+            interest_rate_application=inputs.interest_rate_application,
         )
         await self._plan_repo.add(plan)
         return plan
@@ -111,6 +120,8 @@ class UpdatePlanCommand:
     start_date: datetime.date | None = None
     early_payment_fees: EarlyPaymentFees | None = None
     interest_rate_application: InterestRateApplication | None = None
+    # Revision of the plan the update was made from; None updates whatever the current one is.
+    revision: int | None = None
 
 
 class UpdatePlanHandler:
@@ -119,27 +130,26 @@ class UpdatePlanHandler:
 
     async def handle(self, command: UpdatePlanCommand) -> Plan:
         plan = await _get_owned_plan(self._plan_repo, command.plan_id, command.user_id)
+        if command.revision is not None and command.revision != plan.revision:
+            raise StaleRevisionError("Plan", plan.id, command.revision)
+        inputs = PlanInputs.create(
+            plan.amount if command.amount is None else command.amount,
+            plan.term if command.term is None else command.term,
+            plan.interest_rate if command.interest_rate is None else command.interest_rate,
+            plan.early_payment_fees if command.early_payment_fees is None else command.early_payment_fees,
+            interest_rate_application=plan.interest_rate_application
+            if command.interest_rate_application is None
+            else command.interest_rate_application,
+        )
         if command.name is not None:
             plan.name = command.name
-        if command.amount is not None:
-            plan.amount = command.amount if isinstance(command.amount, Decimal) else Decimal(command.amount)
-        if command.term is not None:
-            if isinstance(command.term, int):
-                plan.term = Term(command.term, 0)
-            elif isinstance(command.term, tuple):
-                plan.term = Term(*command.term)
-            else:
-                plan.term = command.term
-        if command.interest_rate is not None:
-            plan.interest_rate = (
-                command.interest_rate if isinstance(command.interest_rate, Decimal) else Decimal(command.interest_rate)
-            )
         if command.start_date is not None:
             plan.start_date = command.start_date
-        if command.early_payment_fees is not None:
-            plan.early_payment_fees = command.early_payment_fees
-        if command.interest_rate_application is not None:
-            plan.interest_rate_application = command.interest_rate_application
+        plan.amount = inputs.amount
+        plan.term = inputs.term
+        plan.interest_rate = inputs.interest_rate
+        plan.early_payment_fees = inputs.early_payment_fees
+        plan.interest_rate_application = inputs.interest_rate_application
         plan.touch()
         await self._plan_repo.update(plan)
         return plan
@@ -152,11 +162,13 @@ class DeletePlanCommand:
 
 
 class DeletePlanHandler:
-    def __init__(self, plan_repo: AsyncRepository[Plan]) -> None:
+    def __init__(self, plan_repo: AsyncRepository[Plan], schedule_repo: AsyncRepository[Schedule]) -> None:
         self._plan_repo = plan_repo
+        self._schedule_repo = schedule_repo
 
     async def handle(self, command: DeletePlanCommand) -> None:
         await _get_owned_plan(self._plan_repo, command.plan_id, command.user_id)
+        await self._schedule_repo.delete(Eq("plan_id", command.plan_id))
         await self._plan_repo.delete(Id(command.plan_id))
 
 
@@ -187,16 +199,12 @@ class AddOneTimeExtraPaymentCommand:
 
 
 class AddOneTimeExtraPaymentHandler:
-    def __init__(self, plan_repo: AsyncRepository[Plan]) -> None:
+    def __init__(self, plan_repo: PlanRepository) -> None:
         self._plan_repo = plan_repo
 
     async def handle(self, command: AddOneTimeExtraPaymentCommand) -> Plan:
-        plan = await _get_owned_plan(self._plan_repo, command.plan_id, command.user_id)
-        amount = command.amount if isinstance(command.amount, Decimal) else Decimal(command.amount)
-        plan.one_time_extra_payments.append(OneTimeExtraPayment(date=command.date, amount=amount))
-        plan.touch()
-        await self._plan_repo.update(plan)
-        return plan
+        payment = OneTimeExtraPayment.create(command.date, command.amount)
+        return await _add_plan_event(self._plan_repo, command.plan_id, command.user_id, payment)
 
 
 @dataclass(frozen=True, slots=True)
@@ -209,18 +217,12 @@ class AddRecurringExtraPaymentCommand:
 
 
 class AddRecurringExtraPaymentHandler:
-    def __init__(self, plan_repo: AsyncRepository[Plan]) -> None:
+    def __init__(self, plan_repo: PlanRepository) -> None:
         self._plan_repo = plan_repo
 
     async def handle(self, command: AddRecurringExtraPaymentCommand) -> Plan:
-        plan = await _get_owned_plan(self._plan_repo, command.plan_id, command.user_id)
-        amount = command.amount if isinstance(command.amount, Decimal) else Decimal(command.amount)
-        plan.recurring_extra_payments.append(
-            RecurringExtraPayment(start_date=command.start_date, amount=amount, count=command.count)
-        )
-        plan.touch()
-        await self._plan_repo.update(plan)
-        return plan
+        payment = RecurringExtraPayment.create(command.start_date, command.amount, command.count)
+        return await _add_plan_event(self._plan_repo, command.plan_id, command.user_id, payment)
 
 
 @dataclass(frozen=True, slots=True)
@@ -232,19 +234,12 @@ class AddInterestRateChangeCommand:
 
 
 class AddInterestRateChangeHandler:
-    def __init__(self, plan_repo: AsyncRepository[Plan]) -> None:
+    def __init__(self, plan_repo: PlanRepository) -> None:
         self._plan_repo = plan_repo
 
     async def handle(self, command: AddInterestRateChangeCommand) -> Plan:
-        plan = await _get_owned_plan(self._plan_repo, command.plan_id, command.user_id)
-        rate = command.rate if isinstance(command.rate, Decimal) else Decimal(command.rate)
-        plan.interest_rate_changes.append(
-            InterestRateChange(effective_date=command.effective_date, yearly_interest_rate=rate)
-        )
-        plan.interest_rate_changes.sort(key=lambda c: c.effective_date)
-        plan.touch()
-        await self._plan_repo.update(plan)
-        return plan
+        change = InterestRateChange.create(command.effective_date, command.rate)
+        return await _add_plan_event(self._plan_repo, command.plan_id, command.user_id, change)
 
 
 @dataclass(frozen=True, slots=True)
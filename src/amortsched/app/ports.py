@@ -2,8 +2,8 @@ import uuid
 from types import TracebackType
 from typing import Protocol, Self
 
-from amortsched.core.entities import Plan, Profile, Schedule, User
-from amortsched.core.repositories import AsyncRepository
+from amortsched.core.entities import Profile, User
+from amortsched.core.repositories import AsyncRepository, PlanRepository, RefreshTokenRepository, ScheduleRepository
 
 
 class SecuritySettings(Protocol):
@@ -39,8 +39,9 @@ class TokenService(Protocol):
 class AsyncUnitOfWork(Protocol):
     users: AsyncRepository[User]
     profiles: AsyncRepository[Profile]
-    plans: AsyncRepository[Plan]
-    schedules: AsyncRepository[Schedule]
+    plans: PlanRepository
+    schedules: ScheduleRepository
+    refresh_tokens: RefreshTokenRepository
 
     async def begin(self) -> None: ...
     async def commit(self) -> None: ...
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from amortsched.core.entities import Plan
 from amortsched.core.errors import PlanNotFoundError, PlanOwnershipError
 from amortsched.core.repositories import AsyncRepository
-from amortsched.core.specifications import Eq
+from amortsched.core.specifications import Eq, Fields, Specification
 
 
 async def _get_owned_plan(plan_repo: AsyncRepository[Plan], plan_id: uuid.UUID, user_id: uuid.UUID) -> Plan:
@@ -39,6 +39,8 @@ class GetPlanHandler:
 @dataclass(frozen=True, slots=True)
 class ListPlansQuery:
     user_id: uuid.UUID
+    # Plan fields the caller reads; the others may come back empty. None loads them all.
+    fields: frozenset[str] | None = None
 
 
 class ListPlansHandler:
@@ -46,4 +48,7 @@ class ListPlansHandler:
         self._plan_repo = plan_repo
 
     async def handle(self, query: ListPlansQuery) -> list[Plan]:
-        return [item async for item in self._plan_repo.get_items(Eq("user_id", query.user_id))]
+        spec: Specification[Plan] = Eq("user_id", query.user_id)
+        if query.fields is not None:
+            spec &= Fields(*query.fields)
+        return [item async for item in self._plan_repo.get_items(spec)]
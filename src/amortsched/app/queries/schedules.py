@@ -1,10 +1,19 @@
 import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass
 
+from amortsched.core.amortization import AmortizationSchedule, compare_schedules
 from amortsched.core.entities import Plan, Schedule
 from amortsched.core.errors import PlanNotFoundError, PlanOwnershipError, ScheduleNotFoundError
-from amortsched.core.repositories import AsyncRepository
-from amortsched.core.specifications import Eq
+from amortsched.core.repositories import AsyncRepository, ScheduleRepository
+from amortsched.core.specifications import Eq, Fields, Specification
+from amortsched.core.values import (
+    InterestRateChange,
+    OneTimeExtraPayment,
+    RecurringExtraPayment,
+    ScheduleComparison,
+    ScheduleWindow,
+)
 
 
 async def _get_owned_plan(plan_repo: AsyncRepository[Plan], plan_id: uuid.UUID, user_id: uuid.UUID) -> Plan:
@@ -22,31 +31,11 @@ async def _get_owned_plan(plan_repo: AsyncRepository[Plan], plan_id: uuid.UUID,
     return plan
 
 
-async def _get_owned_schedule(
-    schedule_repo: AsyncRepository[Schedule],
-    plan_repo: AsyncRepository[Plan],
-    schedule_id: uuid.UUID,
-    user_id: uuid.UUID,
-) -> Schedule:
-    """Fetch a schedule and verify ownership transitively through its plan.
-
-    Raises:
-        ScheduleNotFoundError: If the schedule does not exist.
-        PlanNotFoundError: If the associated plan does not exist.
-        PlanOwnershipError: If the plan belongs to a different user.
-    """
-    schedule = await schedule_repo.get_by_id(schedule_id)
-    if schedule is None:
-        raise ScheduleNotFoundError(schedule_id)
-    plan = await _get_owned_plan(plan_repo, schedule.plan_id, user_id)
-    schedule.plan = plan
-    return schedule
-
-
 @dataclass(frozen=True, slots=True)
 class GenerateScheduleQuery:
     plan_id: uuid.UUID
     user_id: uuid.UUID
+    window: ScheduleWindow | None = None
 
 
 class GenerateScheduleHandler:
@@ -55,28 +44,71 @@ class GenerateScheduleHandler:
 
     async def handle(self, query: GenerateScheduleQuery) -> Schedule:
         plan = await _get_owned_plan(self._plan_repo, query.plan_id, query.user_id)
-        return plan.generate()
+        return plan.generate(window=query.window)
+
+
+@dataclass(frozen=True, slots=True)
+class CompareScheduleQuery:
+    """Compare a plan's schedule against the same plan with extra, hypothetical adjustments."""
+
+    plan_id: uuid.UUID
+    user_id: uuid.UUID
+    one_time_extra_payments: Sequence[OneTimeExtraPayment] = ()
+    recurring_extra_payments: Sequence[RecurringExtraPayment] = ()
+    interest_rate_changes: Sequence[InterestRateChange] = ()
+
+
+class CompareScheduleHandler:
+    def __init__(self, plan_repo: AsyncRepository[Plan]) -> None:
+        self._plan_repo = plan_repo
+
+    async def handle(self, query: CompareScheduleQuery) -> ScheduleComparison:
+        plan = await _get_owned_plan(self._plan_repo, query.plan_id, query.user_id)
+        inputs = plan.to_inputs()
+        baseline = AmortizationSchedule.from_inputs(inputs)
+        scenario = AmortizationSchedule.from_inputs(inputs)
+        for otp in query.one_time_extra_payments:
+            scenario.add_one_time_extra_payment(otp.date, otp.amount)
+        for rp in query.recurring_extra_payments:
+            scenario.add_recurring_extra_payment(rp.start_date, rp.amount, count=rp.count)
+        for rc in query.interest_rate_changes:
+            scenario.add_interest_rate_change(rc.effective_date, rc.yearly_interest_rate)
+        return compare_schedules(baseline, scenario, plan.start_date)
 
 
 @dataclass(frozen=True, slots=True)
 class GetScheduleQuery:
     schedule_id: uuid.UUID
     user_id: uuid.UUID
+    window: ScheduleWindow | None = None
 
 
 class GetScheduleHandler:
-    def __init__(self, schedule_repo: AsyncRepository[Schedule], plan_repo: AsyncRepository[Plan]) -> None:
+    def __init__(self, schedule_repo: ScheduleRepository, plan_repo: AsyncRepository[Plan]) -> None:
         self._schedule_repo = schedule_repo
         self._plan_repo = plan_repo
 
     async def handle(self, query: GetScheduleQuery) -> Schedule:
-        return await _get_owned_schedule(self._schedule_repo, self._plan_repo, query.schedule_id, query.user_id)
+        """Fetch a stored schedule with only the installments inside `query.window`, if given.
+
+        Raises:
+            ScheduleNotFoundError: If the schedule does not exist.
+            PlanNotFoundError: If the associated plan does not exist.
+            PlanOwnershipError: If the plan belongs to a different user.
+        """
+        schedule = await self._schedule_repo.get_window(query.schedule_id, query.window)
+        if schedule is None:
+            raise ScheduleNotFoundError(query.schedule_id)
+        schedule.plan = await _get_owned_plan(self._plan_repo, schedule.plan_id, query.user_id)
+        return schedule
 
 
 @dataclass(frozen=True, slots=True)
 class ListSchedulesQuery:
     plan_id: uuid.UUID
     user_id: uuid.UUID
+    # Schedule fields the caller reads; the others may come back empty. None loads them all.
+    fields: frozenset[str] | None = None
 
 
 class ListSchedulesHandler:
@@ -86,4 +118,7 @@ class ListSchedulesHandler:
 
     async def handle(self, query: ListSchedulesQuery) -> list[Schedule]:
         await _get_owned_plan(self._plan_repo, query.plan_id, query.user_id)
-        return [item async for item in self._schedule_repo.get_items(Eq("plan_id", query.plan_id))]
+        spec: Specification[Schedule] = Eq("plan_id", query.plan_id)
+        if query.fields is not None:
+            spec &= Fields(*query.fields)
+        return [item async for item in self._schedule_repo.get_items(spec)]
@@ -1,9 +1,12 @@
+import bisect
 import calendar
 import datetime
-from collections.abc import Generator
+from collections import OrderedDict
+from collections.abc import Generator, Hashable, Iterator
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import ClassVar
 
-from amortsched.core.errors import AmortizationError, InvalidExtraPaymentError, InvalidRecurringPaymentError
 from amortsched.core.values import (
     DAYS_IN_YEAR,
     Amount,
@@ -17,12 +20,24 @@ from amortsched.core.values import (
     OneTimeExtraPayment,
     Payment,
     PaymentKind,
+    PeriodDelta,
+    PlanInputs,
     RecurringExtraPayment,
+    ScheduleCheckpoint,
+    ScheduleComparison,
     ScheduleTotals,
-    Term,
+    ScheduleWindow,
     TermType,
+    to_decimal,
+    to_term,
 )
 
+# Periods between the engine states kept for resuming windowed generation.
+CHECKPOINT_INTERVAL = 12
+
+# Matches no row at all: the loan is walked for its totals without building any installments.
+_NO_ROWS = ScheduleWindow(last_period=0)
+
 
 def next_month(dt: datetime.date) -> datetime.date:
     year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
@@ -30,7 +45,40 @@ def next_month(dt: datetime.date) -> datetime.date:
     return datetime.date(year, month, day)
 
 
+class CheckpointCache:
+    """Checkpoints of complete runs per engine inputs, least recently used evicted past `maxsize`.
+
+    Engines are built afresh for every request and batch item, so the checkpoints are kept here, shared by all
+    engines of the process, for a later windowed run over the same inputs to resume from.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[ScheduleCheckpoint, ...]] = OrderedDict()
+
+    def get(self, key: Hashable) -> tuple[ScheduleCheckpoint, ...]:
+        checkpoints = self._entries.get(key)
+        if checkpoints is None:
+            return ()
+        self._entries.move_to_end(key)
+        return checkpoints
+
+    def set(self, key: Hashable, checkpoints: tuple[ScheduleCheckpoint, ...]) -> None:
+        self._entries[key] = checkpoints
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class AmortizationSchedule:
+    _checkpoint_cache: ClassVar[CheckpointCache] = CheckpointCache()
+
     def __init__(
         self,
         amount: Amount,
@@ -40,11 +88,9 @@ class AmortizationSchedule:
         *,
         interest_rate_application: InterestRateApplication = InterestRateApplication.WholeMonth,
     ) -> None:
-        self.amount = amount if isinstance(amount, Decimal) else Decimal(amount)
-        self.interest_rate = interest_rate if isinstance(interest_rate, Decimal) else Decimal(interest_rate)
-        if isinstance(term, int):
-            term = (term, 0)
-        self.term = Term(*term) if isinstance(term, tuple) else term
+        self.amount = to_decimal(amount)
+        self.interest_rate = to_decimal(interest_rate)
+        self.term = to_term(term)
         self.early_payment_fees = early_payment_fees if early_payment_fees is not None else EarlyPaymentFees()
         self.interest_rate_application = interest_rate_application
 
@@ -54,6 +100,22 @@ class AmortizationSchedule:
         self.one_time_extra_payments: list[OneTimeExtraPayment] = []
         self.recurring_extra_payments: list[RecurringExtraPayment] = []
         self._last_totals: ScheduleTotals | None = None
+        self._last_inputs_key: tuple[object, ...] | None = None
+
+    @classmethod
+    def from_inputs(cls, inputs: PlanInputs) -> AmortizationSchedule:
+        """Build an engine from already validated inputs, without re-checking or re-sorting them."""
+        schedule = cls(
+            amount=inputs.amount,
+            term=inputs.term,
+            interest_rate=inputs.interest_rate,
+            early_payment_fees=inputs.early_payment_fees,
+            interest_rate_application=inputs.interest_rate_application,
+        )
+        schedule.one_time_extra_payments = list(inputs.one_time_extra_payments)
+        schedule.recurring_extra_payments = list(inputs.recurring_extra_payments)
+        schedule.interest_rate_changes = list(inputs.interest_rate_changes)
+        return schedule
 
     def __str__(self) -> str:
         term_parts = [f"{self.term.years} years"]
@@ -108,10 +170,7 @@ class AmortizationSchedule:
         return self._last_totals
 
     def add_interest_rate_change(self, effective_date: datetime.date, yearly_interest_rate: InterestRate) -> None:
-        rate = yearly_interest_rate if isinstance(yearly_interest_rate, Decimal) else Decimal(yearly_interest_rate)
-        if rate < 0:
-            raise AmortizationError("Interest rate must be non-negative")
-        self.interest_rate_changes.append(InterestRateChange(effective_date=effective_date, yearly_interest_rate=rate))
+        self.interest_rate_changes.append(InterestRateChange.create(effective_date, yearly_interest_rate))
         self.interest_rate_changes.sort(key=lambda c: c.effective_date)
 
     def _yearly_rate_percent_for_date(self, dt: datetime.date) -> Decimal:
@@ -222,10 +281,9 @@ class AmortizationSchedule:
         self,
         *,
         kind: PaymentKind,
-        dt: datetime.date,
         requested_amount: Decimal,
         balance: Decimal,
-    ) -> tuple[Installment | None, Decimal]:
+    ) -> tuple[Payment | None, Decimal]:
         if balance <= Decimal("0.00"):
             return None, balance
 
@@ -235,17 +293,8 @@ class AmortizationSchedule:
 
         penalty = self.early_payment_fees.penalty(payment_amount)
         principal = self.early_payment_fees.principal(payment_amount)
-        before = balance
-        after = before - principal
         extra_payment = Payment(kind=kind, principal=principal, interest=Decimal("0.00"), fees=penalty)
-        row = Installment(
-            i=None,
-            year=dt.year,
-            month=Month(dt.month),
-            payment=extra_payment,
-            balance=Balance(before=before, after=after),
-        )
-        return row, after
+        return extra_payment, balance - principal
 
     def _daily_rate_for_segment(self, *, period_start: datetime.date, segment_start: datetime.date) -> Decimal:
         if self.interest_rate_application == InterestRateApplication.WholeMonth:
@@ -263,7 +312,8 @@ class AmortizationSchedule:
         period_start: datetime.date,
         period_end: datetime.date,
         balance: Decimal,
-    ) -> tuple[list[Installment], Decimal, Decimal]:
+    ) -> tuple[list[tuple[datetime.date, Payment, Decimal]], Decimal, Decimal]:
+        # Extras come back as (date, payment, balance before) so callers only build rows they actually emit.
         extras = self._extras_for_period(period_start, period_end)
         extras_by_date, extras_on_end = self._split_extras_for_period_end(extras=extras, period_end=period_end)
 
@@ -273,7 +323,7 @@ class AmortizationSchedule:
         segment_starts = [period_start] + sorted(cut_points)
         segment_starts.append(period_end)
 
-        installments: list[Installment] = []
+        applied: list[tuple[datetime.date, Payment, Decimal]] = []
         interest_total = Decimal("0.00")
         for i in range(len(segment_starts) - 1):
             segment_start = segment_starts[i]
@@ -287,57 +337,129 @@ class AmortizationSchedule:
 
             if segment_start in extras_by_date:
                 for kind, amount in extras_by_date[segment_start]:
-                    extra_row, balance = self._apply_extra_payment(
-                        kind=kind,
-                        dt=segment_start,
-                        requested_amount=amount,
-                        balance=balance,
-                    )
-                    if extra_row:
-                        installments.append(extra_row)
+                    before = balance
+                    payment, balance = self._apply_extra_payment(kind=kind, requested_amount=amount, balance=balance)
+                    if payment:
+                        applied.append((segment_start, payment, before))
 
         for kind, dt, amount in extras_on_end:
-            extra_row, balance = self._apply_extra_payment(
-                kind=kind,
-                dt=dt,
-                requested_amount=amount,
-                balance=balance,
-            )
-            if extra_row:
-                installments.append(extra_row)
-
-        return installments, balance, interest_total
-
-    def _validate_one_time_extra_payment(self, date: datetime.date, amount: Decimal) -> None:
-        if amount <= 0:
-            raise InvalidExtraPaymentError("Extra payment amount must be positive", date, amount)
+            before = balance
+            payment, balance = self._apply_extra_payment(kind=kind, requested_amount=amount, balance=balance)
+            if payment:
+                applied.append((dt, payment, before))
 
-    def _validate_recurring_extra_payment(self, start_date: datetime.date, amount: Decimal, count: int) -> None:
-        if amount <= 0:
-            raise InvalidRecurringPaymentError("Recurring payment amount must be positive", start_date, amount, count)
-        if count <= 0:
-            raise InvalidRecurringPaymentError("Recurring payment count must be positive", start_date, amount, count)
+        return applied, balance, interest_total
 
     def add_one_time_extra_payment(self, date: datetime.date, amount: Amount) -> None:
-        amount = amount if isinstance(amount, Decimal) else Decimal(amount)
-        self._validate_one_time_extra_payment(date, amount)
-        self.one_time_extra_payments.append(OneTimeExtraPayment(date=date, amount=amount))
+        self.one_time_extra_payments.append(OneTimeExtraPayment.create(date, amount))
 
     def add_recurring_extra_payment(self, start_date: datetime.date, amount: Amount, count: int) -> None:
-        amount = amount if isinstance(amount, Decimal) else Decimal(amount)
-        self._validate_recurring_extra_payment(start_date, amount, count)
-        self.recurring_extra_payments.append(RecurringExtraPayment(start_date=start_date, amount=amount, count=count))
-
-    def generate(self, start_date: datetime.date) -> Generator[Installment, None, None]:
-        balance = self.amount
-        date = start_date
-        scheduled_payment_index = 0
-        total_principal = Decimal("0.00")
-        total_interest = Decimal("0.00")
-        total_fees = Decimal("0.00")
+        self.recurring_extra_payments.append(RecurringExtraPayment.create(start_date, amount, count))
+
+    def summarize(self, start_date: datetime.date) -> ScheduleTotals:
+        """Run the whole schedule and return only its totals."""
+        for _ in self._walk(start_date, _NO_ROWS, checkpointed=False):
+            pass
+        assert self._last_totals is not None
+        return self._last_totals
+
+    @property
+    def checkpoints(self) -> list[ScheduleCheckpoint]:
+        """Checkpoints cached for the inputs of the last generation."""
+        if self._last_inputs_key is None:
+            return []
+        return list(self._checkpoint_cache.get(self._last_inputs_key))
+
+    def _inputs_key(self, start_date: datetime.date) -> tuple[object, ...]:
+        fees = self.early_payment_fees
+        return (
+            start_date,
+            self.amount,
+            self.term.periods,
+            self.interest_rate,
+            Decimal(fees.fixed),
+            Decimal(fees.percent),
+            self.interest_rate_application,
+            tuple((payment.date, payment.amount) for payment in self.one_time_extra_payments),
+            tuple((payment.start_date, payment.amount, payment.count) for payment in self.recurring_extra_payments),
+            tuple(self.interest_rate_changes),
+        )
+
+    @staticmethod
+    def _resume_point(checkpoints: tuple[ScheduleCheckpoint, ...], window: ScheduleWindow | None) -> int:
+        # Number of leading checkpoints the window skips entirely; the last of them is where to resume.
+        if window is None:
+            return 0
+        skipped = 0
+        for checkpoint in checkpoints:
+            if not window.skips_before(checkpoint.period, checkpoint.date):
+                break
+            skipped += 1
+        return skipped
+
+    def generate(
+        self,
+        start_date: datetime.date,
+        *,
+        window: ScheduleWindow | None = None,
+    ) -> Generator[Installment, None, None]:
+        """Yield the schedule's installments, optionally only those inside `window`.
+
+        Rows outside the window are computed but never built, and the whole loan is still walked so `last_totals`
+        covers the full schedule. Windowed runs record engine states every `CHECKPOINT_INTERVAL` periods, cached per
+        inputs across engines once the whole loan is walked, so a later windowed run over the same inputs resumes
+        from the last one before its window instead of starting from the first period. Runs without a window, like
+        `summarize()` and batch generation, neither record nor look them up.
+        """
+        return self._walk(start_date, window, checkpointed=window is not None)
+
+    def _cached_checkpoints(
+        self, start_date: datetime.date
+    ) -> tuple[tuple[object, ...], tuple[ScheduleCheckpoint, ...]]:
+        key = self._inputs_key(start_date)
+        self._last_inputs_key = key
+        return key, self._checkpoint_cache.get(key)
+
+    def _walk(
+        self, start_date: datetime.date, window: ScheduleWindow | None, *, checkpointed: bool
+    ) -> Generator[Installment, None, None]:
+        monthly_installment = self.monthly_installment
+        key, cached = self._cached_checkpoints(start_date) if checkpointed else (None, ())
+        checkpoints = list(cached[: self._resume_point(cached, window)])
+        if not checkpoints:
+            balance = self.amount
+            date = start_date
+            scheduled_payment_index = 0
+            total_principal = Decimal("0.00")
+            total_interest = Decimal("0.00")
+            total_fees = Decimal("0.00")
+        else:
+            resume_from = checkpoints[-1]
+            balance = resume_from.balance
+            date = resume_from.date
+            scheduled_payment_index = resume_from.period - 1
+            total_principal = resume_from.principal
+            total_interest = resume_from.interest
+            total_fees = resume_from.fees
+        # Without checkpoints, nothing past the last period is ever recorded.
+        recorded_up_to = checkpoints[-1].period if checkpoints else (1 if checkpointed else self.periods)
         paid_off = False
 
         while balance > 0 and scheduled_payment_index < self.periods:
+            period = scheduled_payment_index + 1
+            if period > recorded_up_to and (period - 1) % CHECKPOINT_INTERVAL == 0:
+                checkpoints.append(
+                    ScheduleCheckpoint(
+                        period=period,
+                        date=date,
+                        balance=balance,
+                        principal=total_principal,
+                        interest=total_interest,
+                        fees=total_fees,
+                    )
+                )
+                recorded_up_to = period
+
             period_start = date
             period_end = next_month(date)
 
@@ -346,10 +468,17 @@ class AmortizationSchedule:
                 period_end=period_end,
                 balance=balance,
             )
-            for extra in extras:
-                total_principal += extra.payment.principal
-                total_fees += extra.payment.fees
-                yield extra
+            for dt, extra, before in extras:
+                total_principal += extra.principal
+                total_fees += extra.fees
+                if window is None or window.contains(period, dt.year, dt.month):
+                    yield Installment(
+                        i=None,
+                        year=dt.year,
+                        month=Month(dt.month),
+                        payment=extra,
+                        balance=Balance(before=before, after=before - extra.principal),
+                    )
 
             if balance <= Decimal("0.00"):
                 total_interest += accrued_interest
@@ -357,35 +486,34 @@ class AmortizationSchedule:
                 break
 
             scheduled_payment_index += 1
-            principal = self.monthly_installment - accrued_interest
+            principal = monthly_installment - accrued_interest
             if principal > balance:
                 principal = balance
-            scheduled = Payment(
-                kind=PaymentKind.ScheduledPayment,
-                principal=principal,
-                interest=accrued_interest,
-                fees=Decimal("0.00"),
-            )
             before = balance
-            balance = before - scheduled.principal
+            balance = before - principal
             after = max(balance, Decimal("0.00"))
 
             if balance <= Decimal("0.00"):
-                scheduled.principal = before
+                principal = before
                 balance = Decimal("0.00")
                 paid_off = True
 
-            total_principal += scheduled.principal
-            total_interest += scheduled.interest
-            total_fees += scheduled.fees
-
-            yield Installment(
-                i=scheduled_payment_index,
-                year=period_start.year,
-                month=Month(period_start.month),
-                payment=scheduled,
-                balance=Balance(before=before, after=after),
-            )
+            total_principal += principal
+            total_interest += accrued_interest
+
+            if window is None or window.contains(period, period_start.year, period_start.month):
+                yield Installment(
+                    i=scheduled_payment_index,
+                    year=period_start.year,
+                    month=Month(period_start.month),
+                    payment=Payment(
+                        kind=PaymentKind.ScheduledPayment,
+                        principal=principal,
+                        interest=accrued_interest,
+                        fees=Decimal("0.00"),
+                    ),
+                    balance=Balance(before=before, after=after),
+                )
 
             date = period_end
 
@@ -396,3 +524,158 @@ class AmortizationSchedule:
             months=scheduled_payment_index,
             paid_off=paid_off,
         )
+        self._remember_checkpoints(key, cached, checkpoints)
+
+    def _remember_checkpoints(
+        self,
+        key: tuple[object, ...] | None,
+        cached: tuple[ScheduleCheckpoint, ...],
+        checkpoints: list[ScheduleCheckpoint],
+    ) -> None:
+        # Only complete runs get here, so a longer list covers more of the loan than what is cached.
+        if key is not None and len(checkpoints) > len(cached):
+            self._checkpoint_cache.set(key, tuple(checkpoints))
+
+
+class _InputsTimeline:
+    """Everything that drives an engine from a given date onwards, in a form that can be compared."""
+
+    def __init__(self, schedule: AmortizationSchedule) -> None:
+        self._schedule = schedule
+        self._monthly_installment = schedule.monthly_installment
+        fees = schedule.early_payment_fees
+        self._fees = (Decimal(fees.fixed), Decimal(fees.percent))
+
+        events: list[tuple[PaymentKind, datetime.date, Decimal]] = [
+            (PaymentKind.OneTimeExtraPayment, payment.date, payment.amount)
+            for payment in schedule.one_time_extra_payments
+        ]
+        for recurring in schedule.recurring_extra_payments:
+            dt = recurring.start_date
+            for _ in range(recurring.count):
+                events.append((PaymentKind.RecurringExtraPayment, dt, recurring.amount))
+                dt = next_month(dt)
+        events.sort(key=lambda e: (e[1], str(e[0]), e[2]))
+        self._events = events
+        self._event_dates = [e[1] for e in events]
+        self._change_dates = [c.effective_date for c in schedule.interest_rate_changes]
+
+    def signature_from(self, date: datetime.date, scheduled_payments: int) -> tuple[object, ...]:
+        schedule = self._schedule
+        return (
+            self._monthly_installment,
+            schedule.periods - scheduled_payments,
+            self._fees,
+            schedule.interest_rate_application,
+            schedule._yearly_rate_percent_for_date(date),
+            self._events[bisect.bisect_left(self._event_dates, date) :],
+            schedule.interest_rate_changes[bisect.bisect_right(self._change_dates, date) :],
+        )
+
+
+@dataclass
+class _Tally:
+    interest: Decimal = Decimal("0.00")
+    fees: Decimal = Decimal("0.00")
+    months: int = 0
+
+    def add(self, rows: list[Installment]) -> None:
+        for row in rows:
+            self.interest += row.payment.interest
+            self.fees += row.payment.fees
+            if row.i is not None:
+                self.months += 1
+
+
+def _group_periods(rows: Iterator[Installment]) -> Iterator[list[Installment]]:
+    # A period is any extra payments followed by its scheduled payment; a payoff by extras ends the last one early.
+    period: list[Installment] = []
+    for row in rows:
+        period.append(row)
+        if row.i is not None:
+            yield period
+            period = []
+    if period:
+        yield period
+
+
+def compare_schedules(
+    baseline: AmortizationSchedule,
+    scenario: AmortizationSchedule,
+    start_date: datetime.date,
+) -> ScheduleComparison:
+    """Generate two schedules in lockstep and keep only the periods in which they differ.
+
+    Once both engines have identical inputs ahead of them, rows are no longer collected: with equal balances the
+    remaining schedules are identical and generation stops; with different balances the paths can never meet again,
+    so the rest is only drained and the aggregate deltas come from both engines' totals.
+    """
+    baseline_timeline = _InputsTimeline(baseline)
+    scenario_timeline = _InputsTimeline(scenario)
+    baseline_periods = _group_periods(baseline.generate(start_date))
+    scenario_periods = _group_periods(scenario.generate(start_date))
+    baseline_tally = _Tally()
+    scenario_tally = _Tally()
+
+    deltas: list[PeriodDelta] = []
+    converged = False
+    period = 0
+    date = start_date
+    while True:
+        baseline_rows = next(baseline_periods, None)
+        scenario_rows = next(scenario_periods, None)
+        if baseline_rows is None or scenario_rows is None:
+            # One schedule is paid off; the other's remaining periods only count towards the totals.
+            if baseline_rows is not None:
+                baseline_tally.add(baseline_rows)
+            if scenario_rows is not None:
+                scenario_tally.add(scenario_rows)
+            break
+
+        period += 1
+        baseline_tally.add(baseline_rows)
+        scenario_tally.add(scenario_rows)
+        if baseline_rows != scenario_rows:
+            deltas.append(
+                PeriodDelta(
+                    period=period,
+                    year=date.year,
+                    month=Month(date.month),
+                    baseline=baseline_rows,
+                    scenario=scenario_rows,
+                )
+            )
+
+        date = next_month(date)
+        if baseline_timeline.signature_from(date, baseline_tally.months) != scenario_timeline.signature_from(
+            date, scenario_tally.months
+        ):
+            continue
+        converged = baseline_rows[-1].balance.after == scenario_rows[-1].balance.after
+        break
+
+    if converged:
+        # Whatever is left is the same for both, so the periods walked so far hold the whole difference.
+        return ScheduleComparison(
+            periods=deltas,
+            interest_saved=baseline_tally.interest - scenario_tally.interest,
+            fees_saved=baseline_tally.fees - scenario_tally.fees,
+            months_saved=baseline_tally.months - scenario_tally.months,
+            converged=converged,
+        )
+
+    # Drained engines have their totals, which also count the interest of a period paid off by extra payments
+    # before its scheduled payment: that interest is on no row.
+    for _ in baseline_periods:
+        pass
+    for _ in scenario_periods:
+        pass
+    baseline_totals, scenario_totals = baseline.last_totals, scenario.last_totals
+    assert baseline_totals is not None and scenario_totals is not None
+    return ScheduleComparison(
+        periods=deltas,
+        interest_saved=baseline_totals.interest - scenario_totals.interest,
+        fees_saved=baseline_totals.fees - scenario_totals.fees,
+        months_saved=baseline_totals.months - scenario_totals.months,
+        converged=converged,
+    )
@@ -0,0 +1,85 @@
+import datetime
+import math
+import os
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+from amortsched.core.amortization import AmortizationSchedule
+from amortsched.core.entities import Plan
+from amortsched.core.values import ScheduleFrame, ScheduleTotals
+
+type BatchInput = Plan | tuple[AmortizationSchedule, datetime.date]
+type BatchResult = ScheduleTotals | ScheduleFrame
+
+# Auto-tuned chunks aim for about this much work per task, enough to amortize pickling and IPC per chunk.
+TARGET_CHUNK_SECONDS = 0.25
+# Items generated in the calling process to measure the per-item cost before sizing chunks.
+PROBE_SIZE = 16
+# Keep at least this many chunks per worker so a slow chunk near the end does not leave the others idle.
+MIN_CHUNKS_PER_WORKER = 4
+
+
+def _generate_one(item: BatchInput, summary_only: bool) -> BatchResult:
+    if isinstance(item, Plan):
+        engine, start_date = item.to_schedule(), item.start_date
+    else:
+        engine, start_date = item
+    if summary_only:
+        return engine.summarize(start_date)
+    frame = ScheduleFrame.from_installments(engine.generate(start_date))
+    frame.totals = engine.last_totals
+    return frame
+
+
+def _generate_chunk(items: Sequence[BatchInput], summary_only: bool) -> list[BatchResult]:
+    return [_generate_one(item, summary_only) for item in items]
+
+
+def tune_chunk_size(seconds_per_item: float, remaining: int, workers: int) -> int:
+    balanced = math.ceil(remaining / (workers * MIN_CHUNKS_PER_WORKER))
+    if seconds_per_item <= 0:
+        return max(1, balanced)
+    return max(1, min(int(TARGET_CHUNK_SECONDS / seconds_per_item), balanced))
+
+
+def generate_many(
+    plans: Sequence[BatchInput],
+    *,
+    workers: int | None = None,
+    summary_only: bool = False,
+    chunk_size: int | None = None,
+) -> list[BatchResult]:
+    """Generate many schedules, fanning chunks of them out over a process pool.
+
+    Each input is either a `Plan` or an `(AmortizationSchedule, start_date)` pair. Results come back in input order:
+    `ScheduleTotals` with ``summary_only=True`` (no rows are built), otherwise one `ScheduleFrame` per input.
+
+    ``workers`` defaults to the CPU count; with a single worker everything runs in the calling process. Without an
+    explicit ``chunk_size``, the first few inputs are generated locally to time them and chunks are sized to take
+    about `TARGET_CHUNK_SECONDS` each.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(plans) <= 1:
+        return _generate_chunk(plans, summary_only)
+
+    results: list[BatchResult] = []
+    remaining = plans
+    if chunk_size is None:
+        probe = plans[:PROBE_SIZE]
+        started = time.perf_counter()
+        results.extend(_generate_chunk(probe, summary_only))
+        elapsed = time.perf_counter() - started
+        remaining = plans[len(probe) :]
+        chunk_size = tune_chunk_size(elapsed / len(probe), len(remaining), workers)
+    if not remaining:
+        return results
+
+    chunks = [remaining[start : start + chunk_size] for start in range(0, len(remaining), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        for chunk_results in executor.map(_generate_chunk, chunks, [summary_only] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+__all__ = ["BatchInput", "BatchResult", "generate_many", "tune_chunk_size"]
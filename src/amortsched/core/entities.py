@@ -1,7 +1,7 @@
 import datetime
 import enum
 import uuid
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
 from decimal import Decimal
 from typing import Protocol, runtime_checkable
@@ -22,11 +22,14 @@ from amortsched.core.utils import now
 from amortsched.core.values import (
     EarlyPaymentFees,
     Installment,
+    InstallmentView,
     InterestRateApplication,
     InterestRateChange,
     OneTimeExtraPayment,
+    PlanInputs,
     RecurringExtraPayment,
     ScheduleTotals,
+    ScheduleWindow,
     Term,
 )
 
@@ -58,6 +61,13 @@ class Schedule:
     def plan(self, plan: Plan | None) -> None:
         self._plan = plan
 
+    def views(self, window: ScheduleWindow | None = None) -> Iterator[InstallmentView]:
+        """Lazily yield a read-only `InstallmentView` per installment (inside `window`, if given), in schedule order."""
+        from_installment = InstallmentView.from_installment
+        installments = self.installments if window is None else window.select(self.installments)
+        for installment in installments:
+            yield from_installment(installment)
+
 
 @dataclass(kw_only=True, slots=True)
 class RefreshToken:
@@ -135,25 +145,34 @@ class Plan:
         schedule._plan = self
         self._schedules.append(schedule)
 
-    def to_schedule(self) -> AmortizationSchedule:
-        schedule = AmortizationSchedule(
+    @property
+    def revision(self) -> int:
+        """Number of updates the stored plan had when it was read."""
+        return self._revision
+
+    def to_inputs(self) -> PlanInputs:
+        """The plan's fields as a `PlanInputs` value, taken as they are.
+
+        They are validated and normalized when they are set: by the plan commands through `PlanInputs.create()`
+        and the events' own `create()`, and in storage, which keeps every event list sorted by date.
+        """
+        return PlanInputs(
             amount=self.amount,
             term=self.term,
             interest_rate=self.interest_rate,
             early_payment_fees=self.early_payment_fees,
             interest_rate_application=self.interest_rate_application,
+            one_time_extra_payments=tuple(self.one_time_extra_payments),
+            recurring_extra_payments=tuple(self.recurring_extra_payments),
+            interest_rate_changes=tuple(self.interest_rate_changes),
         )
-        for otp in self.one_time_extra_payments:
-            schedule.add_one_time_extra_payment(otp.date, otp.amount)
-        for rp in self.recurring_extra_payments:
-            schedule.add_recurring_extra_payment(rp.start_date, rp.amount, count=rp.count)
-        for rc in self.interest_rate_changes:
-            schedule.add_interest_rate_change(rc.effective_date, rc.yearly_interest_rate)
-        return schedule
 
-    def generate(self) -> Schedule:
+    def to_schedule(self) -> AmortizationSchedule:
+        return AmortizationSchedule.from_inputs(self.to_inputs())
+
+    def generate(self, window: ScheduleWindow | None = None) -> Schedule:
         schedule_engine = self.to_schedule()
-        installments = list(schedule_engine.generate(self.start_date))
+        installments = list(schedule_engine.generate(self.start_date, window=window))
         totals = schedule_engine.last_totals
         schedule = Schedule(plan_id=self.id, installments=installments, totals=totals)
         schedule.plan = self
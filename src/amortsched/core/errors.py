@@ -1,11 +1,12 @@
 import datetime
 from decimal import Decimal
-from typing import Any
+from typing import Any, ClassVar
 from uuid import UUID
 
 
 class DomainError(Exception):
-    pass
+    # Whether the changes made before the error was raised stand, rather than being rolled back with the request.
+    keeps_changes: ClassVar[bool] = False
 
 
 class NotFoundError(DomainError):
@@ -26,6 +27,20 @@ class DuplicateEmailError(DomainError):
         self.email = email
 
 
+class ConcurrentUpdateError(DomainError):
+    """Raised when updating an entity from a revision that another update has since replaced."""
+
+    def __init__(self, entity: str, entity_id: UUID, revision: int) -> None:
+        super().__init__(f"{entity} {entity_id} has changed since revision {revision}")
+        self.entity = entity
+        self.entity_id = entity_id
+        self.revision = revision
+
+
+class StaleRevisionError(ConcurrentUpdateError):
+    """Raised when the revision a caller expects an entity to be at is no longer its current one."""
+
+
 class AuthenticationError(DomainError):
     def __init__(self) -> None:
         super().__init__("Invalid email or password")
@@ -75,6 +90,12 @@ class InvalidRecurringPaymentError(AmortizationError):
         self.count = count
 
 
+class InvalidScheduleWindowError(AmortizationError):
+    def __init__(self, message: str, window: object) -> None:
+        super().__init__(message)
+        self.window = window
+
+
 class PlanAssociationError(DomainError):
     """Raised when a plan cannot be associated with a user due to user_id mismatch."""
 
@@ -186,10 +207,19 @@ class RefreshTokenNotFoundError(DomainError):
 
 
 class RefreshTokenReplayError(DomainError):
+    # The replayed token's family is revoked before raising.
+    keeps_changes = True
+
     def __init__(self) -> None:
         super().__init__("Refresh token has already been used")
 
 
+class InvalidCursorError(DomainError):
+    def __init__(self, cursor: str) -> None:
+        super().__init__(f"Invalid pagination cursor: {cursor!r}")
+        self.cursor = cursor
+
+
 class ValidationError(DomainError):
     """Raised when input data fails validation."""
 
@@ -1,5 +1,25 @@
+import base64
+import binascii
+import datetime
+import enum
+import json
+import uuid
 from collections.abc import Sequence
 from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from .errors import InvalidCursorError
+
+
+class TotalsPolicy(enum.StrEnum):
+    # Count every matching row (the default for offset pagination).
+    Exact = "exact"
+    # Do not compute a total; `has_next` comes from a look-ahead row.
+    Skip = "none"
+    # Use the query planner's row estimate: cheap, but only as accurate as the table statistics.
+    Estimate = "estimate"
+    # Reuse an exact count for the same table and filter for a short TTL.
+    Cached = "cached"
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -7,6 +27,7 @@ class PageSize:
     page: int = field(default=1)
     size: int = field(default=20)
     order_by: str | Sequence[str] | None = field(default=None)
+    totals: TotalsPolicy = field(default=TotalsPolicy.Exact)
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -14,9 +35,71 @@ class LimitOffset:
     limit: int = field(default=20)
     offset: int = field(default=0)
     order_by: str | Sequence[str] | None = field(default=None)
+    totals: TotalsPolicy = field(default=TotalsPolicy.Exact)
+
+
+@dataclass(kw_only=True, frozen=True)
+class Keyset:
+    """Seek pagination: `after` is the opaque `next_cursor` of the previous page (None for the first page).
+
+    No total is computed by default, so every page costs the same regardless of depth.
+    """
+
+    size: int = field(default=20)
+    after: str | None = field(default=None)
+    order_by: str | Sequence[str] | None = field(default=None)
+    totals: TotalsPolicy = field(default=TotalsPolicy.Skip)
+
+
+type Pagination = PageSize | LimitOffset | Keyset
 
 
-type Pagination = PageSize | LimitOffset
+_CURSOR_DECODERS = {
+    "dt": datetime.datetime.fromisoformat,
+    "d": datetime.date.fromisoformat,
+    "u": uuid.UUID,
+    "n": Decimal,
+    "i": int,
+    "s": str,
+}
+
+
+def encode_cursor(values: Sequence[object]) -> str:
+    """Encode the sort key of the last row on a page (e.g. `(created_at, id)`) as an opaque URL-safe token."""
+    raw = json.dumps([_encode_cursor_value(value) for value in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _encode_cursor_value(value: object) -> list[object]:
+    match value:
+        case datetime.datetime():
+            return ["dt", value.isoformat()]
+        case datetime.date():
+            return ["d", value.isoformat()]
+        case uuid.UUID():
+            return ["u", str(value)]
+        case Decimal():
+            return ["n", str(value)]
+        case bool():
+            raise TypeError("Boolean sort keys are not supported in cursors")
+        case int():
+            return ["i", value]
+        case str():
+            return ["s", value]
+    raise TypeError(f"Unsupported cursor value type: {type(value).__name__}")
+
+
+def decode_cursor(cursor: str) -> tuple[object, ...]:
+    """Inverse of `encode_cursor`.
+
+    Raises:
+        InvalidCursorError: If the token was not produced by `encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return tuple(_CURSOR_DECODERS[tag](value) for tag, value in json.loads(raw))
+    except (binascii.Error, UnicodeDecodeError, InvalidOperation, KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursorError(cursor) from exc
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -33,16 +116,19 @@ class LimitOffsetMeta:
 
 @dataclass(kw_only=True, frozen=True)
 class PaginatedMeta[T]:
-    total: int
+    total: int | None
     limit: int
     offset: int
 
     next: int | None = None
     previous: int | None = None
+    next_cursor: str | None = None
+    # False when `total` is an estimate, a cached count that may be stale, or absent.
+    total_exact: bool = True
 
     @property
     def has_next(self) -> bool:
-        return self.next is not None
+        return self.next is not None or self.next_cursor is not None
 
     @property
     def has_previous(self) -> bool:
@@ -77,14 +163,41 @@ class Paginated[T]:
         )
 
     @classmethod
-    def from_limit_offset(cls, items: Sequence[T], total: int, limit: int = 20, offset: int = 0) -> Paginated[T]:
+    def from_limit_offset(
+        cls,
+        items: Sequence[T],
+        total: int | None,
+        limit: int = 20,
+        offset: int = 0,
+        *,
+        total_exact: bool = True,
+        has_next: bool | None = None,
+    ) -> Paginated[T]:
+        if has_next is None:
+            has_next = total is not None and offset + limit < total
         return cls(
             items=items,
             meta=PaginatedMeta(
                 total=total,
                 limit=limit,
                 offset=offset,
-                next=offset + limit if offset + limit < total else None,
+                next=offset + limit if has_next else None,
                 previous=offset - limit if offset > 0 else None,
+                total_exact=total_exact,
             ),
         )
+
+    @classmethod
+    def from_keyset(
+        cls,
+        items: Sequence[T],
+        size: int = 20,
+        next_cursor: str | None = None,
+        total: int | None = None,
+        *,
+        total_exact: bool = False,
+    ) -> Paginated[T]:
+        return cls(
+            items=items,
+            meta=PaginatedMeta(total=total, limit=size, offset=0, next_cursor=next_cursor, total_exact=total_exact),
+        )
@@ -3,7 +3,8 @@ from collections.abc import AsyncIterator, Sequence
 from typing import TYPE_CHECKING, Protocol
 
 if TYPE_CHECKING:
-    from .entities import RefreshToken
+    from .entities import Plan, RefreshToken, Schedule
+    from .values import Installment, PlanEvent, ScheduleWindow
 
 from .pagination import Paginated, Pagination
 from .specifications import Specification
@@ -23,6 +24,8 @@ class ReadCollectionAsyncRepository[T](Protocol):
         specification: Specification[T] | None = None,
         order_by: str | Sequence[str] | None = None,
         limit: int | None = None,
+        *,
+        yield_per: int | None = None,
     ) -> AsyncIterator[T]: ...
 
     async def get_paginated(
@@ -70,14 +73,30 @@ class RefreshTokenRepository(AsyncRepository["RefreshToken"], Protocol):
     async def mark_used(self, token_id: uuid.UUID) -> None: ...
 
 
+class PlanRepository(AsyncRepository["Plan"], Protocol):
+    async def add_event(
+        self, plan_id: uuid.UUID, event: "PlanEvent", specification: "Specification[Plan] | None" = None
+    ) -> "Plan | None": ...
+
+
+class ScheduleRepository(AsyncRepository["Schedule"], Protocol):
+    async def get_window(self, schedule_id: uuid.UUID, window: "ScheduleWindow | None" = None) -> "Schedule | None": ...
+    def stream_installments(
+        self, schedule_id: uuid.UUID, window: "ScheduleWindow | None" = None, *, yield_per: int = 500
+    ) -> AsyncIterator["Installment"]: ...
+    def get_due_installments(self, year: int, month: int) -> AsyncIterator[tuple[uuid.UUID, "Installment"]]: ...
+
+
 class BulkAddAsyncRepository[T](Protocol):
-    async def bulk_add(self, items: Sequence[T]) -> Sequence[T]: ...
+    async def bulk_add(self, items: Sequence[T], *, batch_size: int | None = None) -> Sequence[T]: ...
 
 
 class BulkUpdateAsyncRepository[T](Protocol):
-    async def bulk_update(self, items: Sequence[T]) -> Sequence[T]: ...
+    async def bulk_update(self, items: Sequence[T], *, batch_size: int | None = None) -> Sequence[T]: ...
 
-    async def bulk_save(self, items: Sequence[T], conflict_on: Sequence[str] = ("id",)) -> Sequence[T]: ...
+    async def bulk_save(
+        self, items: Sequence[T], conflict_on: Sequence[str] = ("id",), *, batch_size: int | None = None
+    ) -> Sequence[T]: ...
 
 
 class BulkAsyncRepository[T](BulkAddAsyncRepository[T], BulkUpdateAsyncRepository[T], Protocol):
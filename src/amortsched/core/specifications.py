@@ -239,3 +239,29 @@ class With[T](Specification[T]):
         related entities, not in the main entity.
         """
         return True
+
+
+@dataclass(frozen=True, slots=True, init=False)
+class Fields[T](Specification[T]):
+    """Tell the repository which fields the caller reads, so it can skip fetching the others.
+
+    Only fields a repository marks as deferrable (large JSON arrays, installment blobs) are ever left out; the
+    entity is still fully constructed, with those fields empty. Entities loaded this way are for reading and must
+    not be written back.
+
+    Examples:
+        List plans without their extra payment and rate change arrays
+        `Eq("user_id", user_id) & Fields("id", "name", "amount")`
+
+        Load a plan's schedules without their installments
+        `With("schedules", Fields("id", "totals", "generated_at"))`
+    """
+
+    names: tuple[str, ...]
+
+    def __init__(self, *names: str) -> None:
+        object.__setattr__(self, "names", names)
+
+    def is_satisfied_by(self, candidate: T) -> bool:
+        """Like `With`, this only shapes what is loaded and never filters the main entity."""
+        return True
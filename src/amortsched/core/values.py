@@ -1,9 +1,17 @@
 import datetime
 import enum
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from decimal import Decimal
+from typing import Any
 
-from amortsched.core.errors import InvalidTermError
+from amortsched.core.errors import (
+    AmortizationError,
+    InvalidExtraPaymentError,
+    InvalidRecurringPaymentError,
+    InvalidScheduleWindowError,
+    InvalidTermError,
+)
 
 type Amount = int | float | Decimal
 type TermType = int | tuple[int, int] | Term
@@ -13,6 +21,18 @@ type InterestRate = float | Decimal
 DAYS_IN_YEAR = Decimal("365")
 
 
+def to_decimal(value: Amount) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(value)
+
+
+def to_term(term: TermType) -> Term:
+    if isinstance(term, int):
+        return Term(term, 0)
+    if isinstance(term, tuple):
+        return Term(*term)
+    return term
+
+
 class Month(enum.IntEnum):
     January = 1
     February = 2
@@ -28,6 +48,9 @@ class Month(enum.IntEnum):
     December = 12
 
 
+MONTH_NAMES: tuple[str, ...] = ("", *(month.name for month in Month))
+
+
 @dataclass(kw_only=True, slots=True)
 class EarlyPaymentFees:
     fixed: Amount = Decimal("0.00")
@@ -70,6 +93,13 @@ class OneTimeExtraPayment:
     date: datetime.date
     amount: Decimal
 
+    @classmethod
+    def create(cls, date: datetime.date, amount: Amount) -> OneTimeExtraPayment:
+        amount = to_decimal(amount)
+        if amount <= 0:
+            raise InvalidExtraPaymentError("Extra payment amount must be positive", date, amount)
+        return cls(date=date, amount=amount)
+
 
 @dataclass
 class RecurringExtraPayment:
@@ -77,6 +107,15 @@ class RecurringExtraPayment:
     amount: Decimal
     count: int
 
+    @classmethod
+    def create(cls, start_date: datetime.date, amount: Amount, count: int) -> RecurringExtraPayment:
+        amount = to_decimal(amount)
+        if amount <= 0:
+            raise InvalidRecurringPaymentError("Recurring payment amount must be positive", start_date, amount, count)
+        if count <= 0:
+            raise InvalidRecurringPaymentError("Recurring payment count must be positive", start_date, amount, count)
+        return cls(start_date=start_date, amount=amount, count=count)
+
 
 @dataclass
 class ScheduleTotals:
@@ -124,13 +163,13 @@ class Installment:
 
     @property
     def month_name(self) -> str:
-        return self.month.name
+        return MONTH_NAMES[self.month]
 
     def to_row(self) -> list[str]:
         installment = "" if self.i is None else str(self.i)
         return [
             installment,
-            f"{self.year}/{self.month.name}",
+            f"{self.year}/{MONTH_NAMES[self.month]}",
             self.payment.kind,
             f"{self.payment.principal:,.2f}",
             f"{self.payment.interest:,.2f}",
@@ -141,12 +180,201 @@ class Installment:
         ]
 
 
+@dataclass(frozen=True, slots=True)
+class InstallmentView:
+    """Flat, read-only projection of an `Installment` with the derived fields precomputed.
+
+    Serializers read these instead of walking `payment`/`balance` and recomputing `Payment.total` per row.
+    """
+
+    i: int | None
+    year: int
+    month: int
+    month_name: str
+    kind: PaymentKind
+    principal: Decimal
+    interest: Decimal
+    fees: Decimal
+    total: Decimal
+    balance_before: Decimal
+    balance_after: Decimal
+
+    @classmethod
+    def from_installment(cls, installment: Installment) -> InstallmentView:
+        payment = installment.payment
+        balance = installment.balance
+        month = int(installment.month)
+        return cls(
+            i=installment.i,
+            year=installment.year,
+            month=month,
+            month_name=MONTH_NAMES[month],
+            kind=payment.kind,
+            principal=payment.principal,
+            interest=payment.interest,
+            fees=payment.fees,
+            total=payment.principal + payment.interest + payment.fees,
+            balance_before=balance.before,
+            balance_after=balance.after,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleWindow:
+    """Selects part of a schedule by period number and/or calendar month, both bounds inclusive.
+
+    Extra payments belong to the period of the scheduled payment that follows them. Dates are compared at month
+    granularity against each row's own year and month, so ``from_date=2031-01-01, to_date=2031-12-31`` is "year 2031".
+    """
+
+    first_period: int | None = None
+    last_period: int | None = None
+    from_date: datetime.date | None = None
+    to_date: datetime.date | None = None
+
+    def __post_init__(self) -> None:
+        if self.first_period is not None and self.first_period < 1:
+            raise InvalidScheduleWindowError("Periods start at 1", self)
+        if self.first_period is not None and self.last_period is not None and self.first_period > self.last_period:
+            raise InvalidScheduleWindowError("First period must not be after the last period", self)
+        if self.from_date is not None and self.to_date is not None and self.from_date > self.to_date:
+            raise InvalidScheduleWindowError("Window start date must not be after its end date", self)
+
+    def contains(self, period: int, year: int, month: int) -> bool:
+        if self.first_period is not None and period < self.first_period:
+            return False
+        if self.last_period is not None and period > self.last_period:
+            return False
+        if self.from_date is not None and (year, month) < (self.from_date.year, self.from_date.month):
+            return False
+        if self.to_date is not None and (year, month) > (self.to_date.year, self.to_date.month):
+            return False
+        return True
+
+    def skips_before(self, period: int, date: datetime.date) -> bool:
+        """Whether every row generated before `period`, which started on `date`, is outside the window."""
+        if self.first_period is None and self.from_date is None:
+            return False
+        if self.first_period is not None and period > self.first_period:
+            return False
+        # Extras falling due exactly on `date` are booked in the previous period, so the month must be strictly earlier.
+        if self.from_date is not None and (date.year, date.month) >= (self.from_date.year, self.from_date.month):
+            return False
+        return True
+
+    def select(self, installments: Iterable[Installment]) -> Iterator[Installment]:
+        period = 1
+        for installment in installments:
+            if self.last_period is not None and period > self.last_period:
+                return
+            if self.contains(period, installment.year, installment.month):
+                yield installment
+            if installment.i is not None:
+                period += 1
+
+
+@dataclass(slots=True)
+class ScheduleFrame:
+    """Column-oriented schedule: one list per field, cheap to pickle and easy to hand to dataframe libraries."""
+
+    i: list[int | None]
+    year: list[int]
+    month: list[int]
+    kind: list[str]
+    principal: list[Decimal]
+    interest: list[Decimal]
+    fees: list[Decimal]
+    balance_before: list[Decimal]
+    balance_after: list[Decimal]
+    totals: ScheduleTotals | None = None
+
+    @classmethod
+    def from_installments(cls, installments: Iterable[Installment]) -> ScheduleFrame:
+        frame = cls(
+            i=[], year=[], month=[], kind=[], principal=[], interest=[], fees=[], balance_before=[], balance_after=[]
+        )
+        for installment in installments:
+            payment = installment.payment
+            frame.i.append(installment.i)
+            frame.year.append(installment.year)
+            frame.month.append(int(installment.month))
+            frame.kind.append(payment.kind.value)
+            frame.principal.append(payment.principal)
+            frame.interest.append(payment.interest)
+            frame.fees.append(payment.fees)
+            frame.balance_before.append(installment.balance.before)
+            frame.balance_after.append(installment.balance.after)
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.year)
+
+    def columns(self) -> dict[str, list[Any]]:
+        return {
+            "i": self.i,
+            "year": self.year,
+            "month": self.month,
+            "kind": self.kind,
+            "principal": self.principal,
+            "interest": self.interest,
+            "fees": self.fees,
+            "balance_before": self.balance_before,
+            "balance_after": self.balance_after,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleCheckpoint:
+    """Engine state at the start of `period`, with running totals of everything paid before it."""
+
+    period: int
+    date: datetime.date
+    balance: Decimal
+    principal: Decimal
+    interest: Decimal
+    fees: Decimal
+
+
+@dataclass
+class PeriodDelta:
+    period: int
+    year: int
+    month: Month
+    baseline: list[Installment]
+    scenario: list[Installment]
+
+
+@dataclass
+class ScheduleComparison:
+    periods: list[PeriodDelta]
+    interest_saved: Decimal
+    fees_saved: Decimal
+    months_saved: int
+    # True when both schedules reached the same state with identical inputs ahead, i.e. the tails are equal.
+    converged: bool
+
+    @property
+    def total_saved(self) -> Decimal:
+        return self.interest_saved + self.fees_saved
+
+
 @dataclass(frozen=True, slots=True)
 class InterestRateChange:
     # Annual nominal interest rate in percent (e.g. 5.25 for 5.25%), effective from this date forward.
     effective_date: datetime.date
     yearly_interest_rate: Decimal
 
+    @classmethod
+    def create(cls, effective_date: datetime.date, yearly_interest_rate: InterestRate) -> InterestRateChange:
+        rate = to_decimal(yearly_interest_rate)
+        if rate < 0:
+            raise AmortizationError("Interest rate must be non-negative")
+        return cls(effective_date=effective_date, yearly_interest_rate=rate)
+
+
+# Events a plan keeps in date order on top of its base terms.
+type PlanEvent = OneTimeExtraPayment | RecurringExtraPayment | InterestRateChange
+
 
 class InterestRateApplication(enum.StrEnum):
     # (A) Apply the single rate effective as of the scheduled date to the whole installment month.
@@ -155,3 +383,76 @@ class InterestRateApplication(enum.StrEnum):
     ProratedByDaysInMonth = "prorated_by_days_in_month"
     # (B2) If rate changes within the payment-to-payment period, prorate interest by day ranges within that period.
     ProratedByPaymentPeriod = "prorated_by_payment_period"
+
+
+@dataclass(frozen=True, slots=True)
+class PlanInputs:
+    """Validated, normalized inputs of a loan plan: Decimal amounts, a `Term` and events sorted by date.
+
+    Build it with `create()` at the boundary; `AmortizationSchedule.from_inputs()` then trusts it as-is.
+    """
+
+    amount: Decimal
+    term: Term
+    interest_rate: Decimal
+    early_payment_fees: EarlyPaymentFees
+    interest_rate_application: InterestRateApplication = InterestRateApplication.WholeMonth
+    one_time_extra_payments: tuple[OneTimeExtraPayment, ...] = ()
+    recurring_extra_payments: tuple[RecurringExtraPayment, ...] = ()
+    interest_rate_changes: tuple[InterestRateChange, ...] = ()
+
+    @classmethod
+    def create(
+        cls,
+        amount: Amount,
+        term: TermType,
+        interest_rate: InterestRate,
+        early_payment_fees: EarlyPaymentFees | None = None,
+        *,
+        interest_rate_application: InterestRateApplication = InterestRateApplication.WholeMonth,
+        one_time_extra_payments: Iterable[OneTimeExtraPayment] = (),
+        recurring_extra_payments: Iterable[RecurringExtraPayment] = (),
+        interest_rate_changes: Iterable[InterestRateChange] = (),
+    ) -> PlanInputs:
+        amount = to_decimal(amount)
+        if amount <= 0:
+            raise AmortizationError("Loan amount must be positive")
+        term = to_term(term)
+        if term.periods <= 0:
+            raise InvalidTermError("Term must span at least one month", term)
+        interest_rate = to_decimal(interest_rate)
+        if interest_rate < 0:
+            raise AmortizationError("Interest rate must be non-negative")
+        fees = early_payment_fees if early_payment_fees is not None else EarlyPaymentFees()
+        fees = EarlyPaymentFees(fixed=to_decimal(fees.fixed), percent=to_decimal(fees.percent))
+        if fees.fixed < 0 or fees.percent < 0:
+            raise AmortizationError("Early payment fees must be non-negative")
+
+        return cls(
+            amount=amount,
+            term=term,
+            interest_rate=interest_rate,
+            early_payment_fees=fees,
+            interest_rate_application=interest_rate_application,
+            one_time_extra_payments=tuple(
+                sorted(
+                    (OneTimeExtraPayment.create(p.date, p.amount) for p in one_time_extra_payments),
+                    key=lambda p: p.date,
+                )
+            ),
+            recurring_extra_payments=tuple(
+                sorted(
+                    (RecurringExtraPayment.create(p.start_date, p.amount, p.count) for p in recurring_extra_payments),
+                    key=lambda p: p.start_date,
+                )
+            ),
+            interest_rate_changes=tuple(
+                sorted(
+                    (
+                        InterestRateChange.create(c.effective_date, c.yearly_interest_rate)
+                        for c in interest_rate_changes
+                    ),
+                    key=lambda c: c.effective_date,
+                )
+            ),
+        )
@@ -0,0 +1,32 @@
+"""add revision columns
+
+Revision ID: 3f8b2d6c1e94
+Revises: 9c1d7e2a4b60
+Create Date: 2026-10-18 23:04:12.517730
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8b2d6c1e94"
+down_revision: Union[str, Sequence[str], None] = "9c1d7e2a4b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ("users", "profiles", "plans", "schedules")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in _TABLES:
+        op.add_column(table, sa.Column("revision", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(_TABLES):
+        op.drop_column(table, "revision")
@@ -0,0 +1,50 @@
+"""partial indexes on live rows
+
+Revision ID: 7a4e9b1f0c25
+Revises: 3f8b2d6c1e94
+Create Date: 2026-10-19 00:12:48.093361
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a4e9b1f0c25"
+down_revision: Union[str, Sequence[str], None] = "3f8b2d6c1e94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_plans_user_id", "plans", ["user_id"], unique=False)
+    op.drop_index("ix_plans_user_id_created_at", table_name="plans")
+    op.create_index(
+        "ix_plans_user_id_created_at",
+        "plans",
+        ["user_id", "created_at"],
+        unique=False,
+        postgresql_where=sa.text("NOT is_deleted"),
+    )
+    op.create_index("ix_schedules_plan_id", "schedules", ["plan_id"], unique=False)
+    op.drop_index("ix_schedules_plan_id_generated_at", table_name="schedules")
+    op.create_index(
+        "ix_schedules_plan_id_generated_at",
+        "schedules",
+        ["plan_id", "generated_at"],
+        unique=False,
+        postgresql_where=sa.text("NOT is_deleted"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_schedules_plan_id_generated_at", table_name="schedules")
+    op.create_index("ix_schedules_plan_id_generated_at", "schedules", ["plan_id", "generated_at"], unique=False)
+    op.drop_index("ix_schedules_plan_id", table_name="schedules")
+    op.drop_index("ix_plans_user_id_created_at", table_name="plans")
+    op.create_index("ix_plans_user_id_created_at", "plans", ["user_id", "created_at"], unique=False)
+    op.drop_index("ix_plans_user_id", table_name="plans")
@@ -0,0 +1,11 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+@pytest.fixture
+async def session(database_url):
+    engine = create_async_engine(database_url.replace("+psycopg://", "+psycopg_async://"))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
@@ -0,0 +1,68 @@
+import pytest
+import sqlalchemy
+from sqlalchemy.exc import OperationalError
+
+from amortsched.adapters.persistence.engine import create_engine, pool_status, read_session_factory
+from amortsched.adapters.persistence.tables import users
+
+
+@pytest.fixture
+def async_url(postgres):
+    return postgres.get_connection_url(driver="psycopg_async")
+
+
+@pytest.mark.anyio
+async def test_pool_status_counts_checkouts_and_overflow(async_url):
+    engine = create_engine(async_url, pool_size=1, max_overflow=1, statement_timeout=50)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            status = pool_status(engine)
+            assert (status.size, status.checked_out, status.overflow) == (1, 2, 1)
+            await first.execute(sqlalchemy.text("SELECT 1"))
+            with pytest.raises(OperationalError, match="statement timeout"):
+                await second.execute(sqlalchemy.text("SELECT pg_sleep(1)"))
+        await engine.dispose()
+        status = pool_status(engine)
+        assert (status.checked_out, status.checkouts, status.timeouts) == (0, 2, 0)
+        assert status.max_wait_seconds <= status.wait_seconds
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_transaction_pooler_mode_sets_timeout_per_transaction(async_url):
+    engine = create_engine(async_url, statement_timeout=1234, transaction_pooler=True)
+    try:
+        async with engine.begin() as connection:
+            timeout = (await connection.execute(sqlalchemy.text("SHOW statement_timeout"))).scalar_one()
+        assert timeout == "1234ms"
+        assert pool_status(engine) is None
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_transaction_pooler_mode_times_out_reads(async_url):
+    engine = create_engine(async_url, statement_timeout=50, transaction_pooler=True)
+    try:
+        async with read_session_factory(engine)() as session:
+            with pytest.raises(OperationalError, match="statement timeout"):
+                await session.execute(sqlalchemy.text("SELECT pg_sleep(1)"))
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_read_sessions_autocommit_and_reject_writes(async_url):
+    engine = create_engine(async_url)
+    try:
+        async with read_session_factory(engine)() as session:
+            await session.execute(sqlalchemy.text("SELECT pg_sleep(0.01)"))
+            # Outside a transaction each statement starts its own, so now() is the statement's own timestamp.
+            in_transaction = await session.scalar(sqlalchemy.text("SELECT now() < statement_timestamp()"))
+            assert in_transaction is False
+            with pytest.raises(RuntimeError, match="read-only"):
+                await session.execute(sqlalchemy.delete(users))
+        assert pool_status(engine).checked_out == 0
+    finally:
+        await engine.dispose()
@@ -1,6 +1,7 @@
 import sqlalchemy
 
-from amortsched.adapters.persistence.helpers import build_postgres_upsert_statement
+from amortsched.adapters.persistence import helpers
+from amortsched.adapters.persistence.helpers import TotalsCache, build_postgres_upsert_statement
 
 metadata = sqlalchemy.MetaData()
 
@@ -50,3 +51,20 @@ def test_conflict_columns_excluded_from_update_set():
     set_clause = sql.split("SET", 1)[-1]
     assert "name" in set_clause
     assert "value" in set_clause
+
+
+def test_totals_cache_evicts_least_recently_used_and_sweeps_expired(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(helpers.time, "monotonic", lambda: clock[0])
+    cache = TotalsCache(ttl=10.0, maxsize=2)
+    cache.set(("plans", "a"), 1)
+    cache.set(("plans", "b"), 2)
+    assert cache.get(("plans", "a")) == 1
+    cache.set(("plans", "c"), 3)
+    assert cache.get(("plans", "b")) is None
+    assert (cache.get(("plans", "a")), cache.get(("plans", "c"))) == (1, 3)
+
+    clock[0] += 10.0
+    cache.set(("plans", "d"), 4)
+    assert len(cache) == 1
+    assert cache.get(("plans", "d")) == 4
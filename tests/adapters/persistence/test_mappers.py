@@ -0,0 +1,104 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from amortsched.adapters.persistence.mappers import (
+    PLAN_ROW,
+    pack_installments,
+    plan_from_row,
+    plan_to_values,
+    unpack_installments,
+)
+from amortsched.core.amortization import AmortizationSchedule
+from amortsched.core.entities import Plan
+from amortsched.core.values import OneTimeExtraPayment, Term
+
+
+def _installments():
+    schedule = AmortizationSchedule(amount=250_000, term=Term(25), interest_rate=Decimal("4.1"))
+    schedule.add_recurring_extra_payment(datetime.date(2026, 1, 10), 300, count=24)
+    return list(schedule.generate(datetime.date(2025, 1, 1)))
+
+
+def test_packed_installments_round_trip_to_cents():
+    installments = _installments()
+    cents = Decimal("0.01")
+
+    for compress in (True, False):
+        decoded = unpack_installments(pack_installments(installments, compress=compress))
+        assert len(decoded) == len(installments)
+        for original, restored in zip(installments, decoded, strict=True):
+            assert (restored.i, restored.year, restored.month) == (original.i, original.year, original.month)
+            assert restored.payment.kind is original.payment.kind
+            assert restored.payment.principal == original.payment.principal.quantize(cents)
+            assert restored.payment.interest == original.payment.interest.quantize(cents)
+            assert restored.balance.after == original.balance.after.quantize(cents)
+        # Values already at cents, like everything read back from storage, round-trip losslessly.
+        assert unpack_installments(pack_installments(decoded, compress=compress)) == decoded
+
+
+def test_packed_installments_are_compact():
+    installments = _installments()
+    legacy = json.dumps(
+        [
+            {
+                "i": item.i,
+                "year": item.year,
+                "month": int(item.month),
+                "payment": {
+                    "kind": item.payment.kind.value,
+                    "principal": str(item.payment.principal),
+                    "interest": str(item.payment.interest),
+                    "fees": str(item.payment.fees),
+                },
+                "balance": {"before": str(item.balance.before), "after": str(item.balance.after)},
+            }
+            for item in installments
+        ]
+    ).encode()
+
+    assert len(pack_installments(installments, compress=False)) < 50 * len(installments)
+    assert len(pack_installments(installments)) * 10 < len(legacy)
+
+
+def _plan_values() -> dict[str, object]:
+    plan = Plan(
+        user_id=uuid.uuid4(),
+        name="Mapped",
+        slug="mapped",
+        amount=Decimal("1000.00"),
+        term=Term(2, 6),
+        interest_rate=Decimal("4.5"),
+        start_date=datetime.date(2025, 1, 1),
+        one_time_extra_payments=[OneTimeExtraPayment(datetime.date(2025, 6, 1), Decimal("100"))],
+    )
+    plan._revision = 3
+    return plan_to_values(plan)
+
+
+def test_positional_reader_matches_keyed_mapping():
+    values = _plan_values()
+    columns = ["ignored", *reversed(values)]
+    row = (None, *reversed(values.values()))
+
+    plan = PLAN_ROW.positional(columns)(row)
+
+    assert plan == plan_from_row(values)
+    assert plan.revision == 3
+    assert plan.term == Term(2, 6)
+
+
+def test_positional_reader_prefixes_and_defaults():
+    values = _plan_values()
+    del values["one_time_extra_payments"]
+    columns = [f"plan__{name}" for name in values]
+
+    plan = PLAN_ROW.positional(columns, {"one_time_extra_payments": []}, prefix="plan__")(list(values.values()))
+
+    assert plan.id == values["id"]
+    assert plan.one_time_extra_payments == []
+    with pytest.raises(KeyError, match="one_time_extra_payments"):
+        PLAN_ROW.positional(columns, prefix="plan__")
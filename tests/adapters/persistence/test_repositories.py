@@ -0,0 +1,550 @@
+import dataclasses
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+
+from amortsched.adapters.persistence.engine import read_session_factory
+from amortsched.adapters.persistence.loader import copy_plans, copy_schedules
+from amortsched.adapters.persistence.repositories import (
+    AsyncSqlAlchemyPackedScheduleRepository,
+    AsyncSqlAlchemyPlanRepository,
+    AsyncSqlAlchemyProfileRepository,
+    AsyncSqlAlchemyScheduleRepository,
+    AsyncSqlAlchemyUserRepository,
+)
+from amortsched.adapters.persistence.tables import schedule_installments, schedules
+from amortsched.core.entities import Plan, Profile, User
+from amortsched.core.errors import (
+    ConcurrentUpdateError,
+    DuplicateEmailError,
+    InvalidCursorError,
+    PlanNotFoundError,
+    UnboundScheduleError,
+)
+from amortsched.core.pagination import Keyset, LimitOffset, TotalsPolicy
+from amortsched.core.specifications import Eq, Fields, Id, In, IsDeleted, IsNone, StartsWith, With
+from amortsched.core.values import OneTimeExtraPayment, ScheduleWindow, Term
+
+
+async def _add_user_with_plans(session, count: int) -> User:
+    user = User(email="stream@example.com", name="Stream")
+    await AsyncSqlAlchemyUserRepository(session).add(user)
+    plan_repo = AsyncSqlAlchemyPlanRepository(session)
+    for i in range(count):
+        await plan_repo.add(
+            Plan(
+                user_id=user.id,
+                name=f"Plan {i}",
+                slug=f"plan-{i}",
+                amount=Decimal("10000"),
+                term=Term(1),
+                interest_rate=Decimal("5"),
+                start_date=datetime.date(2025, 1, 1),
+                created_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC) + datetime.timedelta(minutes=i),
+            )
+        )
+    return user
+
+
+@pytest.mark.anyio
+async def test_get_items_streams_in_chunks(session):
+    user = await _add_user_with_plans(session, 7)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    spec = Eq("user_id", user.id) & With("user")
+
+    buffered = [plan async for plan in repo.get_items(spec)]
+    streamed = [plan async for plan in repo.get_items(spec, yield_per=3)]
+
+    assert [plan.name for plan in streamed] == [f"Plan {i}" for i in range(7)]
+    assert [plan.id for plan in streamed] == [plan.id for plan in buffered]
+    assert all(plan.user.id == user.id for plan in streamed)
+
+
+@pytest.mark.anyio
+async def test_get_items_stream_can_stop_early(session):
+    user = await _add_user_with_plans(session, 5)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+
+    async for plan in repo.get_items(Eq("user_id", user.id), yield_per=2):
+        assert plan.name == "Plan 0"
+        break
+
+    assert await repo.count(Eq("user_id", user.id)) == 5
+
+
+@pytest.mark.anyio
+async def test_get_paginated_keyset_walks_all_pages(session):
+    user = await _add_user_with_plans(session, 5)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    spec = Eq("user_id", user.id)
+
+    first = await repo.get_paginated(spec, Keyset(size=2, totals=TotalsPolicy.Exact))
+    assert [plan.name for plan in first.items] == ["Plan 0", "Plan 1"]
+    assert first.meta.total == 5
+    assert first.meta.total_exact
+    assert first.meta.has_next
+
+    names = [plan.name for plan in first.items]
+    cursor = first.meta.next_cursor
+    while cursor is not None:
+        page = await repo.get_paginated(spec, Keyset(size=2, after=cursor))
+        assert page.meta.total is None
+        names.extend(plan.name for plan in page.items)
+        cursor = page.meta.next_cursor
+
+    assert names == [f"Plan {i}" for i in range(5)]
+
+
+@pytest.mark.anyio
+async def test_get_paginated_keyset_rejects_bad_cursor(session):
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    with pytest.raises(InvalidCursorError):
+        await repo.get_paginated(None, Keyset(after="not-a-cursor"))
+
+
+@pytest.mark.anyio
+async def test_get_paginated_totals_policies(session):
+    user = await _add_user_with_plans(session, 5)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    spec = Eq("user_id", user.id)
+
+    skipped = await repo.get_paginated(spec, LimitOffset(limit=2, offset=2, totals=TotalsPolicy.Skip))
+    assert [plan.name for plan in skipped.items] == ["Plan 2", "Plan 3"]
+    assert skipped.meta.total is None
+    assert not skipped.meta.total_exact
+    assert skipped.meta.next == 4
+
+    last = await repo.get_paginated(spec, LimitOffset(limit=2, offset=4, totals=TotalsPolicy.Skip))
+    assert [plan.name for plan in last.items] == ["Plan 4"]
+    assert not last.meta.has_next
+
+    estimated = await repo.get_paginated(spec, LimitOffset(limit=2, totals=TotalsPolicy.Estimate))
+    assert estimated.meta.total is not None
+    assert not estimated.meta.total_exact
+
+    repo._totals_cache.clear()
+    fresh = await repo.get_paginated(spec, LimitOffset(limit=2, totals=TotalsPolicy.Cached))
+    assert (fresh.meta.total, fresh.meta.total_exact) == (5, True)
+    cached = await repo.get_paginated(spec, LimitOffset(limit=2, totals=TotalsPolicy.Cached))
+    assert (cached.meta.total, cached.meta.total_exact) == (5, False)
+
+
+@pytest.mark.anyio
+async def test_bulk_add_update_and_save(session):
+    user = await _add_user_with_plans(session, 0)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    plans = [
+        Plan(
+            user_id=user.id,
+            name=f"Bulk {i}",
+            slug=f"bulk-{i}",
+            amount=Decimal("1000"),
+            term=Term(1),
+            interest_rate=Decimal("3"),
+            start_date=datetime.date(2025, 1, 1),
+        )
+        for i in range(5)
+    ]
+
+    await repo.bulk_add(plans, batch_size=2)
+    assert await repo.count(Eq("user_id", user.id)) == 5
+
+    for plan in plans:
+        plan.amount = Decimal("2000")
+    await repo.bulk_update(plans, batch_size=3)
+    assert {plan.amount async for plan in repo.get_items(Eq("user_id", user.id))} == {Decimal("2000")}
+
+    plans[0].name = "Renamed"
+    extra = Plan(
+        user_id=user.id,
+        name="Upserted",
+        slug="upserted",
+        amount=Decimal("500"),
+        term=Term(1),
+        interest_rate=Decimal("3"),
+        start_date=datetime.date(2025, 1, 1),
+    )
+    await repo.bulk_save([plans[0], extra])
+    names = {plan.name async for plan in repo.get_items(Eq("user_id", user.id))}
+    assert {"Renamed", "Upserted"} <= names
+    assert await repo.count(Eq("user_id", user.id)) == 6
+
+    with pytest.raises(PlanNotFoundError):
+        await repo.bulk_update([dataclasses.replace(extra, id=uuid.uuid4())])
+
+
+@pytest.mark.anyio
+async def test_updates_apply_only_to_the_revision_they_were_read_at(session):
+    user = await _add_user_with_plans(session, 1)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    first = await repo.get_one(Eq("user_id", user.id))
+    second = await repo.get_one(Eq("user_id", user.id))
+
+    first.name = "First"
+    await repo.update(first)
+    assert first.revision == 1
+    second.name = "Second"
+    with pytest.raises(ConcurrentUpdateError):
+        await repo.update(second)
+    with pytest.raises(ConcurrentUpdateError):
+        await repo.bulk_update([second])
+
+    stored = await repo.get_one(Eq("user_id", user.id))
+    assert (stored.name, stored.revision) == ("First", 1)
+    await repo.bulk_update([first])
+    await repo.save(first)
+    assert first.revision == 3
+    assert (await repo.get_one(Eq("user_id", user.id))).revision == 3
+
+
+@pytest.mark.anyio
+async def test_bulk_add_users_maps_duplicate_email(session):
+    repo = AsyncSqlAlchemyUserRepository(session)
+    with pytest.raises(DuplicateEmailError):
+        await repo.bulk_add([User(email="same@example.com", name="A"), User(email="same@example.com", name="B")])
+
+
+@pytest.mark.anyio
+async def test_copy_plans_and_schedules(session):
+    user = await _add_user_with_plans(session, 0)
+    plan_repo = AsyncSqlAlchemyPlanRepository(session)
+
+    def generate_plans():
+        for i in range(3):
+            yield Plan(
+                user_id=user.id,
+                name=f"Copied {i}",
+                slug=f"copied-{i}",
+                amount=Decimal("12000.50"),
+                term=Term(1, 6),
+                interest_rate=Decimal("4.25"),
+                start_date=datetime.date(2025, 1, 1),
+            )
+
+    copied = list(generate_plans())
+    assert await copy_plans(session, iter(copied)) == 3
+    loaded = [plan async for plan in plan_repo.get_items(Eq("user_id", user.id))]
+    assert sorted(plan.name for plan in loaded) == ["Copied 0", "Copied 1", "Copied 2"]
+    assert all(plan.amount == Decimal("12000.50") and plan.term == Term(1, 6) for plan in loaded)
+
+    copied[0].name = "Merged"
+    assert await copy_plans(session, copied[:1], conflict_on=("id",)) == 1
+    assert (await plan_repo.get_by_id(copied[0].id)).name == "Merged"
+    assert await plan_repo.count(Eq("user_id", user.id)) == 3
+
+    schedule = copied[1].generate()
+    assert await copy_schedules(session, [schedule]) == 1
+    stored = await AsyncSqlAlchemyScheduleRepository(session).get_by_id(schedule.id)
+    assert stored.installments == schedule.installments
+    assert stored.totals == schedule.totals
+
+
+async def _add_saved_schedule(session):
+    user = await _add_user_with_plans(session, 1)
+    plan = await AsyncSqlAlchemyPlanRepository(session).get_one(Eq("user_id", user.id))
+    plan.one_time_extra_payments.append(OneTimeExtraPayment(date=datetime.date(2025, 3, 15), amount=Decimal("500")))
+    schedule = plan.generate()
+    await AsyncSqlAlchemyScheduleRepository(session).add(schedule)
+    return schedule
+
+
+@pytest.mark.anyio
+async def test_deletes_are_soft_and_purged_in_batches(session):
+    schedule = await _add_saved_schedule(session)
+    plan_repo = AsyncSqlAlchemyPlanRepository(session)
+    schedule_repo = AsyncSqlAlchemyScheduleRepository(session)
+    await plan_repo.add(dataclasses.replace(await plan_repo.get_by_id(schedule.plan_id), id=uuid.uuid7()))
+
+    assert await plan_repo.delete(Eq("user_id", (await plan_repo.get_by_id(schedule.plan_id)).user_id)) == 2
+    assert await plan_repo.get_by_id(schedule.plan_id) is None
+    assert await plan_repo.count(IsDeleted()) == 2
+    orphan = await schedule_repo.get_by_id(schedule.id, With("plan"))
+    with pytest.raises(UnboundScheduleError):
+        _ = orphan.plan
+
+    # The plan with a schedule left waits for the schedule to be purged first.
+    assert await plan_repo.purge(IsDeleted()) == 1
+    assert await schedule_repo.purge(Id(schedule.id)) == 0
+    assert await schedule_repo.delete(Id(schedule.id)) == 1
+    assert await schedule_repo.get_window(schedule.id) is None
+    assert await schedule_repo.purge(Id(schedule.id), limit=1) == 1
+    assert await plan_repo.purge(IsDeleted(), limit=5) == 1
+    assert await plan_repo.count(IsDeleted()) == 0
+
+
+@pytest.mark.anyio
+async def test_schedule_installments_windowed_and_streamed(session):
+    schedule = await _add_saved_schedule(session)
+    repo = AsyncSqlAlchemyScheduleRepository(session)
+
+    stored = await repo.get_by_id(schedule.id)
+    assert stored.installments == schedule.installments
+
+    for window in (
+        ScheduleWindow(first_period=3, last_period=5),
+        ScheduleWindow(from_date=datetime.date(2025, 3, 1), to_date=datetime.date(2025, 4, 30)),
+    ):
+        windowed = await repo.get_window(schedule.id, window)
+        assert windowed.installments == list(window.select(schedule.installments))
+        streamed = [item async for item in repo.stream_installments(schedule.id, window, yield_per=2)]
+        assert streamed == windowed.installments
+
+    due = [item async for item in repo.get_due_installments(2025, 3)]
+    assert {schedule_id for schedule_id, _ in due} == {schedule.id}
+    assert [item for _, item in due] == [i for i in schedule.installments if (i.year, i.month) == (2025, 3)]
+
+
+@pytest.mark.anyio
+async def test_streams_through_an_autocommit_read_session(session):
+    schedule = await _add_saved_schedule(session)
+    await session.commit()
+
+    async with read_session_factory(session.bind)() as read_session:
+        plans = [plan async for plan in AsyncSqlAlchemyPlanRepository(read_session).get_items(yield_per=1)]
+        assert [plan.id for plan in plans] == [schedule.plan_id]
+        repo = AsyncSqlAlchemyScheduleRepository(read_session)
+        streamed = [item async for item in repo.stream_installments(schedule.id, yield_per=2)]
+        assert streamed == schedule.installments
+        due = [item async for _, item in repo.get_due_installments(2025, 3)]
+        assert due == [i for i in schedule.installments if (i.year, i.month) == (2025, 3)]
+        # Each stream ended its own transaction; the session is back to autocommit.
+        assert await read_session.scalar(text("SELECT now() < statement_timestamp()")) is False
+
+
+@pytest.mark.anyio
+async def test_migrate_legacy_installments(session):
+    schedule = await _add_saved_schedule(session)
+    repo = AsyncSqlAlchemyScheduleRepository(session)
+    legacy = [
+        {
+            "i": item.i,
+            "year": item.year,
+            "month": int(item.month),
+            "payment": {
+                "kind": item.payment.kind.value,
+                "principal": str(item.payment.principal),
+                "interest": str(item.payment.interest),
+                "fees": str(item.payment.fees),
+            },
+            "balance": {"before": str(item.balance.before), "after": str(item.balance.after)},
+        }
+        for item in schedule.installments
+    ]
+    await session.execute(schedule_installments.delete())
+    await session.execute(schedules.update().where(schedules.c.id == schedule.id).values(installments=legacy))
+
+    assert (await repo.get_by_id(schedule.id)).installments == schedule.installments
+    assert await repo.migrate_legacy_installments() == 1
+    assert await repo.migrate_legacy_installments() == 0
+    assert (await repo.get_by_id(schedule.id)).installments == schedule.installments
+    window = ScheduleWindow(first_period=2, last_period=2)
+    assert (await repo.get_window(schedule.id, window)).installments == list(window.select(schedule.installments))
+
+
+@pytest.mark.anyio
+async def test_packed_schedule_repository(session):
+    user = await _add_user_with_plans(session, 1)
+    plan = await AsyncSqlAlchemyPlanRepository(session).get_one(Eq("user_id", user.id))
+    schedule = plan.generate()
+    repo = AsyncSqlAlchemyPackedScheduleRepository(session)
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        await repo.add(schedule)
+        await repo.update(schedule)
+        await repo.save(schedule)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert not any("schedule_installments" in statement for statement in statements)
+    rows = (await session.execute(schedule_installments.select())).all()
+    assert rows == []
+    stored = await AsyncSqlAlchemyScheduleRepository(session).get_by_id(schedule.id)
+    cents = Decimal("0.01")
+    assert [item.balance.after for item in stored.installments] == [
+        item.balance.after.quantize(cents) for item in schedule.installments
+    ]
+    window = ScheduleWindow(first_period=2, last_period=3)
+    assert len((await repo.get_window(schedule.id, window)).installments) == 2
+
+
+@pytest.mark.anyio
+async def test_relations_load_in_one_query_per_to_many(session):
+    user = await _add_user_with_plans(session, 3)
+    other = User(email="bare@example.com", name="Bare")
+    await AsyncSqlAlchemyUserRepository(session).add(other)
+    await AsyncSqlAlchemyProfileRepository(session).add(Profile(user_id=user.id, display_name="Streamer"))
+    repo = AsyncSqlAlchemyUserRepository(session)
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        loaded = [item async for item in repo.get_items(With("profile") & With("plans"))]
+        page = await repo.get_paginated(With("profile"), LimitOffset(limit=10, offset=0))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 3
+    by_email = {item.email: item for item in loaded}
+    assert by_email["stream@example.com"].profile.display_name == "Streamer"
+    assert by_email["stream@example.com"].profile.user is by_email["stream@example.com"]
+    assert [plan.name for plan in by_email["stream@example.com"].plans] == ["Plan 0", "Plan 1", "Plan 2"]
+    assert by_email["bare@example.com"].profile is None
+    assert by_email["bare@example.com"].plans == []
+    assert [item.profile is not None for item in page.items] == [True, False]
+
+
+@pytest.mark.anyio
+async def test_joined_relation_specification_filters_the_relation_only(session):
+    user = await _add_user_with_plans(session, 2)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+
+    plans = [plan async for plan in repo.get_items(Eq("user_id", user.id) & With("user", IsNone("email")))]
+    keyset = await repo.get_paginated(With("user"), Keyset(size=1))
+
+    assert [plan.name for plan in plans] == ["Plan 0", "Plan 1"]
+    assert all(plan._user is None for plan in plans)
+    assert keyset.items[0].user.id == user.id
+
+
+@pytest.mark.anyio
+async def test_nested_relations_load_one_query_per_level(session):
+    user = await _add_user_with_plans(session, 2)
+    plan_repo = AsyncSqlAlchemyPlanRepository(session)
+    plans = [plan async for plan in plan_repo.get_items(Eq("user_id", user.id))]
+    schedule_repo = AsyncSqlAlchemyScheduleRepository(session)
+    for plan in plans:
+        await schedule_repo.add(plan.generate())
+    repo = AsyncSqlAlchemyUserRepository(session)
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        loaded = await repo.get_one(Eq("id", user.id) & With("plans", Eq("name", "Plan 1") & With("schedules")))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # users, plans, schedules, schedule installments
+    assert len(statements) == 4
+    assert [plan.name for plan in loaded.plans] == ["Plan 1"]
+    (schedule,) = loaded.plans[0].schedules
+    assert schedule.plan is loaded.plans[0]
+    assert loaded.plans[0].user is loaded
+    assert len(schedule.installments) == 12
+
+    with pytest.raises(ValueError, match="Unknown relationship 'payments'"):
+        await repo.get_one(Eq("id", user.id) & With("plans", With("payments")))
+
+
+@pytest.mark.anyio
+async def test_fields_projection_skips_deferrable_columns(session):
+    user = await _add_user_with_plans(session, 1)
+    plan_repo = AsyncSqlAlchemyPlanRepository(session)
+    plan = await plan_repo.get_one(Eq("user_id", user.id))
+    plan.one_time_extra_payments = [OneTimeExtraPayment(date=datetime.date(2025, 6, 1), amount=Decimal("100"))]
+    await plan_repo.update(plan)
+    await AsyncSqlAlchemyScheduleRepository(session).add(plan.generate())
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        projected = await plan_repo.get_one(Eq("user_id", user.id) & Fields("id", "name"))
+        with_schedules = await plan_repo.get_one(Eq("id", plan.id) & With("schedules", Fields("id", "totals")))
+        paged = await plan_repo.get_paginated(Fields("id"), Keyset(size=5))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert projected.name == "Plan 0"
+    assert projected.one_time_extra_payments == []
+    assert [item.one_time_extra_payments for item in paged.items] == [[]]
+    (schedule,) = with_schedules.schedules
+    assert schedule.totals is not None
+    assert schedule.installments == []
+    assert "one_time_extra_payments" not in statements[0]
+    assert "installments" not in statements[2]
+    # plans, schedules, keyset page; no installments query for the projected schedules
+    assert len(statements) == 4
+    assert (await plan_repo.get_by_id(plan.id)).one_time_extra_payments == plan.one_time_extra_payments
+
+
+@pytest.mark.anyio
+async def test_specifications_differing_in_values_share_cached_statements(session):
+    user = await _add_user_with_plans(session, 3)
+    await AsyncSqlAlchemyPlanRepository(session).add(
+        Plan(
+            user_id=user.id,
+            name="100%_off",
+            slug="discount",
+            amount=Decimal("10000"),
+            term=Term(1),
+            interest_rate=Decimal("5"),
+            start_date=datetime.date(2025, 1, 1),
+        )
+    )
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    cache = AsyncSqlAlchemyPlanRepository._statement_cache
+    cache.clear()
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        first = await repo.get_one(Eq("slug", "plan-0"))
+        cached = len(cache)
+        second = await repo.get_one(Eq("slug", "plan-2"))
+        reused = len(cache) == cached
+        two = await repo.count(In("slug", ["plan-0", "plan-1"]))
+        three = await repo.count(In("slug", ["plan-0", "plan-1", "plan-2"]))
+        escaped = [plan.slug async for plan in repo.get_items(StartsWith("name", "100%_"))]
+        unescaped = await repo.count(StartsWith("name", "100%x"))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert (first.name, second.name) == ("Plan 0", "Plan 2")
+    assert reused
+    assert statements[0] == statements[1]
+    assert (two, three) == (2, 3)
+    assert statements[2] == statements[3]
+    assert escaped == ["discount"]
+    assert unescaped == 0
+
+
+@pytest.mark.anyio
+async def test_add_event_appends_in_date_order_in_one_statement(session):
+    user = await _add_user_with_plans(session, 1)
+    repo = AsyncSqlAlchemyPlanRepository(session)
+    plan = await repo.get_one(Eq("user_id", user.id))
+    june = OneTimeExtraPayment(date=datetime.date(2025, 6, 1), amount=Decimal("100"))
+    march = OneTimeExtraPayment(date=datetime.date(2025, 3, 1), amount=Decimal("50"))
+    june_again = OneTimeExtraPayment(date=datetime.date(2025, 6, 1), amount=Decimal("25"))
+
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for payment in (june, march, june_again):
+            updated = await repo.add_event(plan.id, payment, Eq("user_id", user.id))
+        not_owned = await repo.add_event(plan.id, march, Eq("user_id", uuid.uuid4()))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 4
+    assert all(statement.startswith("UPDATE plans SET one_time_extra_payments=") for statement in statements)
+    assert updated.one_time_extra_payments == [march, june, june_again]
+    assert updated.updated_at > plan.updated_at
+    assert not_owned is None
+    assert (await repo.get_by_id(plan.id)).one_time_extra_payments == [march, june, june_again]
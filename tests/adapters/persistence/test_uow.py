@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from amortsched.adapters.persistence.repositories import AsyncSqlAlchemyRefreshTokenRepository
+from amortsched.adapters.persistence.uow import AsyncSqlAlchemyUnitOfWork
+from amortsched.core.entities import User
+
+
+@pytest.fixture
+async def session_factory(database_url):
+    engine = create_async_engine(database_url.replace("+psycopg://", "+psycopg_async://"))
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_repositories_are_created_on_first_use(session_factory):
+    async with AsyncSqlAlchemyUnitOfWork(session_factory) as uow:
+        assert uow._repositories == {}
+        assert uow.users is uow.users
+        assert isinstance(uow.refresh_tokens, AsyncSqlAlchemyRefreshTokenRepository)
+        assert set(uow._repositories) == {"users", "refresh_tokens"}
+        await uow.users.add(User(email="uow@example.com", name="Uow"))
+        await uow.commit()
+
+    with pytest.raises(RuntimeError, match="before begin"):
+        await uow.users.count()
+
+    async with AsyncSqlAlchemyUnitOfWork(session_factory) as uow:
+        assert await uow.users.count() == 1
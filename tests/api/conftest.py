@@ -1,26 +1,13 @@
 import httpx
 import pytest
-from sqlalchemy import create_engine as create_sync_engine
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 
-from amortsched.adapters.persistence.tables import metadata
-from amortsched.api.app import create_app
+from amortsched.api.app import configure_sessions, create_app
 from amortsched.api.config import get_settings
 
 
 @pytest.fixture
-def database_url(postgres):
-    url = postgres.get_connection_url(driver="psycopg")
-    engine = create_sync_engine(url)
-    metadata.drop_all(engine, checkfirst=True)
-    metadata.create_all(engine)
-    yield url
-    metadata.drop_all(engine, checkfirst=True)
-    engine.dispose()
-
-
-@pytest.fixture
-async def client(database_url, monkeypatch):
+async def app(database_url, monkeypatch):
     monkeypatch.setenv("DATABASE__DSN", database_url)
     monkeypatch.setenv("SECURITY__SECRET_KEY", "test-secret-key")
     get_settings.cache_clear()
@@ -28,19 +15,22 @@ async def client(database_url, monkeypatch):
     async_url = database_url.replace("+psycopg://", "+psycopg_async://")
 
     engine = create_async_engine(async_url)
-    session_factory = async_sessionmaker(engine, expire_on_commit=False)
 
     app = create_app()
-    app.state.async_session_factory = session_factory
+    configure_sessions(app, engine)
+    yield app
+
+    await engine.dispose()
 
+
+@pytest.fixture
+async def client(app):
     async with httpx.AsyncClient(
         transport=httpx.ASGITransport(app=app),
         base_url="http://testserver",
     ) as c:
         yield c
 
-    await engine.dispose()
-
 
 async def _register_and_get_token(client: httpx.AsyncClient, email: str = "test@example.com") -> str:
     resp = await client.post(
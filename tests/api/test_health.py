@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from amortsched.api.app import configure_sessions
+
+
+@pytest.mark.anyio
+async def test_health_reports_pool_status(client):
+    resp = await client.get("/api/health")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "ok"
+    assert data["pool"]["checked_out"] == 0
+    assert data["pool"]["size"] == 5
+
+
+@pytest.mark.anyio
+async def test_health_reports_primary_and_each_replica(app, client, database_url):
+    replica = create_async_engine(database_url.replace("+psycopg://", "+psycopg_async://"), pool_size=3)
+    configure_sessions(app, app.state.engine, [replica])
+    try:
+        for _ in range(2):
+            data = (await client.get("/api/health")).json()
+            assert data["pool"]["size"] == 5
+            assert data["pool"]["checked_out"] == 0
+            assert list(data["replicas"]) == ["replica-1"]
+            assert data["replicas"]["replica-1"]["size"] == 3
+    finally:
+        await replica.dispose()
@@ -1,5 +1,10 @@
+import uuid
+
 import pytest
 
+from amortsched.api.errors import domain_error_to_problem
+from amortsched.core.errors import ConcurrentUpdateError, StaleRevisionError
+
 
 @pytest.mark.anyio
 async def test_create_plan(client, auth_headers):
@@ -55,3 +60,79 @@ async def test_delete_plan(client, auth_headers):
     plan_id = create_resp.json()["id"]
     resp = await client.delete(f"/api/plans/{plan_id}", headers=auth_headers)
     assert resp.status_code == 204
+    resp = await client.get(f"/api/plans/{plan_id}", headers=auth_headers)
+    assert resp.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_list_plans_sparse_fields(client, auth_headers):
+    create_resp = await client.post(
+        "/api/plans",
+        json={"name": "Sparse Plan", "amount": "100000", "interest_rate": "4.0", "term": {"years": 15}},
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+    await client.post(
+        f"/api/plans/{plan_id}/extra-payments",
+        json={"date": "2027-01-01", "amount": "1000"},
+        headers=auth_headers,
+    )
+
+    resp = await client.get("/api/plans", params={"fields": "id,name"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert {"id": plan_id, "name": "Sparse Plan"} in resp.json()
+
+    resp = await client.get("/api/plans", params={"fields": "id,bogus"}, headers=auth_headers)
+    assert resp.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_add_extra_payment_checks_ownership(client, auth_headers, register_user):
+    create_resp = await client.post(
+        "/api/plans",
+        json={"name": "Owned Plan", "amount": "100000", "interest_rate": "4.0", "term": {"years": 15}},
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+    other_headers = {"Authorization": f"Bearer {await register_user(client, 'other@example.com')}"}
+    payment = {"date": "2027-01-01", "amount": "1000"}
+
+    resp = await client.post(f"/api/plans/{plan_id}/extra-payments", json=payment, headers=other_headers)
+    assert resp.status_code == 403
+    resp = await client.post(f"/api/plans/{uuid.uuid4()}/extra-payments", json=payment, headers=auth_headers)
+    assert resp.status_code == 404
+    resp = await client.post(f"/api/plans/{plan_id}/extra-payments", json=payment, headers=auth_headers)
+    assert resp.status_code == 200
+    assert len(resp.json()["one_time_extra_payments"]) == 1
+
+
+@pytest.mark.anyio
+async def test_update_plan_with_if_match(client, auth_headers):
+    create_resp = await client.post(
+        "/api/plans",
+        json={"name": "Tagged Plan", "amount": "100000", "interest_rate": "4.0", "term": {"years": 15}},
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+    etag = (await client.get(f"/api/plans/{plan_id}", headers=auth_headers)).headers["ETag"]
+
+    resp = await client.patch(
+        f"/api/plans/{plan_id}", json={"name": "Renamed"}, headers={**auth_headers, "If-Match": etag}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    resp = await client.patch(
+        f"/api/plans/{plan_id}", json={"name": "Stale"}, headers={**auth_headers, "If-Match": etag}
+    )
+    assert resp.status_code == 412
+    assert resp.json()["type"] == "urn:amortsched/errors/precondition-failed"
+    resp = await client.get(f"/api/plans/{plan_id}", headers=auth_headers)
+    assert resp.json()["name"] == "Renamed"
+
+
+def test_only_a_failed_precondition_maps_to_412():
+    plan_id = uuid.uuid4()
+    assert domain_error_to_problem(StaleRevisionError("Plan", plan_id, 1))[0] == 412
+    status, problem = domain_error_to_problem(ConcurrentUpdateError("Plan", plan_id, 1))
+    assert status == 409
+    assert problem["type"] == "urn:amortsched/errors/conflict"
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from amortsched.adapters.persistence.engine import read_session_factory
+
+
+@pytest.fixture
+async def replica_statements(app, database_url):
+    # The "replica" is the primary's database reached through its own engine, so routing is observable.
+    engine = create_async_engine(database_url.replace("+psycopg://", "+psycopg_async://"))
+    statements: list[str] = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    app.state.replica_session_factories = itertools.cycle([read_session_factory(engine)])
+    yield statements
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_reads_go_to_replica_except_right_after_a_write(client, auth_headers, replica_statements):
+    client.cookies.clear()
+    resp = await client.get("/api/plans", headers=auth_headers)
+    assert resp.status_code == 200
+    assert replica_statements
+
+    replica_statements.clear()
+    resp = await client.get("/api/plans", headers={**auth_headers, "X-Read-From": "primary"})
+    assert resp.status_code == 200
+    assert replica_statements == []
+
+    resp = await client.post(
+        "/api/plans",
+        json={"name": "Sticky", "amount": "1000", "interest_rate": "5", "term": {"years": 1}},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201
+    assert "read_primary" in resp.cookies
+    assert replica_statements == []
+
+    resp = await client.get("/api/plans", headers=auth_headers)
+    assert [plan["name"] for plan in resp.json()] == ["Sticky"]
+    assert replica_statements == []
+
+
+@pytest.mark.anyio
+async def test_query_routes_with_a_body_do_not_pin_reads_to_primary(client, auth_headers, replica_statements):
+    resp = await client.post(
+        "/api/plans",
+        json={"name": "Compared", "amount": "1000", "interest_rate": "5", "term": {"years": 1}},
+        headers=auth_headers,
+    )
+    plan_id = resp.json()["id"]
+    client.cookies.clear()
+    replica_statements.clear()
+
+    resp = await client.post(f"/api/plans/{plan_id}/schedules", headers=auth_headers)
+    assert resp.status_code == 201
+    resp = await client.post(f"/api/plans/{plan_id}/schedules/compare", json={}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert "read_primary" not in client.cookies
+    # Served by the replica's read-only autocommit session rather than a transaction on the primary.
+    assert replica_statements
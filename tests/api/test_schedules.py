@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 import pytest
 
 
@@ -15,3 +17,88 @@ async def test_generate_schedule(client, auth_headers):
     data = resp.json()
     assert len(data["installments"]) > 0
     assert data["totals"]["months"] == 360
+
+
+@pytest.mark.anyio
+async def test_generate_schedule_installment_shape(client, auth_headers):
+    create_resp = await client.post(
+        "/api/plans",
+        json={
+            "name": "Shape Plan",
+            "amount": "12000",
+            "interest_rate": "6",
+            "term": {"years": 1},
+            "start_date": "2025-01-15",
+        },
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+
+    resp = await client.post(f"/api/plans/{plan_id}/schedules", headers=auth_headers)
+    assert resp.status_code == 201
+    first = resp.json()["installments"][0]
+    assert first["installment_number"] == 1
+    assert first["month"] == 1
+    assert first["month_name"] == "January"
+    assert first["type"] == "scheduled"
+    assert Decimal(first["total"]) == Decimal(first["principal"]) + Decimal(first["interest"]) + Decimal(first["fees"])
+    assert set(first["balance"]) == {"before", "after"}
+
+
+@pytest.mark.anyio
+async def test_compare_schedule(client, auth_headers):
+    create_resp = await client.post(
+        "/api/plans",
+        json={
+            "name": "Compare Plan",
+            "amount": "100000",
+            "interest_rate": "5.0",
+            "term": {"years": 30},
+            "start_date": "2025-01-01",
+        },
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+
+    resp = await client.post(
+        f"/api/plans/{plan_id}/schedules/compare",
+        json={"one_time_extra_payments": [{"date": "2026-06-15", "amount": "20000"}]},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [(p["year"], p["month"]) for p in data["periods"]] == [(2026, 6)]
+    assert data["months_saved"] > 0
+    assert Decimal(data["interest_saved"]) > 0
+    assert data["converged"] is False
+
+
+@pytest.mark.anyio
+async def test_generate_schedule_window(client, auth_headers):
+    create_resp = await client.post(
+        "/api/plans",
+        json={
+            "name": "Window Plan",
+            "amount": "100000",
+            "interest_rate": "5.0",
+            "term": {"years": 30},
+            "start_date": "2025-01-01",
+        },
+        headers=auth_headers,
+    )
+    plan_id = create_resp.json()["id"]
+
+    resp = await client.post(
+        f"/api/plans/{plan_id}/schedules",
+        params={"from_date": "2031-01-01", "to_date": "2031-12-31"},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [inst["year"] for inst in data["installments"]] == [2031] * 12
+    assert data["totals"]["months"] == 360
+
+    resp = await client.post(
+        f"/api/plans/{plan_id}/schedules", params={"from_period": 5, "to_period": 2}, headers=auth_headers
+    )
+    assert resp.status_code == 422
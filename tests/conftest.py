@@ -1,6 +1,9 @@
 import pytest
+from sqlalchemy import create_engine as create_sync_engine
 from testcontainers.postgres import PostgresContainer
 
+from amortsched.adapters.persistence.tables import metadata
+
 
 @pytest.fixture
 def anyio_backend():
@@ -11,3 +14,14 @@ def anyio_backend():
 def postgres():
     with PostgresContainer("postgres:18-alpine") as pg:
         yield pg
+
+
+@pytest.fixture
+def database_url(postgres):
+    url = postgres.get_connection_url(driver="psycopg")
+    engine = create_sync_engine(url)
+    metadata.drop_all(engine, checkfirst=True)
+    metadata.create_all(engine)
+    yield url
+    metadata.drop_all(engine, checkfirst=True)
+    engine.dispose()
@@ -1,8 +1,13 @@
 import datetime
+import uuid
 from decimal import Decimal
 
-from amortsched.core.amortization import AmortizationSchedule
-from amortsched.core.values import Term
+import pytest
+
+from amortsched.core.amortization import AmortizationSchedule, CheckpointCache, compare_schedules
+from amortsched.core.entities import Plan
+from amortsched.core.errors import AmortizationError, InvalidExtraPaymentError
+from amortsched.core.values import OneTimeExtraPayment, PlanInputs, ScheduleWindow, Term
 
 
 def test_basic_amortization():
@@ -20,3 +25,177 @@ def test_zero_interest_rate():
     installments = list(schedule.generate(datetime.date(2025, 1, 1)))
     assert len(installments) == 12
     assert all(inst.payment.interest == Decimal("0") for inst in installments)
+
+
+def test_compare_schedules_extra_payment():
+    baseline = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    scenario = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    scenario.add_one_time_extra_payment(datetime.date(2026, 6, 15), 20_000)
+
+    comparison = compare_schedules(baseline, scenario, datetime.date(2025, 1, 1))
+
+    # Only the period holding the extra payment differs before the paths diverge for good.
+    assert [(delta.year, delta.month) for delta in comparison.periods] == [(2026, 6)]
+    assert not comparison.converged
+    assert comparison.months_saved > 0
+    assert comparison.interest_saved > 0
+
+
+def test_compare_schedules_payoff_by_extra_payment_matches_totals():
+    start = datetime.date(2025, 1, 1)
+    baseline = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    scenario = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    scenario.add_one_time_extra_payment(datetime.date(2026, 6, 15), 200_000)
+
+    comparison = compare_schedules(baseline, scenario, start)
+
+    # The interest accrued in the month paid off is on no row but is part of the scenario's totals.
+    assert baseline.last_totals is not None and scenario.last_totals is not None
+    assert comparison.interest_saved == baseline.last_totals.interest - scenario.last_totals.interest
+    assert comparison.fees_saved == baseline.last_totals.fees - scenario.last_totals.fees
+    assert comparison.months_saved == baseline.last_totals.months - scenario.last_totals.months
+    assert comparison.interest_saved == pytest.approx(Decimal("85963.64"), abs=Decimal("0.01"))
+
+
+def test_compare_schedules_identical_inputs_converge():
+    baseline = AmortizationSchedule(amount=50_000, term=Term(10), interest_rate=Decimal("4.0"))
+    scenario = AmortizationSchedule(amount=50_000, term=Term(10), interest_rate=Decimal("4.0"))
+
+    comparison = compare_schedules(baseline, scenario, datetime.date(2025, 1, 1))
+
+    assert comparison.periods == []
+    assert comparison.converged
+    assert comparison.months_saved == 0
+    assert comparison.interest_saved == 0
+
+
+def test_generate_window_matches_full_schedule():
+    schedule = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    schedule.add_recurring_extra_payment(datetime.date(2026, 1, 10), 200, 36)
+    start = datetime.date(2025, 1, 1)
+    full = list(schedule.generate(start))
+    totals = schedule.last_totals
+    # Runs without a window do not record checkpoints.
+    assert not schedule.checkpoints
+
+    first_year = ScheduleWindow(from_date=datetime.date(2025, 1, 1), to_date=datetime.date(2025, 12, 31))
+    assert list(schedule.generate(start, window=first_year)) == list(first_year.select(full))
+    assert schedule.checkpoints
+
+    window = ScheduleWindow(from_date=datetime.date(2031, 1, 1), to_date=datetime.date(2031, 12, 31))
+    # Resumes from a checkpoint recorded by the windowed run above.
+    windowed = list(schedule.generate(start, window=window))
+
+    assert windowed == list(window.select(full))
+    assert {(inst.year, inst.i is not None) for inst in windowed} == {(2031, True)}
+    assert len(windowed) == 12
+    assert schedule.last_totals == totals
+
+
+def test_windowed_generation_resumes_across_engines(monkeypatch):
+    monkeypatch.setattr(AmortizationSchedule, "_checkpoint_cache", CheckpointCache())
+    start = datetime.date(2025, 1, 1)
+    first = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    full = list(first.generate(start))
+    list(first.generate(start, window=ScheduleWindow(last_period=1)))
+
+    engine = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+    periods_walked = 0
+    accrue = engine._accrue_interest_and_apply_extras
+
+    def counting_accrue(**kwargs):
+        nonlocal periods_walked
+        periods_walked += 1
+        return accrue(**kwargs)
+
+    monkeypatch.setattr(engine, "_accrue_interest_and_apply_extras", counting_accrue)
+    window = ScheduleWindow(first_period=300, last_period=302)
+    windowed = list(engine.generate(start, window=window))
+
+    assert windowed == list(window.select(full))
+    # Resumed from the checkpoint at period 289 instead of walking the loan from its first period.
+    assert periods_walked == 360 - 288
+    assert engine.last_totals is not None
+    assert engine.last_totals.months == 360
+
+
+def test_summaries_skip_checkpoints(monkeypatch):
+    cache = CheckpointCache()
+    monkeypatch.setattr(AmortizationSchedule, "_checkpoint_cache", cache)
+    schedule = AmortizationSchedule(amount=100_000, term=Term(30), interest_rate=Decimal("5.0"))
+
+    assert schedule.summarize(datetime.date(2025, 1, 1)).months == 360
+    assert len(cache) == 0
+    assert not schedule.checkpoints
+
+
+def test_generate_period_window_on_fresh_engine():
+    schedule = AmortizationSchedule(amount=12_000, term=Term(1), interest_rate=Decimal("6.0"))
+    installments = list(
+        schedule.generate(datetime.date(2025, 1, 1), window=ScheduleWindow(first_period=4, last_period=6))
+    )
+    assert [inst.i for inst in installments] == [4, 5, 6]
+    assert schedule.last_totals is not None
+    assert schedule.last_totals.months == 12
+
+
+def test_plan_inputs_normalize_and_sort():
+    inputs = PlanInputs.create(
+        50_000,
+        (2, 18),
+        "4.5",
+        one_time_extra_payments=[
+            OneTimeExtraPayment(date=datetime.date(2026, 3, 1), amount=1_000),
+            OneTimeExtraPayment(date=datetime.date(2025, 6, 1), amount=500),
+        ],
+    )
+    assert inputs.amount == Decimal("50000")
+    assert inputs.term == Term(3, 6)
+    assert inputs.interest_rate == Decimal("4.5")
+    assert [p.date for p in inputs.one_time_extra_payments] == [datetime.date(2025, 6, 1), datetime.date(2026, 3, 1)]
+    assert all(isinstance(p.amount, Decimal) for p in inputs.one_time_extra_payments)
+
+    engine = AmortizationSchedule.from_inputs(inputs)
+    expected = AmortizationSchedule(amount=50_000, term=Term(3, 6), interest_rate=Decimal("4.5"))
+    expected.add_one_time_extra_payment(datetime.date(2026, 3, 1), 1_000)
+    expected.add_one_time_extra_payment(datetime.date(2025, 6, 1), 500)
+    start = datetime.date(2025, 1, 1)
+    assert list(engine.generate(start)) == list(expected.generate(start))
+
+
+def test_plan_generation_reuses_normalized_fields(monkeypatch):
+    inputs = PlanInputs.create(
+        50_000,
+        10,
+        "4.5",
+        one_time_extra_payments=[OneTimeExtraPayment(date=datetime.date(2026, 3, 1), amount=1_000)],
+    )
+    plan = Plan(
+        user_id=uuid.uuid4(),
+        name="Plan",
+        slug="plan",
+        amount=inputs.amount,
+        term=inputs.term,
+        interest_rate=inputs.interest_rate,
+        start_date=datetime.date(2025, 1, 1),
+        one_time_extra_payments=list(inputs.one_time_extra_payments),
+    )
+
+    def create(*args, **kwargs):
+        raise AssertionError("plan inputs were validated again")
+
+    monkeypatch.setattr(PlanInputs, "create", create)
+    assert plan.to_inputs() == inputs
+    expected = list(AmortizationSchedule.from_inputs(inputs).generate(plan.start_date))
+    assert plan.generate().installments == expected
+
+
+def test_plan_inputs_reject_invalid_values():
+    with pytest.raises(AmortizationError):
+        PlanInputs.create(0, 10, 5)
+    with pytest.raises(AmortizationError):
+        PlanInputs.create(10_000, 10, -1)
+    with pytest.raises(InvalidExtraPaymentError):
+        PlanInputs.create(
+            10_000, 10, 5, one_time_extra_payments=[OneTimeExtraPayment(date=datetime.date(2025, 1, 1), amount=0)]
+        )
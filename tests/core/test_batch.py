@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+
+from amortsched.core.amortization import AmortizationSchedule
+from amortsched.core.batch import generate_many, tune_chunk_size
+from amortsched.core.values import ScheduleFrame, ScheduleTotals, Term
+
+START = datetime.date(2025, 1, 1)
+
+
+def _inputs(count: int) -> list[tuple[AmortizationSchedule, datetime.date]]:
+    return [
+        (AmortizationSchedule(amount=10_000 + 1_000 * n, term=Term(5), interest_rate=Decimal("4.5")), START)
+        for n in range(count)
+    ]
+
+
+def test_generate_many_summaries_in_input_order():
+    inputs = _inputs(40)
+    expected = []
+    for engine, start in _inputs(40):
+        list(engine.generate(start))
+        expected.append(engine.last_totals)
+
+    results = generate_many(inputs, workers=2, summary_only=True, chunk_size=7)
+
+    assert all(isinstance(result, ScheduleTotals) for result in results)
+    assert results == expected
+
+
+def test_generate_many_frames_inline():
+    results = generate_many(_inputs(3), workers=1)
+    assert all(isinstance(result, ScheduleFrame) for result in results)
+    frame = results[0]
+    assert isinstance(frame, ScheduleFrame)
+    assert len(frame) == 60
+    assert frame.totals is not None and frame.totals.months == 60
+    assert set(frame.columns()) == {
+        "i",
+        "year",
+        "month",
+        "kind",
+        "principal",
+        "interest",
+        "fees",
+        "balance_before",
+        "balance_after",
+    }
+
+
+def test_tune_chunk_size():
+    # Fast items: bounded by keeping several chunks per worker.
+    assert tune_chunk_size(1e-6, remaining=1_000, workers=4) == 63
+    # Slow items: bounded by the per-chunk time target.
+    assert tune_chunk_size(0.1, remaining=1_000, workers=4) == 2
+    assert tune_chunk_size(10.0, remaining=1_000, workers=4) == 1